@@ -0,0 +1,58 @@
+"""格子图集：所有格子外观预先画在一张 Surface 上，地图按外观编号用 Surface.blits 批量绘制
+
+以前每画一格要 pygame.draw.rect 填底色、再画边框、再 blit 一个文字符号，三四次 Python
+层的绘制调用。现在每种外观（TileStyle：底色、网格线、符号）在每个支持的格子尺寸下只画
+一次，排成一行放在图集上；画一片格子时调用方先用查找表把地图数组换成外观编号数组，
+再一次 blits 从图集拷贝。缩放时换用对应尺寸的图集，不在每帧缩放。
+"""
+from collections import namedtuple
+import pygame
+
+# color: 底色；border: 网格线颜色，None 为不画；glyph: 居中的符号，'' 为没有；glyph_color: 符号颜色
+TileStyle = namedtuple('TileStyle', ['color', 'border', 'glyph', 'glyph_color'])
+
+class TileAtlas:
+    """按格子尺寸预渲染的图集，外观编号即 styles 中的下标"""
+
+    def __init__(self, styles, tile_sizes, font_for):
+        """font_for(格子尺寸) 返回该尺寸下画符号用的字体；需要在 pygame.display.set_mode 之后创建"""
+        self.styles = list(styles)
+        self.sheets = {}
+        for tile_size in tile_sizes:
+            self.sheets[tile_size] = self._build(tile_size, font_for(tile_size))
+
+    @property
+    def tile_sizes(self):
+        return sorted(self.sheets)
+
+    def _build(self, tile_size, font):
+        """画出一个尺寸的图集，返回 (Surface, 每种外观在图集上的区域)"""
+        sheet = pygame.Surface((tile_size * len(self.styles), tile_size)).convert()
+        areas = []
+        for i, style in enumerate(self.styles):
+            rect = pygame.Rect(i * tile_size, 0, tile_size, tile_size)
+            sheet.set_clip(rect) # 小尺寸下符号比格子大时不画到相邻的外观上
+            sheet.fill(style.color, rect)
+            if style.border is not None:
+                pygame.draw.rect(sheet, style.border, rect, 1)
+            if style.glyph:
+                text = font.render(style.glyph, True, style.glyph_color)
+                sheet.blit(text, text.get_rect(center=rect.center))
+            areas.append(rect)
+        sheet.set_clip(None)
+        return sheet, areas
+
+    def blit_tile(self, target, tile_size, style, dest):
+        """画一格，返回 target 上被改动的矩形"""
+        sheet, areas = self.sheets[tile_size]
+        return target.blit(sheet, dest, areas[style])
+
+    def blit_block(self, target, tile_size, ids, left=0, top=0):
+        """把外观编号数组 ids（形状为 (行, 列)）画到 target 上，ids[0, 0] 画在 (left, top)；一次 blits 调用"""
+        sheet, areas = self.sheets[tile_size]
+        rows, columns = ids.shape
+        xs = range(left, left + columns * tile_size, tile_size)
+        sequence = [(sheet, (x, y), areas[style])
+                    for y, row in zip(range(top, top + rows * tile_size, tile_size), ids.tolist())
+                    for x, style in zip(xs, row)]
+        target.blits(sequence, doreturn=False)
@@ -0,0 +1,85 @@
+"""无界面批量模拟，用于平衡性测试
+
+每局用一个种子生成随机地图，由简单的贪心策略操控英雄（走向视野内最近的、
+还没去过的地点，看不到地点时随机探索），每隔若干条指令结束一天（城镇收入、
+资源重生、营地增长），每隔若干条指令记录一次金币和经验。
+多局模拟分给进程池并行执行，最后汇总各采样点的金币/经验分布。
+
+用法: python batch.py [局数] [每局指令数] [进程数]   默认 1000 200 CPU 核数
+"""
+import os
+import sys
+import time
+import random
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+import numpy as np
+from engine import World
+
+MAP_SIZE = 64
+SAMPLE_EVERY = 20  # 每隔多少条指令记录一次金币和经验
+DAY_EVERY = 10     # 每隔多少条指令结束一天
+
+def choose_command(world, visited, rng):
+    """贪心策略：去最近的已探索、未访问过的地点；没有时在附近随机选一个格子探索"""
+    hero = world.hero
+    site = world.known_sites.nearest(hero.x, hero.y, accept=lambda obj: (obj.x, obj.y) not in visited)
+    if site:
+        visited.add((site.x, site.y)) # 到不了的地点也不再尝试
+        return ('goto', site.x, site.y)
+    reach = hero.vision_radius() + 2 # 目标选在视野边缘附近，寻路距离短
+    for _ in range(20):
+        x = hero.x + rng.randint(-reach, reach)
+        y = hero.y + rng.randint(-reach, reach)
+        if world.is_tile_passable(x, y):
+            return ('goto', x, y)
+    return ('move', rng.choice((-1, 1)), 0)
+
+def simulate(seed, steps=200, map_size=MAP_SIZE):
+    """模拟一局，返回最终状态和 [(指令数, 金币, 经验), ...] 曲线"""
+    world = World(map_size, map_size, seed)
+    rng = random.Random(seed) # 策略自己的随机数，不影响世界里的随机事件
+    visited = set()
+    curve = []
+    for step in range(1, steps + 1):
+        world.apply(choose_command(world, visited, rng))
+        if step % DAY_EVERY == 0:
+            world.end_turn()
+        if step % SAMPLE_EVERY == 0:
+            curve.append((step, world.hero.resources['Gold'], world.hero.experience))
+    return {'state': world.state(), 'curve': curve}
+
+def run_batch(seeds, steps=200, workers=None):
+    """在进程池中模拟多局，返回每局的结果（与 seeds 顺序一致）"""
+    workers = workers or os.cpu_count() or 1
+    run = partial(simulate, steps=steps)
+    if workers == 1:
+        return [run(seed) for seed in seeds]
+    chunksize = max(1, len(seeds) // (workers * 8))
+    with ProcessPoolExecutor(workers) as pool:
+        return list(pool.map(run, seeds, chunksize=chunksize))
+
+def summarize(results):
+    """各采样点金币和经验的 10/50/90 分位数"""
+    curves = np.array([result['curve'] for result in results]) # (局数, 采样点, 3)
+    rows = []
+    for i in range(curves.shape[1]):
+        gold = np.percentile(curves[:, i, 1], (10, 50, 90))
+        exp = np.percentile(curves[:, i, 2], (10, 50, 90))
+        rows.append((int(curves[0, i, 0]), gold, exp))
+    return rows
+
+def main(games=1000, steps=200, workers=None):
+    start = time.perf_counter()
+    results = run_batch(list(range(games)), steps, workers)
+    elapsed = time.perf_counter() - start
+    print(f"模拟 {games} 局 x {steps} 条指令，{MAP_SIZE}x{MAP_SIZE} 地图: "
+          f"{elapsed:.1f} s（{games / elapsed:.0f} 局/秒）")
+    print(f"{'指令数':>6} {'金币 p10/p50/p90':>24} {'经验 p10/p50/p90':>22}")
+    for step, gold, exp in summarize(results):
+        print(f"{step:>8} {gold[0]:>8.0f}/{gold[1]:.0f}/{gold[2]:.0f} {exp[0]:>10.0f}/{exp[1]:.0f}/{exp[2]:.0f}")
+    levels = [result['state']['level'] for result in results]
+    print(f"最终等级: 平均 {np.mean(levels):.2f}，最高 {max(levels)}")
+
+if __name__ == "__main__":
+    main(*[int(arg) for arg in sys.argv[1:4]])
@@ -0,0 +1,81 @@
+"""对比逐格绘制调用与格子图集批量 blits 的地图绘制耗时
+
+对每个缩放级别：
+- 区块：把一个区块的格子画到离屏 Surface 上。逐格绘制为旧实现的做法（每格 draw.rect 填底色、
+  draw.rect 画网格线、渲染并 blit 符号），图集为 TileAtlas.blit_block 的一次 blits
+- 整屏：镜头跳到没画过的位置，整个视口的区块全部重建并拷贝到屏幕（TerrainLayer.restore）
+
+用法: python bench_atlas.py [边长] [重复次数]   默认 512 20
+"""
+import os
+import sys
+import time
+
+os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+os.environ.setdefault('PYGAME_HIDE_SUPPORT_PROMPT', '1')
+
+import pygame
+from render_cache import text_cache
+from startup import sysfont
+from heroplay import Game
+from map import MapRenderer
+
+SEED = 42
+
+def draw_per_tile(surface, atlas, ids, tile_size, font):
+    """旧实现：逐格用绘制调用画出外观编号数组 ids"""
+    for y, row in enumerate(ids.tolist()):
+        for x, style_id in enumerate(row):
+            style = atlas.styles[style_id]
+            rect = pygame.Rect(x * tile_size, y * tile_size, tile_size, tile_size)
+            pygame.draw.rect(surface, style.color, rect)
+            if style.border is not None:
+                pygame.draw.rect(surface, style.border, rect, 1)
+            if style.glyph:
+                text = text_cache.render(font, style.glyph, style.glyph_color)
+                surface.blit(text, text.get_rect(center=rect.center))
+
+def best_ms(repeats, function):
+    times = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        function()
+        times.append(time.perf_counter() - start)
+    return min(times) * 1000
+
+def bench_renderer(name, screen, camera, layer, fonts, repeats):
+    atlas = layer.atlas
+    cs = layer.chunk_size
+    for tile_size in atlas.tile_sizes:
+        camera.set_tile_size(tile_size)
+        layer.set_tile_size(tile_size)
+        surface = pygame.Surface((cs * tile_size, cs * tile_size)).convert()
+        cx, cy = camera.x // (cs * tile_size), camera.y // (cs * tile_size)
+        ids = layer.tile_ids(cx * cs, cy * cs, (cx + 1) * cs, (cy + 1) * cs)
+        font = fonts(tile_size)
+        per_tile = best_ms(repeats, lambda: draw_per_tile(surface, atlas, ids, tile_size, font))
+        batched = best_ms(repeats, lambda: atlas.blit_block(surface, tile_size, ids))
+
+        def cold_frame():
+            layer.build()
+            layer.restore(screen)
+        frame = best_ms(repeats, cold_frame)
+        x0, y0, x1, y1 = camera.visible_tiles()
+        print(f"{name:<8}{tile_size:>6}{(x1 - x0) * (y1 - y0):>8}{per_tile:>12.2f}{batched:>12.2f}"
+              f"{per_tile / batched:>8.1f}x{frame:>12.2f}")
+
+def main(size=512, repeats=20):
+    print(f"地图 {size}x{size}，每项取 {repeats} 次中最快的一次")
+    print(f"{'程序':<8}{'格子':>6}{'可见格':>8}{'逐格(ms)':>12}{'图集(ms)':>12}{'加速':>9}{'整屏(ms)':>12}")
+    renderer = MapRenderer(size, size, SEED)
+    bench_renderer('map', renderer.screen, renderer.camera, renderer.terrain_layer,
+                   lambda tile_size: sysfont('Arial', max(6, 10 * tile_size // 16)), repeats)
+    game = Game(size, size, SEED)
+    game.fog.state[:] = 1 # 全部探索过，画的都是地形
+    bench_renderer('game', game.screen, game.camera, game.terrain_layer,
+                   lambda tile_size: pygame.font.Font(None, tile_size // 2), repeats)
+    print("逐格/图集为画一个区块的耗时；整屏为清空区块缓存后重画整个视口")
+    pygame.quit()
+
+if __name__ == "__main__":
+    main(*[int(arg) for arg in sys.argv[1:3]])
@@ -0,0 +1,50 @@
+"""测量 MapRenderer 在不同地图尺寸下的每帧绘制耗时（镜头持续滚动）
+
+用法: python bench_camera.py [尺寸 ...]   默认 48 512 1024 4096
+在无显示环境下使用 SDL 的 dummy 驱动运行。
+"""
+import os
+import sys
+import time
+
+os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+os.environ.setdefault('PYGAME_HIDE_SUPPORT_PROMPT', '1')
+
+import pygame
+from map import MapRenderer
+
+def bench_size(size, frames=300, step=(7, 5), seed=None):
+    renderer = MapRenderer(size, size, seed)
+    camera = renderer.camera
+    renderer.draw_map()  # 第一帧，建好可见区块
+
+    times = []
+    dx, dy = step
+    for _ in range(frames):
+        # 在地图内来回滚动，不断有新区块进入视口、远处区块被释放
+        if not 0 <= camera.x + dx <= camera.map_width * camera.tile_size - camera.viewport.width:
+            dx = -dx
+        if not 0 <= camera.y + dy <= camera.map_height * camera.tile_size - camera.viewport.height:
+            dy = -dy
+        camera.scroll(dx, dy)
+        renderer.move_hero(1, 0)
+        start = time.perf_counter()
+        pygame.display.update(renderer.draw_map())
+        times.append(time.perf_counter() - start)
+
+    times.sort()
+    return {
+        'mean_ms': sum(times) / len(times) * 1000,
+        'p95_ms': times[int(len(times) * 0.95)] * 1000,
+        'chunks': len(renderer.terrain_layer.chunks),
+    }
+
+def main(sizes):
+    print(f"{'尺寸':>8} {'平均(ms)':>10} {'p95(ms)':>10} {'缓存区块':>8}")
+    for size in sizes:
+        result = bench_size(size)
+        print(f"{size:>6}^2 {result['mean_ms']:>10.2f} {result['p95_ms']:>10.2f} {result['chunks']:>8}")
+    pygame.quit()
+
+if __name__ == "__main__":
+    main([int(arg) for arg in sys.argv[1:]] or [48, 512, 1024, 4096])
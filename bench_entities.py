@@ -0,0 +1,38 @@
+"""测量 AI 实体每次 tick 的耗时随实体数量的变化（目标：1024x1024 地图上 10000 个实体不超过 16 ms）
+
+用法: python bench_entities.py [地图边长] [tick 次数]   默认 1024 300
+实体中四分之一是电脑英雄，其余是游荡怪物；一次 tick 没有实体移动时（移动点数用完）
+开始新的一天（不计入耗时）。
+"""
+import sys
+import time
+import numpy as np
+from engine import World
+
+TICK_BUDGET_MS = 16
+
+def bench(world, count, ticks):
+    world.entities.populate(count // 4, count - count // 4)
+    times = []
+    moved = 0
+    for _ in range(ticks):
+        start = time.perf_counter()
+        ids, _, _ = world.tick_entities()
+        times.append(time.perf_counter() - start)
+        moved += len(ids)
+        if not len(ids):
+            world.entities.new_day()
+    times = np.array(times) * 1000
+    return np.percentile(times, 50), np.percentile(times, 95), times.max(), moved / ticks
+
+def main(size=1024, ticks=300, seed=42):
+    print(f"地图 {size}x{size}，每组 {ticks} 次 tick")
+    print(f"{'实体数':>8} {'p50(ms)':>9} {'p95(ms)':>9} {'最大(ms)':>9} {'平均移动':>9}")
+    for count in (1000, 10000, 50000):
+        world = World(size, size, seed)
+        p50, p95, worst, moved = bench(world, count, ticks)
+        flag = '' if p95 <= TICK_BUDGET_MS else '  超出预算'
+        print(f"{count:>8} {p50:>9.2f} {p95:>9.2f} {worst:>9.2f} {moved:>9.0f}{flag}")
+
+if __name__ == "__main__":
+    main(*[int(arg) for arg in sys.argv[1:3]])
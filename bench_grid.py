@@ -0,0 +1,69 @@
+"""对比旧的逐格 Tile 对象与 TileGrid 数组存储的内存占用和生成耗时
+
+用法: python bench_grid.py [尺寸 ...]   默认 48 512 2048
+"""
+import sys
+import time
+import random
+import tracemalloc
+import numpy as np
+from tilegrid import TerrainType, TileGrid
+
+class Tile:
+    """与 map.py 中旧版 Tile 相同的结构"""
+    def __init__(self, terrain_type, object_type=None):
+        self.terrain_type = terrain_type
+        self.object_type = object_type
+        self.explored = True
+
+def build_legacy(size):
+    """旧实现：列表套列表，每格一个 Tile 对象，逐格掷骰"""
+    tiles = [[None for _ in range(size)] for _ in range(size)]
+    for y in range(size):
+        for x in range(size):
+            rand_val = random.random()
+            if rand_val < 0.4:
+                terrain = TerrainType.GRASS
+            elif rand_val < 0.55:
+                terrain = TerrainType.FOREST
+            elif rand_val < 0.7:
+                terrain = TerrainType.MOUNTAIN
+            elif rand_val < 0.9:
+                terrain = TerrainType.WATER
+            else:
+                terrain = TerrainType.DESERT
+            tiles[y][x] = Tile(terrain)
+    return tiles
+
+def build_grid(size):
+    """新实现：uint8 数组，向量化生成"""
+    grid = TileGrid(size, size)
+    thresholds = np.array([0.4, 0.55, 0.7, 0.9])
+    terrain_lut = np.array([0, 3, 2, 1, 4], dtype=np.uint8)
+    grid.terrain[:] = terrain_lut[np.searchsorted(thresholds, np.random.random((size, size)), side='right')]
+    return grid
+
+def measure(builder, size):
+    """返回 (耗时秒, 峰值内存字节)；耗时在关闭 tracemalloc 时单独测量"""
+    builder(8)  # 预热，避免把 numpy 首次调用的开销算进去
+    start = time.perf_counter()
+    result = builder(size)
+    elapsed = time.perf_counter() - start
+    del result
+
+    tracemalloc.start()
+    result = builder(size)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del result
+    return elapsed, peak
+
+def main(sizes):
+    print(f"{'尺寸':>8} {'实现':>8} {'耗时(ms)':>12} {'内存(MB)':>12}")
+    for size in sizes:
+        for name, builder in (('Tile', build_legacy), ('TileGrid', build_grid)):
+            elapsed, peak = measure(builder, size)
+            print(f"{size:>6}^2 {name:>8} {elapsed * 1000:>12.1f} {peak / 1e6:>12.2f}")
+
+if __name__ == "__main__":
+    main([int(arg) for arg in sys.argv[1:]] or [48, 512, 2048])
@@ -0,0 +1,120 @@
+"""测量主循环空闲时的 CPU 占用和输入到画面的延迟
+
+每一项都在新进程中无窗口运行若干秒，分别用按需渲染（空闲时阻塞在 pygame.event.wait 上）
+和以前的逐帧运行（FrameScheduler.idle_wait = False）：
+- 空闲：没有任何输入，统计进程 CPU 时间占墙钟时间的比例、每秒循环和提交画面的次数
+- 输入：后台线程每隔 INPUT_INTERVAL_MS 投递一次移动英雄的按键，记录从投递到下一次
+  pygame.display.update 返回的时间（无窗口时提交画面就算“上屏”，不含显示器本身的延迟）
+
+用法: python bench_idle.py [每项秒数]   默认 3
+"""
+import os
+import sys
+import json
+import time
+import threading
+import subprocess
+import numpy as np
+
+INPUT_INTERVAL_MS = 250
+SCENARIOS = [('game', 18, 0), ('game', 256, 400), ('map', 256, 0), ('map', 256, 400)]  # (程序, 地图边长, AI 实体数)
+
+def child(app, size, population, idle_wait, with_input, seconds):
+    """子进程：运行主循环 seconds 秒，把统计结果以 JSON 打印到最后一行"""
+    import contextlib
+    import io
+    import pygame
+    with contextlib.redirect_stdout(io.StringIO()):
+        if app == 'map':
+            from map import MapRenderer
+            renderer = MapRenderer(size, size, 42, ai_heroes=population // 4, monsters=population - population // 4)
+            keys = (pygame.K_RIGHT, pygame.K_LEFT)
+        else:
+            from heroplay import Game
+            renderer = (Game(size, size, 42, ai_heroes=population // 4, monsters=population - population // 4)
+                        if size > 18 else Game())
+            keys = (pygame.K_d, pygame.K_a)
+    renderer.scheduler.idle_wait = idle_wait
+
+    presents = []
+    latencies = []
+    consumed = []  # 已被主循环取出、还没上屏的输入的投递时刻
+    start = {}
+
+    def track(events):
+        consumed.extend(event.posted for event in events if hasattr(event, 'posted'))
+        return events
+
+    original_get, original_wait, original_update = pygame.event.get, pygame.event.wait, pygame.display.update
+    pygame.event.get = lambda *args, **kwargs: track(original_get(*args, **kwargs))
+    pygame.event.wait = lambda *args, **kwargs: track([original_wait(*args, **kwargs)])[0]
+
+    def update(*args):
+        result = original_update(*args)
+        now = time.perf_counter()
+        if not start: # 从第一帧画出后开始统计
+            start.update(wall=now, cpu=time.process_time())
+        presents.append(now)
+        latencies.extend(now - posted for posted in consumed)
+        consumed.clear()
+        return result
+    pygame.display.update = update
+
+    stop = threading.Event()
+    def press_keys():
+        i = 0
+        while not stop.wait(INPUT_INTERVAL_MS / 1000):
+            try:
+                pygame.event.post(pygame.event.Event(pygame.KEYDOWN, key=keys[i % 2], mod=0,
+                                                     posted=time.perf_counter()))
+            except pygame.error:
+                break # 主循环已经退出
+            i += 1
+    if with_input:
+        threading.Thread(target=press_keys, daemon=True).start()
+
+    pygame.time.set_timer(pygame.QUIT, int(seconds * 1000), loops=1)
+    frames_before = renderer.scheduler.frames
+    try:
+        with contextlib.redirect_stdout(io.StringIO()):
+            renderer.run()
+    except SystemExit:
+        pass
+    stop.set()
+    wall = time.perf_counter() - start['wall']
+    cpu = time.process_time() - start['cpu']
+    print(json.dumps({
+        'cpu_percent': cpu / wall * 100,
+        'loops_per_s': (renderer.scheduler.frames - frames_before) / wall,
+        'presents_per_s': (len(presents) - 1) / wall,
+        'latency_p50': float(np.percentile(latencies, 50) * 1000) if latencies else None,
+        'latency_p95': float(np.percentile(latencies, 95) * 1000) if latencies else None,
+    }))
+
+def run_child(app, size, population, idle_wait, with_input, seconds):
+    env = dict(os.environ, SDL_VIDEODRIVER='dummy', PYGAME_HIDE_SUPPORT_PROMPT='1')
+    args = [sys.executable, __file__, '--child', app, str(size), str(population),
+            str(int(idle_wait)), str(int(with_input)), str(seconds)]
+    output = subprocess.run(args, env=env, capture_output=True, text=True, check=True).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+def main(seconds=3):
+    print(f"每项运行 {seconds} 秒；输入为每 {INPUT_INTERVAL_MS} ms 一次移动按键")
+    print(f"{'场景':<16}{'方式':<6}{'空闲 CPU':>10}{'循环/秒':>10}{'画面/秒':>10}"
+          f"{'输入时 CPU':>12}{'延迟 p50':>11}{'延迟 p95':>11}")
+    for app, size, population in SCENARIOS:
+        name = f"{app}[{size}]" + (f"+{population}" if population else '')
+        for idle_wait, label in ((True, '按需'), (False, '逐帧')):
+            idle = run_child(app, size, population, idle_wait, False, seconds)
+            busy = run_child(app, size, population, idle_wait, True, seconds)
+            print(f"{name:<16}{label:<6}{idle['cpu_percent']:>9.1f}%{idle['loops_per_s']:>10.1f}"
+                  f"{idle['presents_per_s']:>10.1f}{busy['cpu_percent']:>11.1f}%"
+                  f"{busy['latency_p50']:>9.2f}ms{busy['latency_p95']:>9.2f}ms")
+    print("延迟为投递按键到下一次 pygame.display.update 返回；CPU 为进程 CPU 时间占墙钟时间的比例")
+
+if __name__ == "__main__":
+    if len(sys.argv) > 1 and sys.argv[1] == '--child':
+        app, size, population, idle_wait, with_input = sys.argv[2], *map(int, sys.argv[3:7])
+        child(app, size, population, bool(idle_wait), bool(with_input), float(sys.argv[7]))
+    else:
+        main(*[float(arg) for arg in sys.argv[1:2]])
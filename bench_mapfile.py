@@ -0,0 +1,67 @@
+"""分块地图文件的打开和读取耗时：按种子生成一张大地图，转换成 .hmap 后测量
+
+- 转换：生成地图、写地图文件的耗时，文件大小与原始地图字节数对比
+- 打开：只读文件头和索引；流式加载（只读起点附近的区块，得到可以开始玩的 World）；
+  一次读入整张地图；与直接生成地图对比
+- 区块：单个区块读取、解压并叠加地点的平均耗时，后台线程预读全部区块的吞吐量
+
+用法: python bench_mapfile.py [边长] [区块边长]   默认 4096 64
+"""
+import os
+import sys
+import time
+import tempfile
+from engine import World
+from mapfile import MapFile, ChunkStreamer, load_world, save_world_map
+
+SEED = 42
+
+def timed(function):
+    start = time.perf_counter()
+    result = function()
+    return result, (time.perf_counter() - start) * 1000
+
+def main(size=4096, chunk_size=64):
+    path = os.path.join(tempfile.mkdtemp(), f'bench_{size}.hmap')
+    world, generate_ms = timed(lambda: World(size, size, SEED))
+    _, convert_ms = timed(lambda: save_world_map(world, path, chunk_size))
+    file_size = os.path.getsize(path)
+    print(f"地图 {size}x{size}，区块 {chunk_size}x{chunk_size}，{len(world.objects)} 个地点，"
+          f"{len(world.monster_camps)} 个营地")
+    print(f"生成 {generate_ms:.0f} ms，转换写入 {convert_ms:.0f} ms，文件 {file_size / 1024 / 1024:.2f} MB"
+          f"（地图原始字节 {size * size / 1024 / 1024:.1f} MB）")
+    expected = bytes(world.game_map.data)
+    del world
+
+    map_file, open_ms = timed(lambda: MapFile(path))
+    streamed, stream_ms = timed(lambda: load_world(path, stream=True))
+    full, full_ms = timed(lambda: load_world(path))
+    print(f"{'打开（文件头和索引）':<24}{open_ms:>10.1f} ms")
+    print(f"{'流式加载（起点附近 ' + str(len(streamed.loaded_chunks)) + ' 块）':<24}{stream_ms:>10.1f} ms")
+    print(f"{'读入整张地图':<24}{full_ms:>10.1f} ms")
+    print(f"{'按种子生成':<24}{generate_ms:>10.1f} ms")
+
+    chunks = [(cx, cy) for cy in range(map_file.rows) for cx in range(map_file.columns)]
+    sample = chunks[::max(1, len(chunks) // 256)]
+    _, read_ms = timed(lambda: [map_file.read_chunk(*key) for key in sample])
+    print(f"{'单个区块读取':<24}{read_ms / len(sample) * 1000:>10.1f} us")
+
+    streamer = ChunkStreamer(map_file, radius=size, loaded=streamed.loaded_chunks)
+    start = time.perf_counter()
+    streamer.request([(size // 2, size // 2)])
+    ready = len(streamed.loaded_chunks)
+    while ready < len(chunks):
+        for key in streamer.poll():
+            streamed.load_chunk(*key)
+            ready += 1
+        time.sleep(0.001)
+    elapsed = time.perf_counter() - start
+    streamer.close()
+    print(f"{'后台预读全部区块':<24}{elapsed * 1000:>10.1f} ms（{len(chunks) / elapsed:.0f} 块/秒，含主线程写入地图）")
+    consistent = bytes(streamed.game_map.data) == expected == bytes(full.game_map.data)
+    print(f"流式读完与整张读入、原地图{'一致' if consistent else '不一致'}")
+    os.remove(path)
+    return 0 if consistent else 1
+
+if __name__ == "__main__":
+    sys.exit(main(*[int(arg) for arg in sys.argv[1:3]]))
@@ -0,0 +1,30 @@
+"""测量噪声地形生成耗时，并检查按区块生成与整图生成是否无缝一致
+
+用法: python bench_mapgen.py [尺寸 ...]   默认 48 512 1024 4096
+"""
+import sys
+import time
+import numpy as np
+from mapgen import NoiseMapGenerator, LazyTerrain
+
+def main(sizes, seed=42):
+    generator = NoiseMapGenerator(seed)
+    generator.terrain(0, 0, 8, 8)  # 预热
+    print(f"{'尺寸':>8} {'整图(ms)':>10} {'每百万格(ms)':>12}")
+    for size in sizes:
+        start = time.perf_counter()
+        terrain = generator.terrain(0, 0, size, size)
+        elapsed = time.perf_counter() - start
+        print(f"{size:>6}^2 {elapsed * 1000:>10.1f} {elapsed * 1000 / (size * size / 1e6):>12.1f}")
+
+    # 按需生成：只生成视口附近的区块，并且与整图结果逐格一致
+    lazy = LazyTerrain(generator, chunk_size=64)
+    start = time.perf_counter()
+    region = lazy.region(1000, 700, 64, 48)
+    elapsed = time.perf_counter() - start
+    expected = generator.terrain(1000, 700, 64, 48)
+    print(f"按需生成 64x48 视口: {elapsed * 1000:.1f} ms, 生成区块 {len(lazy.chunks)} 个, "
+          f"与整图一致: {bool(np.array_equal(region, expected))}")
+
+if __name__ == "__main__":
+    main([int(arg) for arg in sys.argv[1:]] or [48, 512, 1024, 4096])
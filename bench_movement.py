@@ -0,0 +1,75 @@
+"""测量英雄移动范围（MovementRange）整片重算与增量维护的耗时
+
+- 整片：结束回合后从英雄位置重新洪泛
+- 走一步：英雄沿最短路径走到相邻格子，移动力减少，同样整片重算
+- 格子变化：范围内一个格子变成别的地形（营地被清除之类），只修补经过它的子树
+- 查询：悬停时 remaining_at 的耗时（缓存已是最新）
+最后把增量修补的结果与新建的 MovementRange 对比，确认一致。
+
+用法: python bench_movement.py [地图边长] [移动力]   默认 1024 1500
+"""
+import sys
+import time
+import random
+from pathfinding import PathFinder
+from movement import MovementRange
+from engine import terrain_costs, impassable_tiles, event_tiles
+from bench_pathfinding import random_map, percentile
+
+class BenchHero:
+    def __init__(self, x, y, movement_left):
+        self.x = x
+        self.y = y
+        self.movement_left = movement_left
+
+def timed(function):
+    start = time.perf_counter()
+    function()
+    return (time.perf_counter() - start) * 1000
+
+def report(label, times):
+    print(f"{label}: 平均 {sum(times) / len(times):.3f} ms, p50 {percentile(times, 0.5):.3f} ms, "
+          f"p95 {percentile(times, 0.95):.3f} ms, 最大 {max(times):.3f} ms")
+
+def check(movement, finder, hero):
+    fresh = MovementRange(finder, hero)
+    fresh.update()
+    if (fresh.remaining, fresh.parent) != (movement.remaining, movement.parent):
+        raise SystemExit("增量更新的结果与整片重算不一致")
+
+def main(size=1024, points=1500, rounds=200, seed=1):
+    rng = random.Random(seed)
+    game_map = random_map(size, rng)
+    finder = PathFinder(game_map, terrain_costs, impassable_tiles, event_tiles)
+    hero = BenchHero(size // 2, size // 2, points)
+    while not finder.costs[hero.y * size + hero.x] or finder.stops[hero.y * size + hero.x]:
+        hero.x += 1
+    movement = MovementRange(finder, hero)
+    movement.update()
+    print(f"地图 {size}x{size}，移动力 {points}，可达 {len(movement.remaining)} 格")
+
+    full, step, change, lookup = [], [], [], []
+    for _ in range(rounds):
+        hero.movement_left = points # 结束回合
+        full.append(timed(movement.update))
+        path = movement.path_to(*rng.choice(movement.tiles())[:2])
+        if not path:
+            continue
+        hero.x, hero.y = path[0]
+        hero.movement_left = movement.remaining[hero.y * size + hero.x]
+        step.append(timed(movement.update))
+        x, y, _ = rng.choice(movement.tiles())
+        game_map.set(x, y, rng.choice('GDMW'))
+        change.append(timed(movement.update))
+        targets = [rng.choice(movement.tiles())[:2] for _ in range(100)]
+        lookup.append(timed(lambda: [movement.remaining_at(x, y) for x, y in targets]) / len(targets))
+    check(movement, finder, hero)
+
+    report("整片重算", full)
+    report("走一步", step)
+    report("格子变化", change)
+    print(f"查询: 平均 {sum(lookup) / len(lookup) * 1000:.2f} µs/次")
+    print(f"整片 {movement.full_updates} 次，增量 {movement.partial_updates} 次，结果与整片重算一致")
+
+if __name__ == "__main__":
+    main(*[int(arg) for arg in sys.argv[1:3]])
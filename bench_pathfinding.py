@@ -0,0 +1,53 @@
+"""测量 A* 寻路在大地图上的单次查询耗时
+
+用法: python bench_pathfinding.py [地图边长] [查询距离]   默认 1024 30
+查询距离大致对应一屏内的点击范围；同时测量缓存命中时的耗时。
+"""
+import sys
+import time
+import random
+from chargrid import CharGrid
+from pathfinding import PathFinder
+from engine import terrain_costs, impassable_tiles, event_tiles
+
+def random_map(size, rng):
+    """按固定比例随机铺地形，并撒一些事件地点"""
+    game_map = CharGrid(size, size, 'G')
+    terrain = rng.choices('GGGGDFSBMW', k=size * size)
+    for i in rng.sample(range(size * size), size * size // 200):
+        terrain[i] = rng.choice('TXRC')
+    game_map.data[:] = ''.join(terrain).encode('ascii')
+    return game_map
+
+def percentile(values, fraction):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * fraction))]
+
+def main(size=1024, distance=30, queries=500, seed=1):
+    rng = random.Random(seed)
+    game_map = random_map(size, rng)
+    start = time.perf_counter()
+    finder = PathFinder(game_map, terrain_costs, impassable_tiles, event_tiles)
+    print(f"地图 {size}x{size}，建立消耗表 {(time.perf_counter() - start) * 1000:.1f} ms")
+
+    pairs = []
+    while len(pairs) < queries:
+        sx, sy = rng.randrange(size), rng.randrange(size)
+        gx = min(size - 1, max(0, sx + rng.randint(-distance, distance)))
+        gy = min(size - 1, max(0, sy + rng.randint(-distance, distance)))
+        if finder.costs[sy * size + sx] and finder.costs[gy * size + gx] and (sx, sy) != (gx, gy):
+            pairs.append(((sx, sy), (gx, gy)))
+
+    for label in ('未命中', '命中缓存'):
+        times = []
+        found = 0
+        for start_tile, goal_tile in pairs:
+            t0 = time.perf_counter()
+            path = finder.find_path(start_tile, goal_tile)
+            times.append((time.perf_counter() - t0) * 1000)
+            found += path is not None
+        print(f"{label}: 平均 {sum(times) / len(times):.3f} ms, p50 {percentile(times, 0.5):.3f} ms, "
+              f"p95 {percentile(times, 0.95):.3f} ms, 最大 {max(times):.3f} ms, 可达 {found}/{len(pairs)}")
+
+if __name__ == "__main__":
+    main(*[int(arg) for arg in sys.argv[1:3]])
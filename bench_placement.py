@@ -0,0 +1,36 @@
+"""测量对象放置耗时随对象数量的变化，以及无法满足时的报错速度
+
+用法: python bench_placement.py [地图边长]   默认 4096
+"""
+import sys
+import time
+import numpy as np
+from mapgen import NoiseMapGenerator
+from placement import ObjectPlacer, PlacementError
+from tilegrid import TerrainType
+
+def main(size=4096, seed=42):
+    terrain = NoiseMapGenerator(seed).terrain(0, 0, size, size)
+    land = ~np.isin(terrain, (TerrainType.WATER.value, TerrainType.MOUNTAIN.value))
+    print(f"地图 {size}x{size}，可放置格子 {land.mean():.0%}")
+
+    for count in (1000, 10000, 100000):
+        for spacing in (0, 4):
+            placer = ObjectPlacer(size, size, np.random.default_rng(seed))
+            start = time.perf_counter()
+            placer.place(count, land, min_spacing=spacing)
+            elapsed = time.perf_counter() - start
+            print(f"放置 {count:>6} 个, 最小间距 {spacing}: {elapsed * 1000:8.1f} ms")
+
+    # 不可能满足的请求：候选只有一小块区域
+    tiny = np.zeros_like(land)
+    tiny[:10, :10] = True
+    placer = ObjectPlacer(size, size, np.random.default_rng(seed))
+    start = time.perf_counter()
+    try:
+        placer.place(50, tiny, min_spacing=3, label="城镇")
+    except PlacementError as error:
+        print(f"{(time.perf_counter() - start) * 1000:.1f} ms 后报错: {error}")
+
+if __name__ == "__main__":
+    main(*[int(arg) for arg in sys.argv[1:2]])
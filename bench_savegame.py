@@ -0,0 +1,101 @@
+"""对比存档格式与直接 pickle / JSON 的写入、读取耗时和文件大小
+
+用法: python bench_savegame.py [尺寸 ...]   默认 256 1024 2048
+“打开”只读入存档（地图内存映射，不解析），“读档”还要重建可以游戏的 World。
+地图上放有电脑英雄和游荡怪物，读档后检查 AI 实体的数组与存档前一致。
+"""
+import os
+import sys
+import json
+import time
+import pickle
+import tempfile
+import numpy as np
+from engine import World
+from savegame import SaveManager, read_save, world_from_save, world_meta, explored_mask
+
+def timed(func):
+    start = time.perf_counter()
+    result = func()
+    return (time.perf_counter() - start) * 1000, result
+
+def naive_json(world):
+    """逐行字符串 + 嵌套列表的朴素 JSON"""
+    return {
+        'width': world.map_width,
+        'height': world.map_height,
+        'map': [''.join(row) for row in world.game_map],
+        'explored': explored_mask(world).astype(int).tolist(),
+        'meta': world_meta(world),
+    }
+
+def check_entities(world, loaded, label):
+    """读档得到的 AI 实体数组和随机数状态必须与存档时相同"""
+    arrays, rng_state = world.entities.state()
+    loaded_arrays, loaded_rng = loaded.entities.state()
+    for name, values in arrays.items():
+        if not np.array_equal(values, loaded_arrays[name]):
+            raise SystemExit(f"{label}: 实体数组 {name} 与存档前不一致")
+    if rng_state != loaded_rng:
+        raise SystemExit(f"{label}: 实体随机数状态与存档前不一致")
+
+def bench(size, directory, seed=42):
+    world = World(size, size, seed)
+    world.populate(size // 8, size // 4)
+    for x, y in ((size // 3, size // 3), (size // 2, size // 4), (size // 4, size // 2)):
+        world.apply(('goto', x, y))
+
+    rows = []
+    path = os.path.join(directory, f'bench_{size}.hsav')
+    saves = SaveManager(world, path)
+    save_ms, _ = timed(saves.save_full)
+    open_ms, save = timed(lambda: read_save(path))
+    load_ms, loaded = timed(lambda: world_from_save(read_save(path)))
+    check_entities(world, loaded, '完整存档')
+    rows.append(('存档格式', save_ms, open_ms, load_ms, os.path.getsize(path)))
+
+    # 增量存档：改几个格子、走几步
+    for i in range(20):
+        world.game_map[i % size][(i * 7) % size] = 'G'
+    world.apply(('move', 1, 0))
+    for _ in range(10):
+        world.tick_entities()
+    delta_ms, _ = timed(saves.autosave)
+    delta_load_ms, loaded = timed(lambda: world_from_save(read_save(path)))
+    check_entities(world, loaded, '增量存档')
+    rows.append(('增量存档', delta_ms, float('nan'), delta_load_ms, os.path.getsize(saves.delta_path)))
+    del save
+
+    pickle_path = os.path.join(directory, f'bench_{size}.pickle')
+    def dump_pickle():
+        with open(pickle_path, 'wb') as f:
+            pickle.dump(world, f, protocol=pickle.HIGHEST_PROTOCOL)
+    def load_pickle():
+        with open(pickle_path, 'rb') as f:
+            return pickle.load(f)
+    pickle_save_ms, _ = timed(dump_pickle)
+    pickle_load_ms, _ = timed(load_pickle)
+    rows.append(('pickle(World)', pickle_save_ms, pickle_load_ms, pickle_load_ms, os.path.getsize(pickle_path)))
+
+    json_path = os.path.join(directory, f'bench_{size}.json')
+    def dump_json():
+        with open(json_path, 'w', encoding='utf-8') as f:
+            json.dump(naive_json(world), f, ensure_ascii=False)
+    def load_json():
+        with open(json_path, encoding='utf-8') as f:
+            return json.load(f)
+    json_save_ms, _ = timed(dump_json)
+    json_open_ms, _ = timed(load_json)
+    rows.append(('JSON', json_save_ms, json_open_ms, float('nan'), os.path.getsize(json_path)))
+    return rows
+
+def main(sizes):
+    with tempfile.TemporaryDirectory() as directory:
+        print(f"{'尺寸':>8} {'格式':<14} {'写入(ms)':>10} {'打开(ms)':>10} {'读档(ms)':>10} {'大小(KB)':>10}")
+        for size in sizes:
+            for name, save_ms, open_ms, load_ms, nbytes in bench(size, directory):
+                cells = [f"{value:>10.1f}" if not np.isnan(value) else f"{'-':>10}" for value in (save_ms, open_ms, load_ms)]
+                print(f"{size:>6}^2 {name:<14} {' '.join(cells)} {nbytes / 1024:>10.1f}")
+
+if __name__ == "__main__":
+    main([int(arg) for arg in sys.argv[1:]] or [256, 1024, 2048])
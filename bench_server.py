@@ -0,0 +1,127 @@
+"""联机服务器压力测试：在同一进程里启动服务器和许多模拟客户端
+
+每个模拟客户端随机地发移动指令（偶尔点击寻路），用 ClientState 应用收到的
+welcome 和增量。测量服务器每个 tick 的计算耗时、客户端收到增量的延迟（从服务器
+开始 tick 算起）和每个客户端的下行带宽，并与每个 tick 都发完整快照的大小对比；
+最后检查每个客户端镜像的地图和英雄位置与服务器一致。
+
+用法: python bench_server.py [地图边长] [每组秒数] [客户端数 ...]   默认 256 5 10 50 200
+"""
+import os
+import sys
+import json
+import time
+import random
+import asyncio
+os.environ.setdefault('PYGAME_HIDE_SUPPORT_PROMPT', '1')
+import numpy as np
+from client import ClientState
+from engine import World
+from server import GameServer, encode
+
+SEED = 42
+COMMANDS_PER_SECOND = 5  # 每个客户端每秒发的指令数
+AI_HEROES = 100
+MONSTERS = 400
+
+async def simulated_client(port, index, stop, stats):
+    rng = random.Random(index)
+    reader, writer = await asyncio.open_connection('127.0.0.1', port, limit=64 * 1024 * 1024)
+    writer.write(encode({'type': 'hello', 'name': f"机器人{index}"}))
+    state = ClientState()
+    line = await reader.readline()
+    stats['welcome_bytes'] = len(line)
+    state.apply(json.loads(line))
+
+    async def send_commands():
+        await asyncio.sleep(rng.random() / COMMANDS_PER_SECOND) # 错开各客户端的发送时间
+        while not stop.is_set():
+            me = state.me
+            if rng.random() < 0.1 and me:
+                command = {'type': 'goto', 'x': me['x'] + rng.randint(-8, 8), 'y': me['y'] + rng.randint(-8, 8)}
+            else:
+                dx, dy = rng.choice(((1, 0), (-1, 0), (0, 1), (0, -1)))
+                command = {'type': 'move', 'dx': dx, 'dy': dy}
+            writer.write(encode(command))
+            await asyncio.sleep(1 / COMMANDS_PER_SECOND)
+
+    sender = asyncio.create_task(send_commands())
+    try:
+        while True:
+            line = await reader.readline()
+            if not line:
+                break
+            message = json.loads(line)
+            if message['type'] == 'delta':
+                stats['latencies'].append(time.time() - message['time'])
+                stats['bytes'] += len(line)
+                stats['deltas'] += 1
+            state.apply(message)
+    finally:
+        sender.cancel()
+        writer.close()
+    return state
+
+async def run_group(size, seconds, clients):
+    world = World(size, size, SEED)
+    world.populate(AI_HEROES, MONSTERS)
+    game_server = GameServer(world, seed=SEED)
+    server, ticker = await game_server.start('127.0.0.1', 0)
+    port = server.sockets[0].getsockname()[1]
+    stop = asyncio.Event()
+    stats = [{'latencies': [], 'bytes': 0, 'deltas': 0} for _ in range(clients)]
+    tasks = [asyncio.create_task(simulated_client(port, i, stop, stats[i])) for i in range(clients)]
+    while len(game_server.clients) < clients:
+        await asyncio.sleep(0.01)
+    game_server.tick_times.clear()
+    for s in stats:
+        s['latencies'].clear()
+        s['bytes'] = s['deltas'] = 0
+    start = time.perf_counter()
+    await asyncio.sleep(seconds)
+    elapsed = time.perf_counter() - start
+    tick_times = list(game_server.tick_times)
+    stop.set()
+    await asyncio.sleep(3 / game_server.tick_rate) # 剩下的指令执行完、增量发到
+    full_snapshot = len(encode(game_server.welcome(0)))
+    expected_map = bytes(world.game_map.data)
+    expected_heroes = {i: (hero.x, hero.y) for i, hero in game_server.heroes.items()}
+    ticker.cancel()
+    server.close()
+    for writer in list(game_server.clients.values()):
+        writer.close()
+    states = await asyncio.gather(*tasks)
+    consistent = all(bytes(state.game_map.data) == expected_map and
+                     {i: (h['x'], h['y']) for i, h in state.heroes.items()} == expected_heroes
+                     for state in states)
+
+    latencies = np.array([value for s in stats for value in s['latencies']]) * 1000
+    deltas = sum(s['deltas'] for s in stats)
+    return {
+        'tick_p50': np.percentile(tick_times, 50) * 1000,
+        'tick_p95': np.percentile(tick_times, 95) * 1000,
+        'latency_p50': np.percentile(latencies, 50),
+        'latency_p95': np.percentile(latencies, 95),
+        'latency_p99': np.percentile(latencies, 99),
+        'kb_per_s': sum(s['bytes'] for s in stats) / clients / elapsed / 1024,
+        'delta_bytes': sum(s['bytes'] for s in stats) / max(1, deltas),
+        'snapshot_bytes': full_snapshot,
+        'welcome_bytes': stats[0]['welcome_bytes'],
+        'consistent': consistent,
+    }
+
+def main(size=256, seconds=5, *client_counts):
+    client_counts = client_counts or (10, 50, 200)
+    print(f"地图 {size}x{size}，{AI_HEROES} 个电脑英雄 + {MONSTERS} 个游荡怪物，"
+          f"每个客户端每秒 {COMMANDS_PER_SECOND} 条指令，每组 {seconds} 秒")
+    print(f"{'客户端':>6} {'tick p50':>9} {'tick p95':>9} {'延迟 p50':>9} {'延迟 p95':>9} {'延迟 p99':>9} "
+          f"{'下行 KB/s':>10} {'增量(B)':>9} {'完整快照(B)':>12} {'一致':>5}")
+    for clients in client_counts:
+        r = asyncio.run(run_group(size, seconds, clients))
+        print(f"{clients:>6} {r['tick_p50']:>9.2f} {r['tick_p95']:>9.2f} {r['latency_p50']:>9.2f} "
+              f"{r['latency_p95']:>9.2f} {r['latency_p99']:>9.2f} {r['kb_per_s']:>10.2f} "
+              f"{r['delta_bytes']:>9.0f} {r['snapshot_bytes']:>12} {'是' if r['consistent'] else '否':>5}")
+    print("时间单位为毫秒；延迟从服务器开始 tick 算到客户端读到这条增量")
+
+if __name__ == "__main__":
+    main(*[int(arg) for arg in sys.argv[1:]])
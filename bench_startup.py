@@ -0,0 +1,66 @@
+"""测量启动各阶段耗时：每次在新进程中启动（含 Python 和 pygame 的导入），无窗口运行
+
+用法: python bench_startup.py [重复次数]   默认 3，每项取最快的一次
+阶段：import 导入模块，init 打开窗口和字体，first_frame 画出加载画面，generate 后台生成
+地图，first_map_frame 画出第一帧地图。首帧（导入到加载画面）超出 startup.FIRST_FRAME_BUDGET_MS
+时退出码为 1。
+"""
+import os
+import sys
+import json
+import time
+import subprocess
+from startup import FIRST_FRAME_BUDGET_MS
+
+PHASES = ('import', 'init', 'first_frame', 'generate', 'first_map_frame')
+SCENARIOS = [('map', 48), ('map', 1024), ('game', 18), ('game', 256), ('game', 1024)]
+
+def child(app, size):
+    """子进程：创建游戏对象并画出第一帧地图，把各阶段耗时以 JSON 打印到最后一行"""
+    import contextlib
+    import io
+    with contextlib.redirect_stdout(io.StringIO()):
+        import pygame
+        if app == 'map':
+            from map import MapRenderer
+            renderer = MapRenderer(size, size, 42)
+            pygame.display.update(renderer.draw_map())
+        else:
+            from heroplay import Game
+            renderer = Game(size, size, 42) if size > 18 else Game()
+            pygame.display.update(renderer.draw_map() + renderer.draw_ui())
+        renderer.startup.mark('first_map_frame')
+    print(json.dumps(renderer.startup.as_dict()))
+
+def run_once(app, size):
+    env = dict(os.environ, SDL_VIDEODRIVER='dummy', PYGAME_HIDE_SUPPORT_PROMPT='1')
+    start = time.perf_counter()
+    output = subprocess.run([sys.executable, __file__, '--child', app, str(size)], env=env,
+                            capture_output=True, text=True, check=True).stdout
+    total = (time.perf_counter() - start) * 1000
+    phases = json.loads(output.strip().splitlines()[-1])
+    phases['process'] = total
+    return phases
+
+def main(repeats=3):
+    print(f"{'场景':<12}" + ''.join(f"{name:>16}" for name in PHASES + ('首帧累计', '进程总耗时')))
+    over_budget = []
+    for app, size in SCENARIOS:
+        runs = [run_once(app, size) for _ in range(repeats)]
+        best = {key: min(run.get(key, 0) for run in runs) for key in PHASES + ('process',)}
+        first_frame = best['import'] + best['init'] + best['first_frame']
+        if first_frame > FIRST_FRAME_BUDGET_MS:
+            over_budget.append(f"{app}[{size}]")
+        cells = [best[name] for name in PHASES] + [first_frame, best['process']]
+        print(f"{f'{app}[{size}]':<12}" + ''.join(f"{value:>14.1f}ms" for value in cells))
+    if over_budget:
+        print(f"首帧超出预算 {FIRST_FRAME_BUDGET_MS} ms: {', '.join(over_budget)}")
+        return 1
+    print(f"首帧都在预算 {FIRST_FRAME_BUDGET_MS} ms 以内")
+    return 0
+
+if __name__ == "__main__":
+    if len(sys.argv) > 1 and sys.argv[1] == '--child':
+        child(sys.argv[2], int(sys.argv[3]))
+    else:
+        sys.exit(main(*[int(arg) for arg in sys.argv[1:2]]))
@@ -0,0 +1,262 @@
+"""性能测试套件：在 SDL dummy 驱动下无窗口运行，结果写成 JSON，可与基线对比
+
+测量的热点：
+- map.draw_frame / game.draw_frame   每帧绘制耗时（镜头滚动、英雄移动）
+- map.init / world.init              地图生成与对象放置耗时（地形生成单独记为 generate_ms）
+- hero.moves                          Hero.move_to + 格子事件的吞吐量
+- combat.estimate                     悬停营地时蒙特卡洛胜率估计的耗时（未命中/命中缓存）
+- entities.tick                       1024x1024 地图上 10000 个 AI 实体每次 tick 的耗时
+- game.run_loop / map.run_loop        完整主循环在脚本化输入下的帧耗时（不含 clock.tick 的等待）
+
+用法:
+    python bench_suite.py [-o 结果.json] [--quick]
+    python bench_suite.py --compare 基线.json [-o 结果.json] [--threshold 0.15]
+对比时按指标名判断方向：*_ms / *_us 越小越好，*_per_s 越大越好；有退化时退出码为 1。
+"""
+import io
+import os
+import sys
+import json
+import time
+import random
+import platform
+import argparse
+import contextlib
+import gc
+
+os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+os.environ.setdefault('PYGAME_HIDE_SUPPORT_PROMPT', '1')
+
+import numpy as np
+import pygame
+from bench_camera import bench_size
+from combat import estimate, _estimate
+from engine import World
+from heroplay import Game
+from map import MapRenderer
+
+SEED = 42
+
+def frame_stats(times):
+    """秒为单位的耗时列表 -> 平均值和 p95（毫秒）"""
+    times = sorted(times)
+    return {
+        'mean_ms': sum(times) / len(times) * 1000,
+        'p95_ms': times[min(len(times) - 1, int(len(times) * 0.95))] * 1000,
+    }
+
+def best_of(repeats, bench):
+    """重复运行 repeats 次，每个指标取最好的一次，减小偶然的抖动"""
+    runs = [bench() for _ in range(repeats)]
+    return {key: (max if key.endswith('_per_s') else min)(run[key] for run in runs) for key in runs[0]}
+
+def bench_map_draw(size):
+    """MapRenderer.draw_map：镜头来回滚动、英雄每帧移动（见 bench_camera）"""
+    result = bench_size(size, seed=SEED)
+    return {'mean_ms': result['mean_ms'], 'p95_ms': result['p95_ms']}
+
+def bench_game_draw(size, frames=300):
+    """Game.draw_map + draw_ui：英雄随机移动，镜头跟随"""
+    game = Game(size, size, SEED) if size > 18 else Game()
+    rng = random.Random(SEED)
+    pygame.display.update(game.draw_map() + game.draw_ui())
+    times = []
+    for _ in range(frames):
+        game.world.apply(('move',) + rng.choice(((1, 0), (-1, 0), (0, 1), (0, -1))))
+        start = time.perf_counter()
+        pygame.display.update(game.draw_map() + game.draw_ui())
+        times.append(time.perf_counter() - start)
+    return frame_stats(times)
+
+def bench_map_init(size):
+    """MapRenderer 的地形生成和对象放置（不打开窗口）"""
+    start = time.perf_counter()
+    renderer = MapRenderer(size, size, SEED, headless=True)
+    init = time.perf_counter() - start
+    start = time.perf_counter()
+    renderer.generate_map() # 同一种子再生成一次，只覆盖地形
+    generate = time.perf_counter() - start
+    return {'init_ms': init * 1000, 'generate_ms': generate * 1000, 'place_ms': (init - generate) * 1000}
+
+def bench_world_init(size):
+    """heroplay 的 World：地形、地点、空间索引、寻路消耗表和迷雾"""
+    start = time.perf_counter()
+    World(size, size, SEED)
+    return {'init_ms': (time.perf_counter() - start) * 1000}
+
+def bench_hero_moves(size=256, moves=20000):
+    """英雄随机走动，每步都经过 move_to 和 _trigger_tile_event"""
+    world = World(size, size, SEED)
+    hero = world.hero
+    rng = random.Random(SEED)
+    directions = [rng.choice(((1, 0), (-1, 0), (0, 1), (0, -1))) for _ in range(moves)]
+    start = time.perf_counter()
+    for dx, dy in directions:
+        hero.move_by_direction(dx, dy, world)
+    elapsed = time.perf_counter() - start
+    return {'moves_per_s': moves / elapsed, 'move_us': elapsed / moves * 1e6}
+
+def bench_entities_tick(count=10000, ticks=200):
+    """2500 个电脑英雄 + 7500 个游荡怪物，连续 tick（都走不动时开始新的一天，不计入耗时）"""
+    world = World(1024, 1024, SEED)
+    world.populate(count // 4, count - count // 4)
+    times = []
+    for _ in range(ticks):
+        start = time.perf_counter()
+        moved, _, _ = world.tick_entities()
+        times.append(time.perf_counter() - start)
+        if not len(moved):
+            world.entities.new_day()
+    return frame_stats(times)
+
+def bench_combat_estimate(repeats=200):
+    """英雄初始军队对独眼巨人营地：清空缓存后的一次完整模拟，以及之后的缓存命中"""
+    army, skills, camp = {'剑士': 15, '弓箭手': 8}, {'attack': 1, 'defense': 1}, {'creature': '独眼巨人', 'count': 5}
+    _estimate.cache_clear()
+    start = time.perf_counter()
+    estimate(army, skills, camp)
+    miss = time.perf_counter() - start
+    start = time.perf_counter()
+    for _ in range(repeats):
+        estimate(army, skills, camp)
+    hit = (time.perf_counter() - start) / repeats
+    return {'miss_ms': miss * 1000, 'hit_us': hit * 1e6}
+
+class FrameTimer:
+    """替换主循环里的 clock，记录两次 tick 之间的工作耗时（不含 tick 的等待）"""
+
+    def __init__(self, clock):
+        self.clock = clock
+        self.times = []
+        self._last = None
+
+    def tick(self, framerate=0):
+        now = time.perf_counter()
+        if self._last is not None:
+            self.times.append(now - self._last)
+        dt = self.clock.tick(framerate)
+        self._last = time.perf_counter()
+        return dt
+
+def bench_run_loop(app, scripted_events, seconds=3.0):
+    """运行 app.run()：定时器按固定间隔投递脚本化输入，到时投递 QUIT 结束循环
+
+    关掉空闲等待，每次循环都画一帧，测的是逐帧的工作量（空闲时的表现见 bench_idle.py）。
+    """
+    app.scheduler.idle_wait = False
+    clock = app.scheduler.clock = FrameTimer(app.scheduler.clock)
+    for event, interval_ms in scripted_events:
+        pygame.time.set_timer(event, interval_ms)
+    pygame.time.set_timer(pygame.QUIT, int(seconds * 1000), loops=1)
+    try:
+        app.run() # 退出时 pygame.quit() 会一并停掉定时器
+    except SystemExit:
+        pass
+    result = frame_stats(clock.times)
+    result['frames'] = len(clock.times)
+    return result
+
+def bench_game_run_loop():
+    game = Game(128, 128, SEED)
+    center = game.camera.viewport.center
+    return bench_run_loop(game, [
+        (pygame.event.Event(pygame.KEYDOWN, key=pygame.K_d, mod=0), 120),
+        (pygame.event.Event(pygame.MOUSEMOTION, pos=center, rel=(0, 0), buttons=(0, 0, 0)), 30),
+    ])
+
+def bench_map_run_loop():
+    renderer = MapRenderer(512, 512, SEED)
+    return bench_run_loop(renderer, [
+        (pygame.event.Event(pygame.KEYDOWN, key=pygame.K_RIGHT, mod=0), 50),
+    ])
+
+def run_suite(quick=False):
+    """依次运行所有测试，返回 {测试名: {指标: 数值}}"""
+    draw_sizes = [48, 512] if quick else [48, 512, 1024, 4096]
+    init_sizes = [48, 512] if quick else [48, 512, 1024, 4096]
+    benches = []
+    for size in draw_sizes:
+        benches.append((f'map.draw_frame[{size}]', lambda size=size: best_of(3, lambda: bench_map_draw(size))))
+    for size in [18, 256] if quick else [18, 256, 1024]:
+        benches.append((f'game.draw_frame[{size}]', lambda size=size: best_of(3, lambda: bench_game_draw(size))))
+    for size in init_sizes:
+        benches.append((f'map.init[{size}]', lambda size=size: best_of(5, lambda: bench_map_init(size))))
+    for size in [64, 256] if quick else [64, 256, 1024]:
+        benches.append((f'world.init[{size}]', lambda size=size: best_of(5, lambda: bench_world_init(size))))
+    benches.append(('hero.moves', lambda: best_of(5, bench_hero_moves)))
+    benches.append(('combat.estimate', lambda: best_of(5, bench_combat_estimate)))
+    benches.append(('entities.tick', lambda: best_of(3, bench_entities_tick)))
+    # 主循环测试会调用 pygame.quit()，放在最后
+    benches.append(('game.run_loop', bench_game_run_loop))
+    benches.append(('map.run_loop', bench_map_run_loop))
+
+    results = {}
+    for name, bench in benches:
+        gc.collect() # 前面测试留下的大地图先回收掉，不算进下一项
+        start = time.perf_counter()
+        with contextlib.redirect_stdout(io.StringIO()): # 屏蔽游戏自己的打印（种子、移动失败等）
+            results[name] = bench()
+        metrics = ', '.join(f'{key}={value:.2f}' for key, value in results[name].items())
+        print(f"{name:<24} {metrics}  ({time.perf_counter() - start:.1f} s)", flush=True)
+    return results
+
+def compare(results, baseline, threshold, min_ms=0.05):
+    """与基线逐项对比，返回退化的条目列表 [(测试名, 指标, 基线值, 当前值, 变化比例)]
+
+    耗时指标的绝对变化小于 min_ms 毫秒时不算退化（亚毫秒级的测量抖动很大）。
+    """
+    regressions = []
+    print(f"\n{'测试':<24} {'指标':<12} {'基线':>10} {'当前':>10} {'变化':>8}")
+    for name, metrics in results.items():
+        for key, value in metrics.items():
+            old = baseline.get(name, {}).get(key)
+            if not old or not key.endswith(('_ms', '_us', '_per_s')):
+                continue
+            change = (value - old) / old
+            worse = -change if key.endswith('_per_s') else change
+            flag = ''
+            small = key.endswith('_ms') and abs(value - old) < min_ms
+            if worse > threshold and not small:
+                flag = '  << 退化'
+                regressions.append((name, key, old, value, change))
+            elif worse < -threshold and not small:
+                flag = '  改进'
+            print(f"{name:<24} {key:<12} {old:>10.2f} {value:>10.2f} {change:>+8.1%}{flag}")
+    return regressions
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="无窗口性能测试套件")
+    parser.add_argument('-o', '--output', default='bench_results.json', help="结果输出文件")
+    parser.add_argument('--compare', metavar='BASELINE', help="与基线结果文件对比")
+    parser.add_argument('--threshold', type=float, default=0.15, help="判定退化的相对变化，默认 0.15")
+    parser.add_argument('--quick', action='store_true', help="只跑小尺寸")
+    args = parser.parse_args(argv)
+
+    results = run_suite(args.quick)
+    report = {
+        'meta': {
+            'time': time.strftime('%Y-%m-%dT%H:%M:%S'),
+            'python': platform.python_version(),
+            'pygame': pygame.version.ver,
+            'numpy': np.__version__,
+            'platform': platform.platform(),
+            'quick': args.quick,
+        },
+        'results': results,
+    }
+    with open(args.output, 'w', encoding='utf-8') as f:
+        json.dump(report, f, ensure_ascii=False, indent=2)
+    print(f"结果已写入 {args.output}")
+
+    if args.compare:
+        with open(args.compare, encoding='utf-8') as f:
+            baseline = json.load(f)['results']
+        regressions = compare(results, baseline, args.threshold)
+        if regressions:
+            print(f"\n{len(regressions)} 项退化超过 {args.threshold:.0%}")
+            return 1
+        print("\n没有超过阈值的退化")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
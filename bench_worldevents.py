@@ -0,0 +1,78 @@
+"""测量世界事件队列（worldevents）推进天数的耗时和事件吞吐量
+
+在大地图上占领全部城镇、采集全部资源点和宝箱（各自登记若干天后重生），然后：
+- 逐天：每次 end_turn 推进一天的耗时，和每天逐一扫描全部地点的做法对比
+- 快进：advance_days 一次推进很多天的耗时和每秒处理的事件数
+最后对比逐天推进与一次快进得到的世界状态是否一致。
+
+用法: python bench_worldevents.py [边长] [天数]   默认 512 365
+"""
+import sys
+import time
+import random
+from engine import World, REGROW_DAYS
+from replay import state_checksum
+
+SEED = 42
+
+def prepare(size):
+    """生成地图，占领全部城镇，采集全部资源点和宝箱（重生时间错开），返回 World"""
+    world = World(size, size, SEED)
+    rng = random.Random(SEED)
+    for site in list(world.objects):
+        if site.kind == 'T':
+            world.town_owners[(site.x, site.y)] = world.hero
+        elif site.kind in REGROW_DAYS:
+            world.game_map[site.y][site.x] = 'G'
+            world.events.schedule(world.day + rng.randint(1, REGROW_DAYS[site.kind]), 'regrow', site.x, site.y, site.kind)
+    return world
+
+def scan_day(world):
+    """对照：不用事件队列时每天要把全部地点检查一遍"""
+    due = 0
+    for site in world.objects:
+        due += site.kind == 'T' or site.kind in REGROW_DAYS
+    return due
+
+def percentile(values, fraction):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * fraction))]
+
+def main(size=512, days=365):
+    start = time.perf_counter()
+    daily = prepare(size)
+    print(f"地图 {size}x{size}：{len(daily.objects)} 个地点，{len(daily.town_owners)} 座城镇，"
+          f"{len(daily.monster_camps)} 个营地，队列中 {len(daily.events)} 个事件"
+          f"（准备 {time.perf_counter() - start:.1f} s）")
+
+    times = []
+    scans = []
+    fired = daily.events.fired
+    for _ in range(days):
+        t0 = time.perf_counter()
+        daily.end_turn()
+        times.append((time.perf_counter() - t0) * 1000)
+        t0 = time.perf_counter()
+        scan_day(daily)
+        scans.append((time.perf_counter() - t0) * 1000)
+    fired = daily.events.fired - fired
+    print(f"逐天 {days} 天: 每天 p50 {percentile(times, 0.5):.3f} ms, p95 {percentile(times, 0.95):.3f} ms, "
+          f"最大 {max(times):.3f} ms（含每周营地增长），共 {fired} 个事件，"
+          f"{fired / (sum(times) / 1000):.0f} 事件/秒")
+    print(f"对照（每天扫描全部地点）: 每天 p50 {percentile(scans, 0.5):.3f} ms")
+
+    bulk = prepare(size)
+    fired = bulk.events.fired
+    t0 = time.perf_counter()
+    bulk.advance_days(days)
+    elapsed = time.perf_counter() - t0
+    fired = bulk.events.fired - fired
+    print(f"快进 {days} 天: {elapsed * 1000:.1f} ms，{fired} 个事件，{fired / elapsed:.0f} 事件/秒")
+
+    same = state_checksum(daily) == state_checksum(bulk)
+    print("逐天推进与一次快进的结果" + ("一致" if same else "不一致！"))
+    if not same:
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main(*[int(arg) for arg in sys.argv[1:3]])
@@ -0,0 +1,134 @@
+import pygame
+
+class Camera:
+    """地图视口：窗口大小固定，偏移量 (x, y) 决定显示地图的哪一部分
+
+    支持三种滚动方式：按住方向键、右键拖拽、鼠标靠近视口边缘。
+    偏移量以像素为单位，始终被限制在地图范围内。
+    """
+
+    def __init__(self, viewport, map_width, map_height, tile_size,
+                 scroll_keys=None, scroll_speed=800, edge_size=12):
+        """scroll_keys: {按键: (dx, dy)}，scroll_speed 单位为像素/秒"""
+        self.viewport = pygame.Rect(viewport)
+        self.map_width = map_width
+        self.map_height = map_height
+        self.tile_size = tile_size
+        self.scroll_keys = scroll_keys or {}
+        self.scroll_speed = scroll_speed
+        self.edge_size = edge_size
+        self.x = 0
+        self.y = 0
+        self.moved = True
+        self.scrolling = False # 上一次 update 是否因按键或鼠标贴边而滚动（主循环据此保持逐帧运行）
+        self._drag_start = None
+
+    def move_to(self, x, y):
+        """设置偏移量（会被限制在地图范围内）"""
+        max_x = max(0, self.map_width * self.tile_size - self.viewport.width)
+        max_y = max(0, self.map_height * self.tile_size - self.viewport.height)
+        x = max(0, min(max_x, int(x)))
+        y = max(0, min(max_y, int(y)))
+        if (x, y) != (self.x, self.y):
+            self.x = x
+            self.y = y
+            self.moved = True
+
+    def scroll(self, dx, dy):
+        self.move_to(self.x + dx, self.y + dy)
+
+    def center_on(self, tile_x, tile_y):
+        """让指定格子位于视口中央"""
+        self.move_to(
+            tile_x * self.tile_size + self.tile_size // 2 - self.viewport.width // 2,
+            tile_y * self.tile_size + self.tile_size // 2 - self.viewport.height // 2
+        )
+
+    def set_tile_size(self, tile_size, anchor=None):
+        """缩放：换成新的格子尺寸，anchor（屏幕坐标，默认视口中心）下的地图位置保持不动"""
+        if anchor is None or not self.viewport.collidepoint(anchor):
+            anchor = self.viewport.center
+        ax = anchor[0] - self.viewport.x
+        ay = anchor[1] - self.viewport.y
+        scale = tile_size / self.tile_size
+        self.tile_size = tile_size
+        self.moved = True
+        self.move_to((self.x + ax) * scale - ax, (self.y + ay) * scale - ay)
+
+    def ensure_visible(self, tile_x, tile_y, margin=2):
+        """格子离视口边缘不足 margin 格时重新居中（用于跟随英雄）"""
+        x0, y0, x1, y1 = self.visible_tiles()
+        if not (x0 + margin <= tile_x < x1 - margin and y0 + margin <= tile_y < y1 - margin):
+            self.center_on(tile_x, tile_y)
+
+    def visible_tiles(self):
+        """视口内（含部分可见）的格子范围 (x0, y0, x1, y1)，右下边界不含"""
+        ts = self.tile_size
+        x0 = self.x // ts
+        y0 = self.y // ts
+        x1 = min(self.map_width, -(-(self.x + self.viewport.width) // ts))
+        y1 = min(self.map_height, -(-(self.y + self.viewport.height) // ts))
+        return x0, y0, x1, y1
+
+    def tile_rect(self, tile_x, tile_y):
+        """格子在屏幕上的矩形"""
+        return pygame.Rect(
+            self.viewport.x + tile_x * self.tile_size - self.x,
+            self.viewport.y + tile_y * self.tile_size - self.y,
+            self.tile_size, self.tile_size
+        )
+
+    def screen_to_tile(self, pos):
+        """屏幕坐标转换为格子坐标，不在视口或地图内时返回 None"""
+        if not self.viewport.collidepoint(pos):
+            return None
+        tile_x = (pos[0] - self.viewport.x + self.x) // self.tile_size
+        tile_y = (pos[1] - self.viewport.y + self.y) // self.tile_size
+        if 0 <= tile_x < self.map_width and 0 <= tile_y < self.map_height:
+            return tile_x, tile_y
+        return None
+
+    def handle_event(self, event):
+        """处理右键拖拽，返回事件是否被视口消费"""
+        if event.type == pygame.MOUSEBUTTONDOWN and event.button == 3:
+            if self.viewport.collidepoint(event.pos):
+                self._drag_start = (event.pos, self.x, self.y)
+                return True
+        elif event.type == pygame.MOUSEBUTTONUP and event.button == 3:
+            if self._drag_start:
+                self._drag_start = None
+                return True
+        elif event.type == pygame.MOUSEMOTION and self._drag_start:
+            (start_x, start_y), cam_x, cam_y = self._drag_start
+            self.move_to(cam_x - (event.pos[0] - start_x), cam_y - (event.pos[1] - start_y))
+            return True
+        return False
+
+    def update(self, dt):
+        """按键和边缘滚动，dt 为距上一帧的毫秒数"""
+        step = self.scroll_speed * dt / 1000
+        dx = dy = 0
+        if self.scroll_keys:
+            pressed = pygame.key.get_pressed()
+            for key, (kx, ky) in self.scroll_keys.items():
+                if pressed[key]:
+                    dx += kx
+                    dy += ky
+
+        # 鼠标贴近视口边缘时滚动（拖拽时不触发）
+        if self._drag_start is None and pygame.mouse.get_focused():
+            mx, my = pygame.mouse.get_pos()
+            if self.viewport.collidepoint(mx, my):
+                if mx < self.viewport.left + self.edge_size:
+                    dx -= 1
+                elif mx >= self.viewport.right - self.edge_size:
+                    dx += 1
+                if my < self.viewport.top + self.edge_size:
+                    dy -= 1
+                elif my >= self.viewport.bottom - self.edge_size:
+                    dy += 1
+
+        old = (self.x, self.y)
+        if dx or dy:
+            self.scroll(dx * step, dy * step)
+        self.scrolling = (self.x, self.y) != old
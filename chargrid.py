@@ -0,0 +1,88 @@
+import numpy as np
+
+class _CharRow:
+    """地图的一行，row[x] 读写单个字符"""
+    __slots__ = ('grid', 'offset')
+
+    def __init__(self, grid, y):
+        self.grid = grid
+        self.offset = y * grid.width
+
+    def __getitem__(self, x):
+        if not 0 <= x < self.grid.width:
+            raise IndexError(x)
+        return chr(self.grid.data[self.offset + x])
+
+    def __setitem__(self, x, char):
+        if not 0 <= x < self.grid.width:
+            raise IndexError(x)
+        self.grid.set(x, self.offset // self.grid.width, char)
+
+    def __len__(self):
+        return self.grid.width
+
+    def __iter__(self):
+        data = self.grid.data
+        for i in range(self.offset, self.offset + self.grid.width):
+            yield chr(data[i])
+
+class CharGrid:
+    """字符地图，按行连续存放在一个 bytearray 里
+
+    用法和原来的列表套列表一样（game_map[y][x] = 'G'），
+    另外每次格子变化都会通知监听者，渲染缓存等据此只刷新变化的格子。
+    整块写入（write_block，流式加载地图区块）不逐格通知，只通知区块监听者。
+    """
+
+    def __init__(self, width, height, fill='G', data=None):
+        """data: 可选的现成缓冲区（长度 width * height 的可写 bytearray/memoryview，
+        例如存档里内存映射出来的地图），直接使用而不复制"""
+        self.width = width
+        self.height = height
+        if data is None:
+            data = bytearray(fill.encode('ascii') * (width * height))
+        elif len(data) != width * height:
+            raise ValueError(f"地图数据长度 {len(data)} 与尺寸 {width}x{height} 不符")
+        self.data = data
+        self._rows = [_CharRow(self, y) for y in range(height)]
+        self._listeners = []
+        self._block_listeners = []
+
+    def __getitem__(self, y):
+        return self._rows[y]
+
+    def __len__(self):
+        return self.height
+
+    def __iter__(self):
+        return iter(self._rows)
+
+    def get(self, x, y):
+        return chr(self.data[y * self.width + x])
+
+    def set(self, x, y, char):
+        """修改格子，有变化时通知监听者 listener(x, y, old, new)"""
+        index = y * self.width + x
+        old = chr(self.data[index])
+        if old == char:
+            return
+        self.data[index] = ord(char)
+        for listener in self._listeners:
+            listener(x, y, old, char)
+
+    def add_listener(self, listener):
+        self._listeners.append(listener)
+
+    def remove_listener(self, listener):
+        self._listeners.remove(listener)
+
+    def write_block(self, x0, y0, block):
+        """把形状 (h, w) 的 uint8 数组写到以 (x0, y0) 为左上角的区域，通知区块监听者 listener(x0, y0, w, h)"""
+        h, w = block.shape
+        grid = np.frombuffer(self.data, dtype=np.uint8).reshape(self.height, self.width)
+        grid[y0:y0 + h, x0:x0 + w] = block
+        for listener in self._block_listeners:
+            listener(x0, y0, w, h)
+
+    def add_block_listener(self, listener):
+        self._block_listeners.append(listener)
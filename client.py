@@ -0,0 +1,300 @@
+"""联机客户端：只负责绘制和转发输入，游戏状态全部来自服务器（见 server.py）
+
+ClientState 按 welcome/delta 消息维护一份本地镜像（不依赖 pygame，压力测试也用它）；
+Client 是基于它的 pygame 界面：WASD 移动、点击寻路、方向键/右键拖拽滚动镜头。
+
+用法: python client.py [主机 端口 名字]   默认 127.0.0.1 8765 玩家
+"""
+import sys
+import json
+import time
+import zlib
+import base64
+import socket
+from collections import deque
+import numpy as np
+import pygame
+from atlas import TileAtlas
+from camera import Camera
+from chargrid import CharGrid
+from entities import MONSTER
+from heroplay import (COLORS, TILE_SIZE, SCREEN_WIDTH, SCREEN_HEIGHT, OWNER_COLORS, WANDERING_MONSTER_COLOR,
+                      tile_styles)
+from render_cache import text_cache
+from server import DEFAULT_PORT, decode_steps
+from terrain_layer import TerrainLayer
+
+class ClientState:
+    """服务器状态的本地镜像
+
+    heroes 为 {编号: 状态字典}，camps 为 {(x, y): 营地}，AI 实体按编号存在数组里。
+    apply 返回这条消息里位置或外观变了的格子列表，界面据此只刷新这些格子。
+    """
+
+    def __init__(self):
+        self.you = None
+        self.game_map = None
+        self.heroes = {}
+        self.camps = {}
+        self.events = deque(maxlen=50) # 自己英雄的事件
+        self.tick = 0
+        self.day = 1
+        self.last_latency = None       # 服务器开始 tick 到收到增量的秒数（同一台机器上才有意义）
+
+    def apply(self, message):
+        kind = message['type']
+        if kind == 'welcome':
+            return self._apply_welcome(message)
+        if kind == 'delta':
+            return self._apply_delta(message)
+        if kind == 'error':
+            self.events.append(f"服务器: {message['message']}")
+        return []
+
+    def _apply_welcome(self, message):
+        self.you = message['you']
+        self.tick = message['tick']
+        self.day = message.get('day', 1)
+        self.width, self.height = message['width'], message['height']
+        data = bytearray(zlib.decompress(base64.b64decode(message['map'])))
+        self.game_map = CharGrid(self.width, self.height, data=data)
+        self.heroes = {hero['id']: hero for hero in message['heroes']}
+        self.camps = {(x, y): camp for x, y, camp in message['camps']}
+        entities = message['entities']
+        size = max(entities['ids'], default=-1) + 1
+        self.entity_alive = np.zeros(size, dtype=bool)
+        self.entity_x = np.zeros(size, dtype=np.int32)
+        self.entity_y = np.zeros(size, dtype=np.int32)
+        self.entity_kind = np.zeros(size, dtype=np.uint8)
+        self.entity_owner = np.zeros(size, dtype=np.int16)
+        ids = entities['ids']
+        self.entity_alive[ids] = True
+        self.entity_x[ids] = entities['x']
+        self.entity_y[ids] = entities['y']
+        self.entity_kind[ids] = entities['kind']
+        self.entity_owner[ids] = entities['owner']
+        return []
+
+    def _apply_delta(self, message):
+        self.tick = message['tick']
+        self.day = message.get('day', self.day)
+        self.last_latency = time.time() - message['time']
+        changed = []
+        for x, y, char in message.get('tiles', ()):
+            self.game_map.set(x, y, char)
+            changed.append((x, y))
+        for x, y, camp in message.get('camps', ()):
+            if camp is None:
+                self.camps.pop((x, y), None)
+            else:
+                self.camps[(x, y)] = camp
+        for hero_id in message.get('left', ()):
+            hero = self.heroes.pop(hero_id, None)
+            if hero:
+                changed.append((hero['x'], hero['y']))
+        for update in message.get('heroes', ()):
+            update = dict(update)
+            events = update.pop('events', ())
+            hero = self.heroes.setdefault(update['id'], {})
+            if 'x' in hero:
+                changed.append((hero['x'], hero['y']))
+            hero.update(update)
+            changed.append((hero['x'], hero['y']))
+            if update['id'] == self.you:
+                self.events.extend(events)
+        moved = message.get('entities')
+        if moved:
+            ids, dx, dy = decode_steps(moved)
+            changed.extend(zip(self.entity_x[ids].tolist(), self.entity_y[ids].tolist()))
+            self.entity_x[ids] += dx
+            self.entity_y[ids] += dy
+            changed.extend(zip(self.entity_x[ids].tolist(), self.entity_y[ids].tolist()))
+        return changed
+
+    @property
+    def me(self):
+        return self.heroes.get(self.you)
+
+class Connection:
+    """非阻塞的 JSON Lines 套接字，每帧调用 poll 取出已到达的消息"""
+
+    def __init__(self, host, port):
+        self.sock = socket.create_connection((host, port))
+        self.sock.setblocking(False)
+        self.buffer = b''
+        self.bytes_received = 0
+        self.closed = False
+
+    def send(self, message):
+        self.sock.setblocking(True) # 指令很短，直接阻塞发完
+        self.sock.sendall(json.dumps(message, ensure_ascii=False).encode('utf-8') + b'\n')
+        self.sock.setblocking(False)
+
+    def poll(self):
+        while True:
+            try:
+                chunk = self.sock.recv(65536)
+            except BlockingIOError:
+                break
+            if not chunk:
+                self.closed = True
+                break
+            self.bytes_received += len(chunk)
+            self.buffer += chunk
+        *lines, self.buffer = self.buffer.split(b'\n')
+        return [json.loads(line) for line in lines if line]
+
+    def wait(self, message_type, timeout=30):
+        """阻塞等到某种类型的消息，返回它之前（含它）收到的所有消息"""
+        deadline = time.time() + timeout
+        received = []
+        while time.time() < deadline and not self.closed:
+            received.extend(self.poll())
+            if any(message['type'] == message_type for message in received):
+                return received
+            time.sleep(0.01)
+        raise ConnectionError(f"等待服务器的 {message_type} 超时")
+
+class Client:
+    def __init__(self, host='127.0.0.1', port=DEFAULT_PORT, name='玩家'):
+        pygame.display.init()
+        pygame.font.init()
+        self.screen = pygame.display.set_mode((SCREEN_WIDTH, SCREEN_HEIGHT))
+        pygame.display.set_caption(f"英雄无敌3 - 联机 {host}:{port}")
+        self.clock = pygame.time.Clock()
+        self.font = pygame.font.Font(None, 24)
+        self.small_font = pygame.font.Font(None, 20)
+
+        self.state = ClientState()
+        self.connection = Connection(host, port)
+        self.connection.send({'type': 'hello', 'name': name})
+        for message in self.connection.wait('welcome'):
+            self.state.apply(message)
+        state = self.state
+
+        self.camera = Camera(
+            (0, 0, SCREEN_WIDTH - 250, SCREEN_HEIGHT), state.width, state.height, TILE_SIZE,
+            scroll_keys={
+                pygame.K_UP: (0, -1), pygame.K_DOWN: (0, 1),
+                pygame.K_LEFT: (-1, 0), pygame.K_RIGHT: (1, 0)
+            }
+        )
+        me = state.me
+        self.camera.center_on(me['x'], me['y'])
+        # 与单机版相同的格子图集（没有迷雾，只用一种尺寸）
+        styles, self.tile_style_ids = tile_styles()
+        self.atlas = TileAtlas(styles, (TILE_SIZE,), lambda tile_size: self.small_font)
+        self.terrain_layer = TerrainLayer(state.width, state.height, TILE_SIZE, self.atlas, self.tile_ids,
+                                          self.camera, chunk_size=16)
+        state.game_map.add_listener(lambda x, y, old, new: self.terrain_layer.invalidate(x, y))
+        self._drawn_me = (me['x'], me['y'])
+        self._drawn_ui_state = None
+        self._received = [] # (时间, 累计字节)，算最近一秒的下行带宽
+
+    def tile_ids(self, x0, y0, x1, y1):
+        state = self.state
+        tiles = np.frombuffer(state.game_map.data, dtype=np.uint8).reshape(state.height, state.width)
+        return self.tile_style_ids[tiles[y0:y1, x0:x1]]
+
+    def draw_map(self):
+        state = self.state
+        layer = self.terrain_layer
+        full_redraw = layer.full_redraw
+        if full_redraw:
+            self.screen.fill(COLORS['background'])
+            self._drawn_ui_state = None
+        me = state.me
+        if me and (me['x'], me['y']) != self._drawn_me:
+            self._drawn_me = (me['x'], me['y'])
+            self.camera.ensure_visible(*self._drawn_me) # 镜头跟随自己的英雄
+        dirty_rects = layer.restore(self.screen)
+
+        self.screen.set_clip(self.camera.viewport)
+        radius = TILE_SIZE // 3
+        x0, y0, x1, y1 = self.camera.visible_tiles()
+        alive = state.entity_alive
+        inside = alive & (state.entity_x >= x0) & (state.entity_x < x1) & (state.entity_y >= y0) & (state.entity_y < y1)
+        for i in np.flatnonzero(inside).tolist():
+            x, y = int(state.entity_x[i]), int(state.entity_y[i])
+            if layer.is_dirty(x, y):
+                color = WANDERING_MONSTER_COLOR if state.entity_kind[i] == MONSTER else \
+                    OWNER_COLORS[state.entity_owner[i] % len(OWNER_COLORS)]
+                pygame.draw.circle(self.screen, color, layer.screen_rect(x, y).center, radius)
+        for hero_id, hero in state.heroes.items():
+            if layer.is_dirty(hero['x'], hero['y']):
+                rect = layer.screen_rect(hero['x'], hero['y'])
+                mine = hero_id == state.you
+                pygame.draw.rect(self.screen, COLORS['hero_color'] if mine else OWNER_COLORS[hero_id % len(OWNER_COLORS)], rect)
+                text_surface = text_cache.render(self.small_font, '@' if mine else str(hero_id), (0, 0, 0))
+                self.screen.blit(text_surface, text_surface.get_rect(center=rect.center))
+        self.screen.set_clip(None)
+        layer.clear_dirty()
+        return dirty_rects
+
+    def bandwidth(self):
+        """最近一秒收到的字节数"""
+        now = time.time()
+        self._received.append((now, self.connection.bytes_received))
+        while self._received[0][0] < now - 1:
+            self._received.pop(0)
+        return self._received[-1][1] - self._received[0][1]
+
+    def draw_ui(self):
+        state = self.state
+        me = state.me or {}
+        latency = f"{state.last_latency * 1000:.0f} ms" if state.last_latency is not None else "-"
+        stats = [
+            f"英雄: {me.get('name', '')} #{state.you}",
+            f"位置: ({me.get('x')}, {me.get('y')})  等级: {me.get('level')}",
+            f"金币: {me.get('resources', {}).get('Gold')}",
+            f"军队: {me.get('army')}",
+            f"在线英雄: {len(state.heroes)}",
+            f"第 {state.day} 天  tick {state.tick}  延迟 {latency}",
+            f"下行 {self.bandwidth() / 1024:.1f} KB/s",
+        ]
+        log_entries = list(state.events)[-12:]
+        ui_state = (stats, log_entries)
+        if ui_state == self._drawn_ui_state:
+            return []
+        self._drawn_ui_state = ui_state
+        sidebar_rect = pygame.Rect(SCREEN_WIDTH - 250, 0, 250, SCREEN_HEIGHT)
+        pygame.draw.rect(self.screen, (30, 30, 50), sidebar_rect)
+        for i, line in enumerate(stats):
+            self.screen.blit(text_cache.render(self.small_font, line, COLORS['text']), (SCREEN_WIDTH - 240, 20 + i * 22))
+        self.screen.blit(text_cache.render(self.font, "事件日志:", COLORS['text']), (SCREEN_WIDTH - 240, 200))
+        for i, line in enumerate(log_entries):
+            self.screen.blit(text_cache.render(self.small_font, line, COLORS['text']), (SCREEN_WIDTH - 240, 230 + i * 20))
+        return [sidebar_rect]
+
+    def run(self):
+        moves = {pygame.K_w: (0, -1), pygame.K_s: (0, 1), pygame.K_a: (-1, 0), pygame.K_d: (1, 0)}
+        running = True
+        while running and not self.connection.closed:
+            for event in pygame.event.get():
+                if self.camera.handle_event(event):
+                    continue
+                if event.type == pygame.QUIT or (event.type == pygame.KEYDOWN and event.key == pygame.K_ESCAPE):
+                    running = False
+                elif event.type == pygame.KEYDOWN and event.key in moves:
+                    dx, dy = moves[event.key]
+                    self.connection.send({'type': 'move', 'dx': dx, 'dy': dy})
+                elif event.type == pygame.MOUSEBUTTONDOWN and event.button == 1:
+                    tile = self.camera.screen_to_tile(event.pos)
+                    if tile:
+                        self.connection.send({'type': 'goto', 'x': tile[0], 'y': tile[1]})
+            for message in self.connection.poll():
+                for x, y in self.state.apply(message):
+                    self.terrain_layer.mark_dirty(x, y)
+            dirty_rects = self.draw_map()
+            dirty_rects += self.draw_ui()
+            pygame.display.update(dirty_rects)
+            dt = self.clock.tick(60)
+            self.camera.update(dt)
+        if self.connection.closed:
+            print("与服务器的连接已断开")
+        pygame.quit()
+
+if __name__ == "__main__":
+    args = sys.argv[1:4]
+    Client(args[0] if args else '127.0.0.1', int(args[1]) if len(args) > 1 else DEFAULT_PORT,
+           args[2] if len(args) > 2 else '玩家').run()
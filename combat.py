@@ -0,0 +1,110 @@
+import math
+from collections import namedtuple
+from functools import lru_cache
+import numpy as np
+
+Creature = namedtuple('Creature', ['name', 'attack', 'defense', 'damage_min', 'damage_max', 'hp', 'speed'])
+
+# 兵种属性：攻击 防御 最小伤害 最大伤害 生命 速度
+creature_stats = {c.name: c for c in [
+    Creature('剑士', 10, 12, 7, 10, 35, 6),
+    Creature('弓箭手', 6, 3, 2, 3, 10, 4),
+    Creature('哥布林', 4, 2, 1, 2, 5, 5),
+    Creature('独眼巨人', 17, 13, 16, 20, 70, 6),
+    Creature('金人', 11, 12, 8, 10, 50, 5),
+]}
+
+MAX_ROUNDS = 30      # 打不完的战斗算进攻方撤退（失败）
+DAMAGE_ROLLS = 10    # 一队最多掷 10 次伤害，数量更多时按比例放大
+ESTIMATE_TRIALS = 2000
+
+BattleResult = namedtuple('BattleResult', ['won', 'hero_losses', 'enemy_left', 'rounds'])
+BattleEstimate = namedtuple('BattleEstimate', ['win_rate', 'hero_losses', 'enemy_losses', 'rounds'])
+
+def damage_factor(attack, defense):
+    """攻击高于防御时每点 +5%（最多 +300%），低于时每点 -2.5%（最多 -70%）"""
+    if attack >= defense:
+        return 1 + 0.05 * min(attack - defense, 60)
+    return 1 - 0.025 * min(defense - attack, 28)
+
+def simulate_battles(army, skills, camp, trials, rng):
+    """同时模拟 trials 场英雄军队对营地的战斗
+
+    每回合所有部队按速度从快到慢行动（速度相同时英雄一方先），攻击对方第一支
+    还活着的部队；伤害 = 数量 × 单体伤害掷骰 × damage_factor，英雄的攻击、防御
+    技能加到己方每支部队上。每场战斗的状态是数组中的一行，所有场次一起推进。
+    返回 (英雄各队剩余生命 (trials, 队数), 营地剩余生命 (trials, 1), 每场回合数)。
+    """
+    hero_stacks = [(creature_stats[name], count) for name, count in army.items() if count > 0]
+    sides = (hero_stacks, [(creature_stats[camp['creature']], camp['count'])])
+    bonus = ((skills.get('attack', 0), skills.get('defense', 0)), (0, 0))
+    hp = [np.tile(np.array([c.hp * n for c, n in stacks], dtype=np.int64), (trials, 1)) for stacks in sides]
+
+    # factors[side][i][j]：side 方第 i 队打对方第 j 队的伤害系数
+    factors = []
+    for side, stacks in enumerate(sides):
+        targets = sides[1 - side]
+        factors.append([np.array([damage_factor(c.attack + bonus[side][0], t.defense + bonus[1 - side][1])
+                                  for t, _ in targets]) for c, _ in stacks])
+    order = sorted(((side, i) for side in (0, 1) for i in range(len(sides[side]))),
+                   key=lambda key: -sides[key[0]][key[1]][0].speed)
+
+    rolls_index = np.arange(DAMAGE_ROLLS)
+    rounds = np.zeros(trials, dtype=np.int64)
+    active = np.ones(trials, dtype=bool)
+    for _ in range(MAX_ROUNDS):
+        active &= (hp[0] > 0).any(axis=1) & (hp[1] > 0).any(axis=1)
+        if not active.any():
+            break
+        rounds[active] += 1
+        for side, i in order:
+            creature = sides[side][i][0]
+            enemy_hp = hp[1 - side]
+            rows = np.flatnonzero(active & (hp[side][:, i] > 0) & (enemy_hp > 0).any(axis=1))
+            if not len(rows):
+                continue
+            count = -(-hp[side][rows, i] // creature.hp)
+            rolled = min(DAMAGE_ROLLS, int(count.max()))
+            rolls = rng.integers(creature.damage_min, creature.damage_max + 1, size=(len(rows), rolled))
+            used = np.minimum(count, DAMAGE_ROLLS)
+            base = (rolls * (rolls_index[:rolled] < used[:, None])).sum(axis=1) * count / used
+            target = np.argmax(enemy_hp[rows] > 0, axis=1)
+            damage = np.maximum(1, (base * factors[side][i][target]).astype(np.int64))
+            enemy_hp[rows, target] = np.maximum(enemy_hp[rows, target] - damage, 0)
+    return hp[0], hp[1], rounds
+
+def _losses(army, hero_hp):
+    """各场战斗中英雄每支部队损失的数量，形状 (trials, 队数)"""
+    names = [name for name, count in army.items() if count > 0]
+    unit_hp = np.array([creature_stats[name].hp for name in names], dtype=np.int64)
+    initial = np.array([army[name] for name in names], dtype=np.int64)
+    return names, initial - (-(-hero_hp // unit_hp))
+
+def resolve_battle(army, skills, camp, rng):
+    """结算一场战斗，rng 为 random.Random（结果由它的状态决定）"""
+    hero_hp, enemy_hp, rounds = simulate_battles(army, skills, camp, 1, np.random.default_rng(rng.getrandbits(64)))
+    names, losses = _losses(army, hero_hp)
+    won = bool((enemy_hp[0] == 0).all())
+    enemy_left = math.ceil(int(enemy_hp[0, 0]) / creature_stats[camp['creature']].hp)
+    return BattleResult(won, dict(zip(names, losses[0].tolist())), enemy_left, int(rounds[0]))
+
+@lru_cache(maxsize=256)
+def _estimate(army_items, attack, defense, creature, count, trials):
+    army = dict(army_items)
+    camp = {'creature': creature, 'count': count}
+    rng = np.random.default_rng(0) # 固定种子：同样的输入总是给出同样的估计
+    hero_hp, enemy_hp, rounds = simulate_battles(army, {'attack': attack, 'defense': defense}, camp, trials, rng)
+    names, losses = _losses(army, hero_hp)
+    won = (enemy_hp == 0).all(axis=1)
+    enemy_losses = count - np.ceil(enemy_hp[:, 0] / creature_stats[creature].hp)
+    return BattleEstimate(float(won.mean()), dict(zip(names, losses.mean(axis=0).tolist())),
+                          float(enemy_losses.mean()), float(rounds.mean()))
+
+def estimate(army, skills, camp, trials=ESTIMATE_TRIALS):
+    """蒙特卡洛估计胜率和平均损失，按 (军队, 攻防技能, 营地) 缓存
+
+    返回的 BattleEstimate 被所有调用方共享，不要修改其中的 hero_losses。
+    """
+    army_items = tuple(sorted((name, count) for name, count in army.items() if count > 0))
+    return _estimate(army_items, skills.get('attack', 0), skills.get('defense', 0),
+                     camp['creature'], camp['count'], trials)
@@ -0,0 +1,802 @@
+import os
+import random
+import numpy as np
+from chargrid import CharGrid
+from combat import resolve_battle
+from entities import EntityStore, PLAYER
+from eventlog import EventLog
+from fog import FogOfWar, EXPLORED
+from mapgen import NoiseMapGenerator
+from movement import MovementRange
+from pathfinding import PathFinder
+from placement import ObjectPlacer
+from spatial import SpatialIndex
+from worldevents import EventQueue
+
+# --- 常量定义 ---
+MAP_WIDTH = 18
+MAP_HEIGHT = 14
+BASE_VISION_RADIUS = 5  # 英雄基础视野半径，每级侦察 +1
+BASE_MOVEMENT = 1500    # 英雄每回合的基础移动力（草地每格 100），每级后勤 +10%
+LOGISTICS_BONUS = 0.1
+TOWN_INCOME = 500       # 每座城镇每天给占领者的金币
+CAMP_GROWTH = 0.1       # 怪物营地每周增长的比例（至少 1 只）
+CAMP_GROWTH_LIMIT = 4   # 营地最多增长到模板数量的几倍
+REGROW_DAYS = {'R': 7, 'X': 14} # 资源点、宝箱被采集后多少天重新出现
+WEEK_DAYS = 7
+UNLOADED_TILE = '?' # 流式加载地图时还没读入的格子，不可通行
+WALK_STEP_MS = 80  # 沿路径行走时每步的间隔（毫秒）
+AI_TICK_MS = 150   # 电脑英雄和游荡怪物每隔多久走一步
+
+def new_seed():
+    """没有指定种子的对局用的新种子（取自系统熵源，不经过全局 random）"""
+    return int.from_bytes(os.urandom(4), 'little')
+
+# --- 游戏对象类 ---
+class Hero:
+    def __init__(self, x, y):
+        self.x = x
+        self.y = y
+        self.level = 1
+        self.experience = 0
+        self.primary_skills = {'attack': 1, 'defense': 1, 'spell_power': 1, 'knowledge': 1}
+        self.secondary_skills = {'侦察': 1}
+        self.spells = ['祈祷']
+        self.artifacts = ["生命之书"]
+        self.resources = {
+            'Gold': 2450, 'Wood': 12, 'Ore': 8,
+            'Mercury': 3, 'Sulfur': 2, 'Crystal': 4, 'Gems': 1
+        }
+        self.log = EventLog()
+        self.log.add('start', "英雄已就位，开始探索！")
+        self.army = dict(starting_army)
+        self.movement_left = self.max_movement() # 本回合剩余的移动力
+        self._came_from = (x, y)
+
+    def move_to(self, new_x, new_y, world):
+        """尝试移动到指定坐标"""
+        if 0 <= new_x < world.map_width and 0 <= new_y < world.map_height:
+            # 检查地形是否可通行
+            if not world.is_tile_passable(new_x, new_y):
+                self.log.add('blocked', f"无法移动到 ({new_x}, {new_y}) - 地形不可通行！", x=new_x, y=new_y)
+                return False
+
+            self._came_from = (self.x, self.y) # 战斗失败时退回
+            self.x = new_x
+            self.y = new_y
+            self.log.add('move', f"移动到 ({self.x}, {self.y})", x=self.x, y=self.y)
+            self._trigger_tile_event(world)
+            return True
+        return False
+
+    def vision_radius(self):
+        """视野半径，由侦察技能等级决定"""
+        return BASE_VISION_RADIUS + self.secondary_skills.get('侦察', 0)
+
+    def max_movement(self):
+        """每回合的移动力，由后勤技能等级决定"""
+        return int(BASE_MOVEMENT * (1 + LOGISTICS_BONUS * self.secondary_skills.get('后勤', 0)))
+
+    def step_to(self, new_x, new_y):
+        """沿寻路路径走一步，途经的格子不触发事件"""
+        self.x = new_x
+        self.y = new_y
+
+    def move_by_direction(self, dx, dy, world):
+        """按方向移动一步"""
+        new_x = self.x + dx
+        new_y = self.y + dy
+        return self.move_to(new_x, new_y, world)
+
+    def _trigger_tile_event(self, world):
+        """触发当前格子的事件"""
+        tile = world.game_map[self.y][self.x]
+
+        if tile == 'T':  # 城镇
+            self._visit_town(world)
+        elif tile == 'X':  # 宝箱
+            self._collect_treasure(world)
+        elif tile == 'R':  # 资源点
+            self._collect_resource(world)
+        elif tile == 'C':  # 怪物营地
+            self._fight_monster(world)
+        elif tile == 'L':  # 图书馆
+            self._visit_library(world)
+        elif tile == 'A':  # 竞技场
+            self._visit_arena()
+        elif tile == 'P':  # 港口
+            self._visit_port()
+        elif tile == 'I':  # 遗迹
+            self._visit_ruins(world)
+        else:
+            terrain_name = terrain_names.get(tile, '未知')
+            self.log.add('terrain', f"在{terrain_name}地形上。", tile=tile)
+
+    def _visit_town(self, world):
+        if world.town_owners.get((self.x, self.y)) is not self:
+            world.town_owners[(self.x, self.y)] = self
+            self.log.add('town', f"占领了城镇！每天收入 {TOWN_INCOME} 金币", x=self.x, y=self.y, income=TOWN_INCOME)
+        self.add_skill('后勤')
+        recruited = {name: count - self.army.get(name, 0) for name, count in starting_army.items()
+                     if self.army.get(name, 0) < count}
+        if recruited:
+            for name, count in recruited.items():
+                self.army[name] = self.army.get(name, 0) + count
+            self.log.add('recruit', "在城镇补充了军队：" + ", ".join(f"{name} {count}" for name, count in recruited.items()),
+                         units=recruited)
+
+    def _collect_treasure(self, world):
+        artifact_found = world.rng.choice(["龙鳞甲", "贤者之石", "天使联盟"])
+        self.artifacts.append(artifact_found)
+        gold_found = world.rng.randint(500, 1500)
+        self.resources['Gold'] += gold_found
+        world.game_map[self.y][self.x] = 'G' # 宝箱被拾取后变回草地，过几天重新出现
+        world.schedule_regrow(self.x, self.y, 'X')
+        self.log.add('treasure', f"拾取了宝箱！获得 {artifact_found} 和 {gold_found} 金币！",
+                     artifact=artifact_found, gold=gold_found)
+
+    def _collect_resource(self, world):
+        resource_type = world.rng.choice(['Wood', 'Ore', 'Mercury', 'Sulfur', 'Crystal', 'Gems'])
+        amount = world.rng.randint(1, 3)
+        self.resources[resource_type] += amount
+        world.game_map[self.y][self.x] = 'G' # 资源点被采集后变回草地，过几天重新出现
+        world.schedule_regrow(self.x, self.y, 'R')
+        self.log.add('resource', f"采集了资源！获得 {amount} 个 {resource_type}！", resource=resource_type, amount=amount)
+
+    def _fight_monster(self, world):
+        monster_data = world.monster_camps.get((self.x, self.y), {'creature': '哥布林', 'count': 10, 'reward_gold': 300})
+        creature = monster_data['creature']
+        count = monster_data['count']
+        reward_gold = monster_data['reward_gold']
+
+        self.log.add('encounter', f"遭遇 {count} 只 {creature}！", creature=creature, count=count)
+        result = resolve_battle(self.army, self.primary_skills, monster_data, world.rng)
+        for name, lost in result.hero_losses.items():
+            self.army[name] -= lost
+            if self.army[name] <= 0:
+                del self.army[name]
+        losses_text = ", ".join(f"{name} {lost}" for name, lost in result.hero_losses.items() if lost) or "无"
+
+        if not result.won:
+            # 营地保留剩下的怪物（原地修改，地点索引里引用的是同一个字典），英雄退回来时的格子
+            if (self.x, self.y) in world.monster_camps:
+                monster_data['count'] = result.enemy_left
+            self.log.add('defeat', f"被 {creature} 击退！损失: {losses_text}",
+                         creature=creature, losses=result.hero_losses, enemy_left=result.enemy_left)
+            self.x, self.y = self._came_from
+            return
+
+        exp_gained = reward_gold // 10
+        self.gain_experience(exp_gained)
+        self.resources['Gold'] += reward_gold
+        self.log.add('victory', f"击败了 {creature} 军队！获得 {reward_gold} 金币和 {exp_gained} 经验！损失: {losses_text}",
+                     creature=creature, gold=reward_gold, experience=exp_gained, losses=result.hero_losses)
+
+        # 检查是否有宝物掉落
+        if world.rng.random() < 0.3:  # 30% 概率掉落
+            artifact_dropped = world.rng.choice(["泰坦之锤", "龙眼"])
+            self.artifacts.append(artifact_dropped)
+            self.log.add('loot', f"缴获了战利品！获得 {artifact_dropped}！", artifact=artifact_dropped)
+
+        # 清除怪物营地（先移除营地数据，地图变化触发重绘时营地已不存在）
+        world.monster_camps.pop((self.x, self.y), None)
+        world.game_map[self.y][self.x] = 'G'
+
+    def _visit_library(self, world):
+        new_spell = world.rng.choice(["失忆", "火球术", "治疗", "魔力井"])
+        self.spells.append(new_spell)
+        self.log.add('spell', f"在图书馆学习了 {new_spell} 法术！", spell=new_spell)
+
+    def _visit_arena(self):
+        for skill in self.primary_skills:
+            self.primary_skills[skill] += 1
+        self.gain_experience(500)
+        self.log.add('arena', "在竞技场挑战成功！全属性+1, 获得 500 经验！", experience=500)
+
+    def _visit_port(self):
+        self.log.add('port', "到达了港口，可以在此乘船航行。")
+
+    def _visit_ruins(self, world):
+        artifact_found = world.rng.choice(["魔力源泉", "时光之帽"])
+        self.artifacts.append(artifact_found)
+        self.log.add('ruins', f"在遗迹中发掘出 {artifact_found}！", artifact=artifact_found)
+
+    def gain_experience(self, exp):
+        old_level = self.level
+        self.experience += exp
+        self.level = (self.experience // 1000) + 1
+        if self.level > old_level:
+            self.log.add('level', f"*** {self.level} 级！ ***", level=self.level)
+
+    def add_skill(self, skill_name):
+        if skill_name in self.secondary_skills:
+            self.secondary_skills[skill_name] += 1
+        else:
+            self.secondary_skills[skill_name] = 1
+        self.log.add('skill', f"学会了 {skill_name} 技能！", skill=skill_name)
+
+    def get_stats_text(self):
+        stats = [
+            f"英雄: {self.name}",
+            f"等级: {self.level} (经验: {self.experience})",
+            f"金币: {self.resources['Gold']}",
+            f"木材: {self.resources['Wood']}, 矿石: {self.resources['Ore']}",
+            f"水银: {self.resources['Mercury']}, 硫磺: {self.resources['Sulfur']}",
+            f"水晶: {self.resources['Crystal']}, 宝石: {self.resources['Gems']}",
+            f"主属性: 攻防法知 {self.primary_skills['attack']}/{self.primary_skills['defense']}/{self.primary_skills['spell_power']}/{self.primary_skills['knowledge']}",
+            f"技能: {', '.join([f'{k}:{v}' for k, v in self.secondary_skills.items()])}",
+            f"法术: {', '.join(self.spells)}",
+            f"宝物: {', '.join(self.artifacts[:3])}",
+            f"军队: {dict(self.army)}"
+        ]
+        return stats
+
+class World:
+    """不依赖 pygame 的游戏世界：地图、地点索引、怪物营地、英雄和迷雾
+
+    seed 决定地图（不指定时使用手工设计的小地图）；所有随机事件（宝箱、资源、战斗、
+    掉落、图书馆）从 self.rng 取数，AI 实体从 entities.rng 取数，两者都由 rng_seed
+    决定。rng_seed 默认与 seed 相同，都不指定时用 new_seed() 选一个并记在
+    self.rng_seed 上，所以每一局都可以复现（见 replay）。
+    用 apply 逐条执行指令、用 state 读取结果，界面（见 heroplay.Game）只是
+    在这之上绘制和转发输入。
+    """
+
+    def __init__(self, map_width=MAP_WIDTH, map_height=MAP_HEIGHT, seed=None, game_map=None, monster_camps=None,
+                 rng_seed=None, start=(8, 6)):
+        """game_map / monster_camps: 直接使用现成的地图和营地数据（读档、地图文件），不再生成
+        start: 英雄的初始位置（不可通行时放在最近的可通行格子上）
+        """
+        self.map_width = map_width
+        self.map_height = map_height
+        self.seed = seed
+        if rng_seed is None:
+            rng_seed = seed if seed is not None else new_seed()
+        self.rng_seed = rng_seed
+        self.rng = random.Random(rng_seed)
+        self.monster_camps = {} # 键为 (x, y)，与地图上的 'C' 格子对应
+        if game_map is None:
+            game_map = self.generate_map()
+        elif monster_camps is not None:
+            self.monster_camps = monster_camps
+        self.game_map = game_map
+        self.hero = Hero(*self.nearest_passable(*start))
+        self.hero.name = "艾尔拉思" # 设置英雄名
+        self.day = 1
+        self.town_owners = {} # (x, y) -> 占领这座城镇的英雄
+        # 按天触发的世界事件（资源重生、城镇收入、营地增长），见 advance_days
+        self.events = EventQueue()
+        self.schedule_calendar()
+
+        # 地图上的地点（城镇、营地、资源点等）登记到空间索引，随地图变化增量更新
+        self.objects = self.index_sites()
+        self.pathfinder = PathFinder(self.game_map, terrain_costs, impassable_tiles, event_tiles)
+        # 英雄本回合能走到的格子和剩余移动力，英雄移动或地图变化时增量更新
+        self.movement_range = MovementRange(self.pathfinder, self.hero)
+
+        # 战争迷雾：山脉和森林阻挡视线
+        tiles = np.frombuffer(self.game_map.data, dtype=np.uint8).reshape(self.map_height, self.map_width)
+        blocks = np.isin(tiles, np.frombuffer(''.join(sight_blocking_tiles).encode('ascii'), dtype=np.uint8))
+        self.fog = FogOfWar(self.map_width, self.map_height, blocks)
+        self.known_sites = SpatialIndex() # 已探索到的地点，最近地点查询只搜这里
+        self._vision_key = None
+        self._vision_listeners = []
+        self.game_map.add_listener(self._on_tile_changed)
+        self.game_map.add_block_listener(self._on_block_changed)
+        self.update_vision()
+
+        # 流式加载的地图文件（见 mapfile）：还没读入的区块由 load_chunk 按需写进地图
+        self.map_source = None
+        self.loaded_chunks = set()
+
+        # 电脑英雄和游荡怪物（populate 之后才有），玩家英雄也登记在里面
+        self.entities = EntityStore(self.map_width, self.map_height, self.tile_values, entity_cost_table, seed=rng_seed)
+        self.entities.attach(self.hero)
+
+    def generate_map(self):
+        if self.seed is not None:
+            return self.generate_noise_map()
+
+        # 初始化地图为草地
+        game_map = CharGrid(self.map_width, self.map_height, 'G')
+
+        # 添加地形
+        # 水域
+        for x in range(14, 17):
+            game_map[2][x] = 'W'
+            game_map[3][x] = 'W'
+            game_map[4][x] = 'W'
+        # 山脉
+        for x in range(3, 6):
+            game_map[10][x] = 'M'
+            game_map[11][x] = 'M'
+        for y in range(5, 8):
+            game_map[y][12] = 'M'
+        # 森林
+        for x in range(10, 13):
+            for y in range(9, 12):
+                game_map[y][x] = 'F'
+        # 沙漠
+        for x in range(0, 4):
+            for y in range(0, 4):
+                game_map[y][x] = 'D'
+        # 雪地
+        for x in range(14, 18):
+            for y in range(10, 14):
+                game_map[y][x] = 'S'
+        # 沼泽
+        for x in range(5, 8):
+            for y in range(2, 5):
+                game_map[y][x] = 'B'
+
+        # 放置特殊地点
+        game_map[1][1] = 'T'  # 城镇
+        game_map[1][13] = 'X' # 宝箱
+        game_map[2][7] = 'R'  # 资源点
+        game_map[4][5] = 'C'  # 怪物营地
+        game_map[6][10] = 'L' # 图书馆
+        game_map[12][1] = 'A' # 竞技场
+        game_map[0][15] = 'P' # 港口
+        game_map[11][15] = 'I' # 遗迹
+        game_map[8][3] = 'R'  # 另一个资源点
+        game_map[5][15] = 'C' # 另一个怪物营地
+        game_map[1][10] = 'C' # 金人营地
+
+        self.monster_camps = {pos: dict(camp) for pos, camp in handcrafted_camps.items()}
+        return game_map
+
+    def generate_noise_map(self):
+        """按种子生成噪声地形（见 mapgen），TerrainType 的值映射为地图字符"""
+        terrain = NoiseMapGenerator(self.seed).terrain(0, 0, self.map_width, self.map_height)
+        game_map = CharGrid(self.map_width, self.map_height, 'G')
+        game_map.data[:] = terrain.tobytes().translate(noise_terrain_table)
+        self.place_sites(game_map)
+        return game_map
+
+    def place_sites(self, game_map):
+        """在噪声地图上放置城镇、宝箱、怪物营地等地点，数量随地图面积增长"""
+        width, height = self.map_width, self.map_height
+        rng = np.random.default_rng(self.seed)
+        placer = ObjectPlacer(width, height, rng)
+        tiles = np.frombuffer(game_map.data, dtype=np.uint8).reshape(height, width)
+        land = tiles != ord('W')
+        # 港口只放在紧挨水域的陆地上
+        near_water = np.zeros_like(land)
+        near_water[1:, :] |= ~land[:-1, :]
+        near_water[:-1, :] |= ~land[1:, :]
+        near_water[:, 1:] |= ~land[:, :-1]
+        near_water[:, :-1] |= ~land[:, 1:]
+        coast = land & near_water
+
+        area = width * height
+        self.monster_camps.clear()
+        for char, tiles_per_site, mask, spacing in (
+            ('T', 2000, land, 8),   # 城镇彼此分散
+            ('P', 4000, coast, 0),
+            ('L', 4000, land, 0),
+            ('A', 4000, land, 0),
+            ('I', 3000, land, 0),
+            ('X', 300, land, 0),
+            ('R', 200, land, 0),
+            ('C', 250, land, 0)
+        ):
+            # 陆地很少的地图按空闲格子数减少地点，城镇的间距放不下时能放几个算几个
+            count = min(area // tiles_per_site + 1, len(placer.candidates(mask, margin=1)))
+            for x, y in placer.place(count, mask, margin=1, min_spacing=spacing, label=terrain_names[char],
+                                     partial=spacing > 0):
+                game_map[y][x] = char
+                if char == 'C':
+                    self.monster_camps[(x, y)] = dict(camp_templates[rng.integers(len(camp_templates))])
+
+    def nearest_passable(self, x, y):
+        """按距离由近到远找一个可通行的格子"""
+        for radius in range(max(self.map_width, self.map_height)):
+            for ny in range(max(0, y - radius), min(self.map_height, y + radius + 1)):
+                for nx in range(max(0, x - radius), min(self.map_width, x + radius + 1)):
+                    if max(abs(nx - x), abs(ny - y)) == radius and self.is_tile_passable(nx, ny):
+                        return nx, ny
+        return x, y
+
+    def is_tile_passable(self, x, y):
+        """检查指定格子是否可通行"""
+        if 0 <= x < self.map_width and 0 <= y < self.map_height:
+            return self.game_map[y][x] not in impassable_tiles
+        return False
+
+    def move_cost(self, x, y):
+        """进入 (x, y) 要花的移动力（与寻路使用同一张消耗表），不可通行的格子为 0"""
+        return self.pathfinder.costs[y * self.map_width + x]
+
+    def end_turn(self):
+        """结束回合：进入下一天，英雄的移动力恢复（本回合新学的后勤从这时生效）"""
+        self.advance_days(1)
+
+    def schedule_calendar(self):
+        """登记每天的城镇收入和每周的营地增长（新对局、没有事件队列的旧存档）"""
+        self.events.schedule(self.day + 1, 'income')
+        self.events.schedule((self.day - 1) // WEEK_DAYS * WEEK_DAYS + WEEK_DAYS + 1, 'week')
+
+    def schedule_regrow(self, x, y, char):
+        """被采集的资源点或宝箱 char 在 REGROW_DAYS 天后重新出现在 (x, y)"""
+        self.events.schedule(self.day + REGROW_DAYS[char], 'regrow', x, y, char)
+
+    def advance_days(self, days):
+        """推进 days 天，依次处理期间到期的世界事件，英雄的移动力恢复；返回处理的事件数
+
+        只从事件队列里取到期的事件，快进很多天（批量模拟）也不逐天扫描地图。
+        """
+        target = self.day + days
+        income = {}
+        weeks = regrown = fired = 0
+        for day, kind, args in self.events.pop_due(target):
+            self.day = day # 事件按自己的天数登记下一次
+            fired += 1
+            if kind == 'income':
+                for hero in self.town_owners.values():
+                    hero.resources['Gold'] += TOWN_INCOME
+                    income[hero] = income.get(hero, 0) + TOWN_INCOME
+                self.events.schedule(day + 1, 'income')
+            elif kind == 'week':
+                weeks += 1
+                for camp in self.monster_camps.values():
+                    limit = CAMP_GROWTH_LIMIT * camp_base_counts.get(camp['creature'], camp['count'])
+                    if camp['count'] < limit:
+                        camp['count'] = min(limit, camp['count'] + max(1, int(camp['count'] * CAMP_GROWTH)))
+                self.events.schedule(day + WEEK_DAYS, 'week')
+            elif kind == 'regrow':
+                regrown += self._regrow(day, *args)
+            else:
+                raise ValueError(f"未知世界事件: {kind!r}")
+        self.day = target
+
+        hero = self.hero
+        hero.movement_left = hero.max_movement()
+        self.entities.new_day() # AI 实体与玩家英雄同时恢复移动点数
+        news = [f"移动力恢复为 {hero.movement_left}"]
+        if income.get(hero):
+            news.append(f"城镇收入 {income[hero]} 金币")
+        if weeks:
+            news.append("怪物营地的数量增长了")
+        if regrown:
+            news.append(f"{regrown} 处资源点和宝箱重新出现")
+        title = f"第 {self.day} 天" if days == 1 else f"快进 {days} 天到第 {self.day} 天"
+        hero.log.add('day', f"{title}，" + "，".join(news), day=self.day, movement=hero.movement_left,
+                     gold=income.get(hero, 0), weeks=weeks, regrown=regrown)
+        for other, gold in income.items():
+            if other is not hero:
+                other.log.add('income', f"城镇收入 {gold} 金币", gold=gold)
+        return fired
+
+    def _regrow(self, day, x, y, char):
+        """让资源点或宝箱重新出现，返回是否出现；有英雄或怪物站在上面时推迟一天，格子被改成别的就不再出现"""
+        if self.game_map[y][x] != 'G':
+            return False
+        if len(self.entities.in_rect(x, y, x + 1, y + 1)):
+            self.events.schedule(day + 1, 'regrow', x, y, char)
+            return False
+        self.game_map[y][x] = char
+        return True
+
+    def index_sites(self):
+        """扫描一次地图，把所有事件地点登记到空间索引"""
+        objects = SpatialIndex()
+        tiles = np.frombuffer(self.game_map.data, dtype=np.uint8)
+        site_codes = np.frombuffer(''.join(event_tiles).encode('ascii'), dtype=np.uint8)
+        for index in np.flatnonzero(np.isin(tiles, site_codes)).tolist():
+            y, x = divmod(index, self.map_width)
+            char = chr(tiles[index])
+            objects.add(x, y, char, self.monster_camps.get((x, y)) if char == 'C' else None)
+        return objects
+
+    def _on_tile_changed(self, x, y, old, new):
+        """地图格子变化（如宝箱被拾取变回草地）时更新空间索引和视线遮挡"""
+        if (old in sight_blocking_tiles) != (new in sight_blocking_tiles):
+            self.fog.blocks[y, x] = new in sight_blocking_tiles
+            self._vision_key = None # 视线遮挡变了，下次重新计算视野
+        explored = self.fog.is_explored(x, y)
+        if old in event_tiles:
+            self.objects.remove(x, y, old)
+            if explored:
+                self.known_sites.remove(x, y, old)
+        if new in event_tiles:
+            data = self.monster_camps.get((x, y)) if new == 'C' else None
+            self.objects.add(x, y, new, data)
+            if explored:
+                self.known_sites.add(x, y, new, data)
+
+    def _on_block_changed(self, x0, y0, w, h):
+        """整块写入（流式加载的区块）：重建这一块的视线遮挡和地点索引"""
+        tiles = np.frombuffer(self.game_map.data, dtype=np.uint8).reshape(self.map_height, self.map_width)
+        block = tiles[y0:y0 + h, x0:x0 + w]
+        blocking = np.frombuffer(''.join(sight_blocking_tiles).encode('ascii'), dtype=np.uint8)
+        self.fog.blocks[y0:y0 + h, x0:x0 + w] = np.isin(block, blocking)
+        self._vision_key = None
+        for site in self.objects.query_rect(x0, y0, x0 + w, y0 + h):
+            self.objects.remove(site.x, site.y, site.kind)
+            self.known_sites.remove(site.x, site.y, site.kind)
+        site_codes = np.frombuffer(''.join(event_tiles).encode('ascii'), dtype=np.uint8)
+        for by, bx in np.argwhere(np.isin(block, site_codes)).tolist():
+            x, y = x0 + bx, y0 + by
+            char = chr(block[by, bx])
+            data = self.monster_camps.get((x, y)) if char == 'C' else None
+            self.objects.add(x, y, char, data)
+            if self.fog.is_explored(x, y):
+                self.known_sites.add(x, y, char, data)
+
+    def load_chunk(self, cx, cy):
+        """从 map_source 读入一个地图区块（地形、地点和营地），已读入过的跳过；返回是否读入
+
+        通过 ('chunk', cx, cy) 指令调用（见 Simulation），录像回放时在同一帧读入同一块。
+        """
+        if self.map_source is None or (cx, cy) in self.loaded_chunks:
+            return False
+        x0, y0, tiles, camps = self.map_source.read_chunk(cx, cy)
+        self.loaded_chunks.add((cx, cy))
+        self.monster_camps.update(camps)
+        self.game_map.write_block(x0, y0, tiles)
+        return True
+
+    def update_vision(self):
+        """英雄位置或侦察等级变化后更新迷雾，返回新探索到的格子列表"""
+        vision_key = (self.hero.x, self.hero.y, self.hero.vision_radius())
+        if vision_key == self._vision_key:
+            return []
+        self._vision_key = vision_key
+        newly_explored = self.fog.update(*vision_key)
+        for x, y in newly_explored:
+            for site in self.objects.at(x, y):
+                self.known_sites.add(x, y, site.kind, site.data)
+        if newly_explored:
+            for listener in self._vision_listeners:
+                listener(newly_explored)
+        return newly_explored
+
+    def add_vision_listener(self, listener):
+        """listener(新探索到的格子列表)：无论视野在哪里更新（apply、界面每帧）都会通知"""
+        self._vision_listeners.append(listener)
+
+    def restore_fog(self, explored):
+        """读档时恢复已探索区域（形状 (height, width) 的布尔数组），并重建已探索地点索引"""
+        self.fog.state[:] = np.where(explored, EXPLORED, 0)
+        self.fog.visible = set()
+        self.known_sites = SpatialIndex()
+        for site in self.objects:
+            if explored[site.y, site.x]:
+                self.known_sites.add(site.x, site.y, site.kind, site.data)
+        self._vision_key = None
+        self.update_vision()
+
+    def tile_values(self):
+        """地图格子的字节值（展平，与 game_map 共享内存）"""
+        return np.frombuffer(self.game_map.data, dtype=np.uint8)
+
+    def populate(self, heroes, monsters):
+        """在地图上放电脑英雄和游荡怪物"""
+        self.entities.populate(heroes, monsters)
+
+    def tick_entities(self):
+        """AI 实体走一步，返回 EntityStore.tick 的结果"""
+        return self.entities.tick()
+
+    def add_hero(self, x, y, name):
+        """在 (x, y) 附近可通行的格子上再放一个英雄（多人联机时每个客户端一个），返回 Hero
+
+        地图、营地和地点与 self.hero 共享；迷雾只跟随 self.hero。
+        """
+        hero = Hero(*self.nearest_passable(x, y))
+        hero.name = name
+        self.entities.attach(hero)
+        return hero
+
+    def remove_hero(self, hero):
+        self.entities.detach(hero)
+
+    def walk_to(self, x, y, hero=None):
+        """沿 A* 路径走到 (x, y)，途经的格子不触发事件，到达终点时触发"""
+        hero = hero or self.hero
+        path = self.pathfinder.find_path((hero.x, hero.y), (x, y))
+        if not path:
+            return False
+        for step in path[:-1]:
+            hero.step_to(*step)
+        return hero.move_to(*path[-1], self)
+
+    def apply(self, command, hero=None):
+        """执行一条指令，返回英雄是否移动成功；hero 默认为 self.hero
+
+        ('move', dx, dy)  向相邻格子走一步，触发目标格子的事件
+        ('goto', x, y)    沿寻路路径走到 (x, y)，只在终点触发事件
+        """
+        hero = hero or self.hero
+        action, *args = command
+        if action == 'move':
+            moved = hero.move_by_direction(*args, self)
+        elif action == 'goto':
+            moved = self.walk_to(*args, hero)
+        else:
+            raise ValueError(f"未知指令: {command!r}")
+        self.update_vision()
+        return moved
+
+    def state(self):
+        """英雄和世界的当前状态（只含基本类型，可以跨进程传递或写成 JSON）"""
+        hero = self.hero
+        return {
+            'seed': self.seed,
+            'day': self.day,
+            'position': (hero.x, hero.y),
+            'level': hero.level,
+            'experience': hero.experience,
+            'resources': dict(hero.resources),
+            'secondary_skills': dict(hero.secondary_skills),
+            'spells': list(hero.spells),
+            'artifacts': list(hero.artifacts),
+            'army': dict(hero.army),
+            'camps_left': len(self.monster_camps),
+            'towns_owned': sum(owner is hero for owner in self.town_owners.values()),
+            'sites_left': len(self.objects),
+            'explored': int(np.count_nonzero(self.fog.state)),
+        }
+
+class Simulation:
+    """逐帧推进的游戏逻辑（不依赖 pygame）：键盘移动、点击后沿路径行走、AI 实体定时走一步
+
+    界面每帧把输入整理成指令，连同这一帧的 dt（毫秒）交给 step；录像回放时用录下的
+    指令和 dt 调用同一个 step，所以有没有界面、实时还是快进，结果都一样。
+        ('move', dx, dy)   键盘移动一步，打断正在进行的行走
+        ('click', x, y)    点击格子：寻路，之后每 walk_step_ms 走一格，到终点时触发事件
+        ('chunk', cx, cy)  读入流式加载地图的一个区块（界面在后台预读完成后发出）
+        ('end_turn',)      结束回合，英雄的移动力恢复
+    英雄每进入一格花掉这一格的移动消耗，移动力不够时停下，等下一回合。
+    """
+
+    def __init__(self, world, walk_step_ms=WALK_STEP_MS, ai_tick_ms=AI_TICK_MS):
+        self.world = world
+        self.walk_step_ms = walk_step_ms
+        self.ai_tick_ms = ai_tick_ms
+        self.frame = 0
+        self.walk_path = []
+        self._walk_elapsed = 0
+        self._ai_elapsed = 0
+
+    def handle(self, command):
+        action, *args = command
+        if action == 'move':
+            self.walk_path = []
+            self.move(*args)
+        elif action == 'click':
+            self.click(*args)
+        elif action == 'chunk':
+            self.world.load_chunk(*args)
+        elif action == 'end_turn':
+            self.world.end_turn()
+        else:
+            raise ValueError(f"未知指令: {command!r}")
+
+    def afford(self, x, y):
+        """英雄还够不够进入 (x, y)，不够时记一条日志；返回这一格的消耗，不够时返回 None"""
+        hero = self.world.hero
+        cost = self.world.move_cost(x, y)
+        if cost > hero.movement_left:
+            hero.log.add('tired', f"移动力不足（剩余 {hero.movement_left}，需要 {cost}），结束回合后继续",
+                         x=x, y=y, movement=hero.movement_left, cost=cost)
+            return None
+        return cost
+
+    def move(self, dx, dy):
+        """键盘移动一步，扣除目标格子的移动消耗（战斗失败退回也算走过）"""
+        world = self.world
+        x, y = world.hero.x + dx, world.hero.y + dy
+        cost = 0
+        if world.is_tile_passable(x, y):
+            cost = self.afford(x, y)
+            if cost is None:
+                return
+        if world.apply(('move', dx, dy)):
+            world.hero.movement_left -= cost
+
+    def click(self, x, y):
+        """寻路到点击的格子，之后在 update_walk 中逐格行走"""
+        world = self.world
+        hero = world.hero
+        if not world.is_tile_passable(x, y):
+            hero.log.add('blocked', f"无法移动到 ({x}, {y}) - 地形不可通行！", x=x, y=y)
+            return
+        # 本回合走得到的格子直接用移动范围里的最短路径，更远的用 A* 寻路，走到移动力用完为止
+        path = world.movement_range.path_to(x, y) or world.pathfinder.find_path((hero.x, hero.y), (x, y))
+        if path:
+            self.walk_path = path
+            self._walk_elapsed = 0
+        elif (x, y) != (hero.x, hero.y):
+            hero.log.add('unreachable', f"无法到达 ({x}, {y})！", x=x, y=y)
+
+    def update_walk(self, dt):
+        """推进沿路径的行走，到达终点时触发格子事件"""
+        if not self.walk_path:
+            return
+        self._walk_elapsed += dt
+        hero = self.world.hero
+        while self.walk_path and self._walk_elapsed >= self.walk_step_ms:
+            self._walk_elapsed -= self.walk_step_ms
+            x, y = self.walk_path[0]
+            cost = self.afford(x, y)
+            if cost is None:
+                self.walk_path = []
+                break
+            self.walk_path.pop(0)
+            hero.movement_left -= cost
+            if self.walk_path:
+                hero.step_to(x, y)
+            else:
+                hero.move_to(x, y, self.world)
+
+    def update_entities(self, dt):
+        """按固定间隔推进 AI 实体，返回 EntityStore.tick 的结果，这一帧没有 tick 时返回 None"""
+        self._ai_elapsed += dt
+        if self._ai_elapsed < self.ai_tick_ms:
+            return None
+        self._ai_elapsed %= self.ai_tick_ms
+        return self.world.tick_entities()
+
+    def until_next_update(self):
+        """距下一次行走或 AI 行动还有多少毫秒，都没有时返回 None（主循环可以一直等待输入）"""
+        waits = []
+        if self.walk_path:
+            waits.append(self.walk_step_ms - self._walk_elapsed)
+        entities = self.world.entities
+        if np.any(entities.alive[:entities.count] & (entities.kind[:entities.count] != PLAYER)):
+            waits.append(self.ai_tick_ms - self._ai_elapsed)
+        return min(waits) if waits else None
+
+    def step(self, dt, commands=()):
+        """执行一帧：先按顺序执行指令，再推进行走和 AI 实体，最后更新视野
+
+        返回 update_entities 的结果，界面据此刷新 AI 实体移动前后的格子。
+        """
+        for command in commands:
+            self.handle(command)
+        self.update_walk(dt)
+        moves = self.update_entities(dt)
+        self.world.update_vision()
+        self.frame += 1
+        return moves
+
+# --- 地图元素映射 ---
+impassable_tiles = {'W', UNLOADED_TILE} # 不可通行的地形
+sight_blocking_tiles = {'M', 'F'} # 阻挡视线的地形
+event_tiles = {'T', 'X', 'R', 'C', 'L', 'A', 'P', 'I'} # 有事件的地点，寻路时只能作为终点
+# 噪声地形 TerrainType 的值 -> 地图字符：草地 水域 山脉 森林 沙漠 沼泽
+noise_terrain_table = bytes.maketrans(bytes(range(6)), b'GWMFDB')
+terrain_costs = { # 每格移动消耗，未列出的地点按草地计
+    'G': 100, 'D': 150, 'S': 150, 'F': 150, 'B': 175, 'M': 200
+}
+# AI 实体的移动消耗，按地图字符的字节值索引；0 表示不能进入（水域和各种地点）
+entity_cost_table = np.full(256, terrain_costs['G'], dtype=np.int32)
+for tile, cost in terrain_costs.items():
+    entity_cost_table[ord(tile)] = cost
+for tile in impassable_tiles | event_tiles:
+    entity_cost_table[ord(tile)] = 0
+terrain_names = {
+    'G': '草地', 'F': '森林', 'M': '山脉', 'W': '水域',
+    'D': '沙漠', 'S': '雪地', 'B': '沼泽', 'T': '城镇',
+    'X': '宝箱', 'R': '资源点', 'C': '怪物营地', 'L': '图书馆',
+    'A': '竞技场', 'P': '港口', 'I': '遗迹'
+}
+
+starting_army = {'剑士': 15, '弓箭手': 8} # 初始军队，在城镇可以补充到这个数量
+
+# 随机地图上的怪物营地从这些模板中挑选
+camp_templates = [
+    {'creature': '哥布林', 'count': 15, 'reward_gold': 300},
+    {'creature': '独眼巨人', 'count': 5, 'reward_gold': 800, 'artifact_drop': True},
+    {'creature': '金人', 'count': 1, 'reward_gold': 2000, 'artifact_drop': True},
+]
+
+camp_base_counts = {camp['creature']: camp['count'] for camp in camp_templates} # 营地增长上限的基数
+
+# 手工地图上的怪物营地数据，每个 World 复制一份
+handcrafted_camps = {
+    (5, 4): {'creature': '哥布林', 'count': 15, 'reward_gold': 300},
+    (15, 5): {'creature': '独眼巨人', 'count': 5, 'reward_gold': 800, 'artifact_drop': True},
+    (10, 1): {'creature': '金人', 'count': 1, 'reward_gold': 2000, 'artifact_drop': True},
+}
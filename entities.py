@@ -0,0 +1,270 @@
+import numpy as np
+
+# 实体种类
+PLAYER = 0    # 玩家英雄，由输入控制，不参与 AI
+AI_HERO = 1   # 电脑英雄：朝随机选的目标走，走不通时换目标
+MONSTER = 2   # 游荡怪物：在出生点附近随机走动
+
+NEUTRAL = -1  # 怪物的所属玩家
+
+DEFAULT_MOVEMENT = 1500   # 每天的移动点数（草地每格 100）
+TARGET_RADIUS = 24        # 电脑英雄选目标的范围
+STUCK_TICKS = 3           # 连续几次走不动就换目标
+MONSTER_LEASH = 4         # 怪物离出生点的最远距离
+MONSTER_MOVE_CHANCE = 0.5
+
+_DIRECTIONS = np.array([(1, 0), (-1, 0), (0, 1), (0, -1)], dtype=np.int32)
+
+class EntityStore:
+    """大量英雄和怪物的结构数组存储
+
+    每个属性是一个连续的 NumPy 数组，第 i 个实体就是各数组的第 i 项；
+    AI 的每次 tick 对所有实体一起计算方向、检查地形和移动点数、解决碰撞，
+    没有逐个实体的 Python 循环。地图由 tiles() 提供（展平的格子值数组，
+    每次 tick 重新取，地图变化不需要通知），cost_table[格子值] 为移动消耗，
+    0 表示不能进入。同一格最多一个实体；玩家英雄走到 AI 实体所在格时例外。
+
+    玩家英雄仍然是完整的 Hero 对象（技能、资源、日志），attach 后它在数组里也有
+    一项，位置在每次 tick 和查询前从 Hero 同步过来，移动玩家英雄没有额外开销。
+    """
+
+    def __init__(self, width, height, tiles, cost_table, capacity=256, seed=None):
+        self.width = width
+        self.height = height
+        self.tiles = tiles
+        self.cost_table = np.asarray(cost_table, dtype=np.int32)
+        self.rng = np.random.default_rng(seed)
+        self.count = 0
+        self.occupied = np.zeros(width * height, dtype=np.int16) # 每格的实体数
+        self._attached = [] # [[编号, hero, 上次同步的 x, y], ...]
+        self._allocate(capacity)
+
+    def _allocate(self, capacity):
+        old = {name: getattr(self, name) for name in self._fields()} if self.count else {}
+        self.capacity = capacity
+        self.x = np.zeros(capacity, dtype=np.int32)
+        self.y = np.zeros(capacity, dtype=np.int32)
+        self.kind = np.zeros(capacity, dtype=np.uint8)
+        self.owner = np.zeros(capacity, dtype=np.int16)
+        self.alive = np.zeros(capacity, dtype=bool)
+        self.movement = np.zeros(capacity, dtype=np.int32)      # 今天剩余的移动点数
+        self.max_movement = np.zeros(capacity, dtype=np.int32)
+        self.attack = np.zeros(capacity, dtype=np.int16)
+        self.defense = np.zeros(capacity, dtype=np.int16)
+        self.home_x = np.zeros(capacity, dtype=np.int32)        # 怪物的出生点
+        self.home_y = np.zeros(capacity, dtype=np.int32)
+        self.target_x = np.zeros(capacity, dtype=np.int32)      # 电脑英雄的目标
+        self.target_y = np.zeros(capacity, dtype=np.int32)
+        self.stuck = np.zeros(capacity, dtype=np.int16)
+        for name, values in old.items():
+            getattr(self, name)[:self.count] = values[:self.count]
+
+    @staticmethod
+    def _fields():
+        return ('x', 'y', 'kind', 'owner', 'alive', 'movement', 'max_movement', 'attack', 'defense',
+                'home_x', 'home_y', 'target_x', 'target_y', 'stuck')
+
+    def __len__(self):
+        return int(np.count_nonzero(self.alive[:self.count]))
+
+    def spawn_many(self, xs, ys, kind, owner=NEUTRAL, max_movement=DEFAULT_MOVEMENT, attack=1, defense=1):
+        """批量添加实体，返回它们的编号数组；调用方负责选空的、能进入的格子"""
+        xs = np.asarray(xs, dtype=np.int32)
+        ys = np.asarray(ys, dtype=np.int32)
+        n = len(xs)
+        if self.count + n > self.capacity:
+            self._allocate(max(self.capacity * 2, self.count + n))
+        ids = np.arange(self.count, self.count + n)
+        self.count += n
+        self.x[ids] = xs
+        self.y[ids] = ys
+        self.kind[ids] = kind
+        self.owner[ids] = owner
+        self.alive[ids] = True
+        self.movement[ids] = max_movement
+        self.max_movement[ids] = max_movement
+        self.attack[ids] = attack
+        self.defense[ids] = defense
+        self.home_x[ids] = xs
+        self.home_y[ids] = ys
+        self.target_x[ids] = xs
+        self.target_y[ids] = ys
+        self.stuck[ids] = STUCK_TICKS # 第一次 tick 就选目标
+        np.add.at(self.occupied, ys * self.width + xs, 1)
+        return ids
+
+    def spawn(self, x, y, kind, **stats):
+        return int(self.spawn_many([x], [y], kind, **stats)[0])
+
+    def remove(self, entity_id):
+        if self.alive[entity_id]:
+            self.alive[entity_id] = False
+            self.occupied[self.y[entity_id] * self.width + self.x[entity_id]] -= 1
+
+    def attach(self, hero):
+        """把玩家英雄登记为 PLAYER 实体，返回它的编号"""
+        entity_id = self.spawn(hero.x, hero.y, PLAYER, owner=0)
+        self._attached.append([entity_id, hero, hero.x, hero.y])
+        return entity_id
+
+    def detach(self, hero):
+        """移除 attach 过的英雄"""
+        for entry in self._attached:
+            if entry[1] is hero:
+                self._sync_attached()
+                self.remove(entry[0])
+                self._attached.remove(entry)
+                return
+
+    def _sync_attached(self):
+        for entry in self._attached:
+            entity_id, hero, x, y = entry
+            if (hero.x, hero.y) != (x, y):
+                self.set_position(entity_id, x, y, hero.x, hero.y)
+                entry[2], entry[3] = hero.x, hero.y
+
+    def set_position(self, entity_id, old_x, old_y, x, y):
+        """把一个实体从 (old_x, old_y) 移到 (x, y)，同时更新占用表"""
+        self.occupied[old_y * self.width + old_x] -= 1
+        self.occupied[y * self.width + x] += 1
+        self.x[entity_id] = x
+        self.y[entity_id] = y
+
+    def populate(self, heroes, monsters, players=4):
+        """在随机的空格子上放 heroes 个电脑英雄（分属 players 个玩家）和 monsters 个游荡怪物"""
+        free = np.flatnonzero((self.cost_table[self.tiles()] > 0) & (self.occupied == 0))
+        total = min(heroes + monsters, len(free))
+        cells = self.rng.choice(free, size=total, replace=False)
+        xs, ys = cells % self.width, cells // self.width
+        heroes = min(heroes, total)
+        if heroes:
+            owners = 1 + np.arange(heroes) % players
+            self.spawn_many(xs[:heroes], ys[:heroes], AI_HERO, owner=owners, attack=2, defense=2)
+        if total > heroes:
+            self.spawn_many(xs[heroes:], ys[heroes:], MONSTER, max_movement=DEFAULT_MOVEMENT // 2)
+
+    def state(self):
+        """存档用：(属性名 -> 前 count 项的副本, 随机数生成器状态)"""
+        self._sync_attached()
+        arrays = {name: getattr(self, name)[:self.count].copy() for name in self._fields()}
+        return arrays, self.rng.bit_generator.state
+
+    def restore(self, arrays, rng_state):
+        """读档：换成 state() 保存的数组和随机数状态，重建占用表
+
+        attach 过的英雄按原来的编号对应（World 总是先 attach 玩家英雄），
+        下次同步时移到 Hero 当前的位置。
+        """
+        count = len(arrays['x'])
+        self.count = 0
+        self._allocate(max(self.capacity, count))
+        for name in self._fields():
+            getattr(self, name)[:count] = arrays[name]
+        self.count = count
+        self.occupied[:] = 0
+        alive = np.flatnonzero(self.alive[:count])
+        np.add.at(self.occupied, self.y[alive] * self.width + self.x[alive], 1)
+        for entry in self._attached:
+            entry[2], entry[3] = int(self.x[entry[0]]), int(self.y[entry[0]])
+        self.rng.bit_generator.state = rng_state
+
+    def new_day(self):
+        """所有实体的移动点数恢复"""
+        self.movement[:self.count] = self.max_movement[:self.count]
+
+    def in_rect(self, x0, y0, x1, y1):
+        """在 [x0, x1) x [y0, y1) 范围内的活实体编号"""
+        self._sync_attached()
+        x = self.x[:self.count]
+        y = self.y[:self.count]
+        return np.flatnonzero(self.alive[:self.count] & (x >= x0) & (x < x1) & (y >= y0) & (y < y1))
+
+    def _choose_targets(self, ids):
+        x = np.clip(self.x[ids] + self.rng.integers(-TARGET_RADIUS, TARGET_RADIUS + 1, len(ids)), 0, self.width - 1)
+        y = np.clip(self.y[ids] + self.rng.integers(-TARGET_RADIUS, TARGET_RADIUS + 1, len(ids)), 0, self.height - 1)
+        self.target_x[ids] = x
+        self.target_y[ids] = y
+        self.stuck[ids] = 0
+
+    def _hero_steps(self, ids, tiles):
+        """电脑英雄朝目标走：先走差距大的那一轴，那边走不通时走另一轴"""
+        x, y = self.x[ids], self.y[ids]
+        dx = np.sign(self.target_x[ids] - x)
+        dy = np.sign(self.target_y[ids] - y)
+        x_first = np.abs(self.target_x[ids] - x) >= np.abs(self.target_y[ids] - y)
+        first_dx = np.where(x_first, dx, 0)
+        first_dy = np.where(x_first, 0, dy)
+        first_ok = self._enterable(x + first_dx, y + first_dy, tiles) & ((first_dx != 0) | (first_dy != 0))
+        return np.where(first_ok, first_dx, np.where(x_first, 0, dx)), np.where(first_ok, first_dy, np.where(x_first, dy, 0))
+
+    def _monster_steps(self, ids):
+        """怪物随机走一步，离出生点太远时往回走"""
+        step = _DIRECTIONS[self.rng.integers(0, 4, len(ids))]
+        idle = self.rng.random(len(ids)) >= MONSTER_MOVE_CHANCE
+        dx = np.where(idle, 0, step[:, 0])
+        dy = np.where(idle, 0, step[:, 1])
+        far_x = np.abs(self.x[ids] + dx - self.home_x[ids]) > MONSTER_LEASH
+        far_y = np.abs(self.y[ids] + dy - self.home_y[ids]) > MONSTER_LEASH
+        return np.where(far_x, 0, dx), np.where(far_y, 0, dy)
+
+    def _enterable(self, x, y, tiles):
+        inside = (x >= 0) & (x < self.width) & (y >= 0) & (y < self.height)
+        cells = np.where(inside, y * self.width + x, 0)
+        return inside & (self.cost_table[tiles[cells]] > 0)
+
+    def tick(self):
+        """所有 AI 实体走一步，返回 (移动了的编号, 原来的 x, 原来的 y)
+
+        目标格子必须能进入、没有被占用（按 tick 开始时的位置算），并且剩余移动点数
+        足够；多个实体要进同一格时按随机顺序只让一个进。移动点数只在 new_day 时恢复
+        （World.advance_days 调用，与玩家英雄同步）。
+        """
+        self._sync_attached()
+        n = self.count
+        ids = np.flatnonzero(self.alive[:n] & (self.kind[:n] != PLAYER))
+        empty = np.zeros(0, dtype=np.int64)
+        if not len(ids):
+            return empty, empty, empty
+        tiles = self.tiles() # 只查要用到的格子，不对整张地图查表
+
+        heroes = ids[self.kind[ids] == AI_HERO]
+        if len(heroes):
+            arrived = (self.x[heroes] == self.target_x[heroes]) & (self.y[heroes] == self.target_y[heroes])
+            retarget = heroes[arrived | (self.stuck[heroes] >= STUCK_TICKS)]
+            if len(retarget):
+                self._choose_targets(retarget)
+        monsters = ids[self.kind[ids] == MONSTER]
+        dx = np.zeros(len(ids), dtype=np.int32)
+        dy = np.zeros(len(ids), dtype=np.int32)
+        is_hero = self.kind[ids] == AI_HERO
+        dx[is_hero], dy[is_hero] = self._hero_steps(heroes, tiles)
+        dx[~is_hero], dy[~is_hero] = self._monster_steps(monsters)
+
+        x, y = self.x[ids], self.y[ids]
+        new_x, new_y = x + dx, y + dy
+        wants = (dx != 0) | (dy != 0)
+        ok = wants & self._enterable(new_x, new_y, tiles)
+        cells = np.where(ok, new_y * self.width + new_x, 0)
+        step_cost = self.cost_table[tiles[cells]]
+        ok &= (self.occupied[cells] == 0) & (self.movement[ids] >= step_cost)
+
+        # 抢同一格时随机排序，每格只留第一个
+        candidates = np.flatnonzero(ok)
+        candidates = candidates[self.rng.permutation(len(candidates))]
+        _, first = np.unique(cells[candidates], return_index=True)
+        winners = np.sort(candidates[first])
+
+        moving = np.zeros(len(ids), dtype=bool)
+        moving[winners] = True
+        blocked = wants & ~moving
+        self.stuck[ids[blocked & is_hero]] += 1
+        self.stuck[ids[~blocked & is_hero]] = 0
+
+        moved = ids[winners]
+        old_x, old_y = x[winners], y[winners]
+        np.subtract.at(self.occupied, old_y * self.width + old_x, 1)
+        self.occupied[cells[winners]] += 1
+        self.x[moved] = new_x[winners]
+        self.y[moved] = new_y[winners]
+        self.movement[moved] -= step_cost[winners]
+        return moved, old_x, old_y
@@ -0,0 +1,161 @@
+import os
+import json
+import time
+import queue
+import threading
+from collections import deque, namedtuple
+
+# seq 为从 1 开始的累计编号，time 为 time.time()，data 为事件的结构化数据
+Event = namedtuple('Event', ['seq', 'time', 'kind', 'text', 'data'])
+
+class EventLog:
+    """定长的事件日志（环形缓冲区）
+
+    内存中只保留最近 capacity 条事件，界面只读最近几条；长时间游戏或批量模拟
+    时内存不会增长。设置了 sink 时每条事件同时交给它写盘（见 EventSink）。
+    """
+
+    def __init__(self, capacity=200, sink=None):
+        self.capacity = capacity
+        self.sink = sink
+        self.count = 0  # 累计记录的事件数，包括已被挤出缓冲区的
+        self._events = deque(maxlen=capacity)
+
+    def __len__(self):
+        return len(self._events)
+
+    def __iter__(self):
+        return iter(self._events)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return list(self._events)[index]
+        return self._events[index]
+
+    def add(self, kind, text, **data):
+        """记录一条事件并返回它；kind 为事件类型，text 为显示给玩家的文字"""
+        self.count += 1
+        event = Event(self.count, time.time(), kind, text, data)
+        self._events.append(event)
+        if self.sink is not None:
+            self.sink.emit(event)
+        return event
+
+    def append(self, text):
+        """与列表的 append 相同的用法，记为 'info' 类型"""
+        return self.add('info', text)
+
+    def tail(self, n):
+        """最近 n 条事件（旧的在前）"""
+        if n <= 0:
+            return []
+        start = max(0, len(self._events) - n)
+        return [self._events[i] for i in range(start, len(self._events))]
+
+    def records(self):
+        """缓冲区内的事件，转成只含 JSON 类型的列表（存档用）"""
+        return [list(event) for event in self._events]
+
+    def restore(self, records):
+        """读档时恢复 records() 的结果，不再交给 sink"""
+        self._events.clear()
+        for seq, timestamp, kind, text, data in records:
+            self._events.append(Event(seq, timestamp, kind, text, data))
+        if self._events:
+            self.count = max(self.count, self._events[-1].seq)
+
+_STOP = object()
+
+class EventSink:
+    """在后台线程中把事件成批追加到 JSON Lines 文件，超过 max_bytes 时轮转
+
+    emit 只把事件放进队列，不做任何文件操作，主循环不会被磁盘 I/O 阻塞。
+    后台线程攒够 batch_size 条或等待超过 flush_interval 秒后写一次；队列满了
+    （磁盘跟不上）时丢弃新事件并计入 dropped；data 无法写成 JSON 的事件跳过并
+    计入 invalid。轮转方式与 logging 的 RotatingFileHandler 相同：path -> path.1 -> ... -> path.<backups>。
+    """
+
+    def __init__(self, path, max_bytes=4 * 1024 * 1024, backups=3,
+                 batch_size=256, flush_interval=0.5, max_pending=10000):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.backups = backups
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.dropped = 0
+        self.written = 0
+        self.invalid = 0   # 无法序列化而跳过的事件
+        self.error = None  # 写盘失败时的异常，之后的事件都被丢弃
+        self._queue = queue.Queue(max_pending)
+        self._thread = threading.Thread(target=self._run, name='EventSink', daemon=True)
+        self._thread.start()
+
+    def emit(self, event):
+        try:
+            self._queue.put_nowait(event)
+        except queue.Full:
+            self.dropped += 1
+
+    def close(self, timeout=5.0):
+        """写完队列中剩余的事件后结束后台线程；最多等 timeout 秒，后台线程卡住时不阻塞调用方"""
+        if self._thread.is_alive():
+            try:
+                self._queue.put(_STOP, timeout=timeout)
+            except queue.Full:
+                return # 后台线程没有在取队列，放弃等待（守护线程随进程退出）
+            self._thread.join(timeout)
+
+    def _next_batch(self):
+        """阻塞到有事件，再在 flush_interval 内尽量凑满一批"""
+        batch = [self._queue.get()]
+        deadline = time.monotonic() + self.flush_interval
+        while len(batch) < self.batch_size and batch[-1] is not _STOP:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(self._queue.get(timeout=remaining))
+            except queue.Empty:
+                break
+        return batch
+
+    def _rotate(self, f):
+        f.close()
+        if self.backups > 0:
+            for i in range(self.backups - 1, 0, -1):
+                if os.path.exists(f"{self.path}.{i}"):
+                    os.replace(f"{self.path}.{i}", f"{self.path}.{i + 1}")
+            os.replace(self.path, f"{self.path}.1")
+        return open(self.path, 'w', encoding='utf-8')
+
+    def _run(self):
+        f = None
+        try:
+            f = open(self.path, 'a', encoding='utf-8')
+            while True:
+                batch = self._next_batch()
+                stop = batch[-1] is _STOP
+                if stop:
+                    batch.pop()
+                for event in batch:
+                    try:
+                        line = json.dumps(event._asdict(), ensure_ascii=False)
+                    except (TypeError, ValueError):
+                        self.invalid += 1 # 一条坏事件不能让后台线程退出
+                        continue
+                    f.write(line)
+                    f.write('\n')
+                    self.written += 1
+                f.flush()
+                if f.tell() >= self.max_bytes:
+                    f = self._rotate(f)
+                if stop:
+                    break
+        except OSError as e:
+            self.error = e
+            # 继续取走队列里的事件，不让 close 卡住
+            while self._queue.get() is not _STOP:
+                self.dropped += 1
+        finally:
+            if f is not None:
+                f.close()
@@ -0,0 +1,87 @@
+import numpy as np
+
+EXPLORED = 1  # 曾经看到过
+VISIBLE = 2   # 当前在视野内
+
+# 四个象限：(depth, col) -> (dx, dy)
+_QUADRANTS = (
+    (0, -1, 1, 0),   # 北: dx = col, dy = -depth
+    (1, 0, 0, 1),    # 东: dx = depth, dy = col
+    (0, 1, 1, 0),    # 南: dx = col, dy = depth
+    (-1, 0, 0, 1),   # 西: dx = -depth, dy = col
+)
+
+def compute_fov(ox, oy, radius, blocks):
+    """对称阴影投射（symmetric shadowcasting）计算 (ox, oy) 的视野
+
+    blocks 是形状 (height, width) 的布尔数组，True 表示阻挡视线（山脉、森林）。
+    阻挡格本身可见；A 能看到 B 当且仅当 B 能看到 A。斜率用整数分数表示，
+    不引入浮点误差。返回可见格子的集合 {(x, y), ...}。
+    """
+    height, width = blocks.shape
+    visible = {(ox, oy)}
+    radius_sq = radius * radius + radius  # 略放宽，让视野边缘更圆
+
+    for depth_dx, depth_dy, col_dx, col_dy in _QUADRANTS:
+        # 待扫描的行：(深度, 起始斜率分子, 分母, 结束斜率分子, 分母)
+        rows = [(1, -1, 1, 1, 1)]
+        while rows:
+            depth, start_num, start_den, end_num, end_den = rows.pop()
+            if depth > radius:
+                continue
+            # 起止列：depth * start 四舍五入（.5 向上），depth * end 四舍五入（.5 向下）
+            min_col = (2 * depth * start_num + start_den) // (2 * start_den)
+            max_col = -((end_den - 2 * depth * end_num) // (2 * end_den))
+            prev_wall = None
+            for col in range(min_col, max_col + 1):
+                x = ox + depth * depth_dx + col * col_dx
+                y = oy + depth * depth_dy + col * col_dy
+                in_bounds = 0 <= x < width and 0 <= y < height
+                wall = not in_bounds or bool(blocks[y, x])
+                if in_bounds and depth * depth + col * col <= radius_sq and (
+                    wall or (col * start_den >= depth * start_num and col * end_den <= depth * end_num)
+                ):
+                    visible.add((x, y))
+                if prev_wall and not wall:
+                    # 墙后第一格：收窄起始斜率到 (2col - 1) / 2depth
+                    start_num, start_den = 2 * col - 1, 2 * depth
+                if prev_wall is False and wall:
+                    rows.append((depth + 1, start_num, start_den, 2 * col - 1, 2 * depth))
+                prev_wall = wall
+            if prev_wall is False:
+                rows.append((depth + 1, start_num, start_den, end_num, end_den))
+    return visible
+
+class FogOfWar:
+    """战争迷雾：每格一个 uint8 状态（EXPLORED / VISIBLE 位）
+
+    英雄每走一步只在其视野半径内做一次阴影投射，再与上一次的可见集合求差，
+    只有新看到和刚离开视野的格子会被改写，不会扫描整张地图。
+    """
+
+    def __init__(self, width, height, blocks):
+        self.width = width
+        self.height = height
+        self.blocks = blocks
+        self.state = np.zeros((height, width), dtype=np.uint8)
+        self.visible = set()
+
+    def update(self, x, y, radius):
+        """从 (x, y) 以 radius 为半径重新计算视野，返回这次新探索到的格子列表"""
+        now_visible = compute_fov(x, y, radius, self.blocks)
+        state = self.state
+        for vx, vy in self.visible - now_visible:
+            state[vy, vx] &= 0xFF ^ VISIBLE
+        newly_explored = []
+        for vx, vy in now_visible - self.visible:
+            if not state[vy, vx] & EXPLORED:
+                newly_explored.append((vx, vy))
+            state[vy, vx] |= EXPLORED | VISIBLE
+        self.visible = now_visible
+        return newly_explored
+
+    def is_explored(self, x, y):
+        return bool(self.state[y, x] & EXPLORED)
+
+    def is_visible(self, x, y):
+        return bool(self.state[y, x] & VISIBLE)
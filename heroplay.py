@@ -1,14 +1,38 @@
+import time
+_import_start = time.perf_counter()
 import pygame
+import numpy as np
+import os
 import sys
-import random
+from atlas import TileAtlas, TileStyle
+from camera import Camera
+from combat import estimate
+from engine import World, Simulation, MAP_WIDTH, MAP_HEIGHT, terrain_names
+from entities import PLAYER, MONSTER
+from eventlog import EventSink
+from fog import EXPLORED
+from mapfile import ChunkStreamer, load_world
+from minimap import Minimap, entity_markers
+from profiler import FrameProfiler, ProfilerOverlay
+from replay import start_recording
+from scheduler import FrameScheduler
+from savegame import SaveManager
+from render_cache import text_cache
+from startup import StartupTimer, init_display, draw_loading, run_with_loading_screen
+from terrain_layer import TerrainLayer
+IMPORT_MS = (time.perf_counter() - _import_start) * 1000 # 导入本模块及依赖（pygame、numpy 等）的耗时
 
 # --- 常量定义 ---
 SCREEN_WIDTH = 1000
 SCREEN_HEIGHT = 700
 TILE_SIZE = 40
-MAP_WIDTH = 18
-MAP_HEIGHT = 14
+ZOOM_LEVELS = (20, 30, 40, 60) # 可选的格子尺寸（像素），滚轮或 +/- 键切换，每种尺寸预先画好一份图集
 GRID_COLOR = (50, 50, 50)
+SAVE_PATH = 'savegame.hsav'
+AUTOSAVE_MS = 60000  # 自动存档间隔（只写增量）
+EVENT_LOG_PATH = 'events.jsonl'
+RECORDING_PATH = 'recording.jsonl' # 每局的输入录像，用 python replay.py recording.jsonl 回放
+MINIMAP_RECT = (SCREEN_WIDTH - 240, 10, 230, 150) # 侧边栏顶部的小地图区域
 
 # 颜色定义
 COLORS = {
@@ -24,384 +48,614 @@ COLORS = {
     'text': (255, 255, 255),
     'highlight_passable': (0, 255, 0, 100),   # 绿色半透明，可移动
     'highlight_impassable': (255, 0, 0, 100), # 红色半透明，不可移动
-    'highlight_hover': (255, 255, 0, 100),    # 黄色半透明，悬停
+    'highlight_hover': (255, 255, 0, 100),    # 黄色半透明，悬停（可通行但本回合走不到）
+    'movement_range': (255, 255, 255, 60),    # 本回合能走到的格子
+    'movement_last': (255, 255, 255, 25),     # 能走到，但到了之后移动力不够再走一格
     'hero_color': (255, 215, 0),              # 金色
     'monster_color': (200, 0, 0),             # 红色
     'resource_color': (255, 215, 0),          # 金色
     'building_color': (139, 69, 19),          # 棕色
 }
-
-# --- 游戏对象类 ---
-class Hero:
-    def __init__(self, x, y):
-        self.x = x
-        self.y = y
-        self.level = 1
-        self.experience = 0
-        self.primary_skills = {'attack': 1, 'defense': 1, 'spell_power': 1, 'knowledge': 1}
-        self.secondary_skills = {'侦察': 1}
-        self.spells = ['祈祷']
-        self.artifacts = ["生命之书"]
-        self.resources = {
-            'Gold': 2450, 'Wood': 12, 'Ore': 8, 
-            'Mercury': 3, 'Sulfur': 2, 'Crystal': 4, 'Gems': 1
-        }
-        self.log = ["英雄已就位，开始探索！"]
-        self.army = {'剑士': 15, '弓箭手': 8} # 示例军队
-
-    def move_to(self, new_x, new_y, game_map):
-        """尝试移动到指定坐标"""
-        if 0 <= new_x < MAP_WIDTH and 0 <= new_y < MAP_HEIGHT:
-            tile = game_map[new_y][new_x]
-            # 检查地形是否可通行
-            if tile in impassable_tiles:
-                self.log.append(f"无法移动到 ({new_x}, {new_y}) - 地形不可通行！")
-                return False
-            
-            self.x = new_x
-            self.y = new_y
-            self.log.append(f"移动到 ({self.x}, {self.y})")
-            self._trigger_tile_event(game_map)
-            return True
-        return False
-
-    def move_by_direction(self, dx, dy, game_map):
-        """按方向移动一步"""
-        new_x = self.x + dx
-        new_y = self.y + dy
-        self.move_to(new_x, new_y, game_map)
-
-    def _trigger_tile_event(self, game_map):
-        """触发当前格子的事件"""
-        tile = game_map[self.y][self.x]
-        
-        if tile == 'T':  # 城镇
-            self._visit_town()
-        elif tile == 'X':  # 宝箱
-            self._collect_treasure(game_map)
-        elif tile == 'R':  # 资源点
-            self._collect_resource(game_map)
-        elif tile == 'C':  # 怪物营地
-            self._fight_monster(game_map)
-        elif tile == 'L':  # 图书馆
-            self._visit_library()
-        elif tile == 'A':  # 竞技场
-            self._visit_arena()
-        elif tile == 'P':  # 港口
-            self._visit_port()
-        elif tile == 'I':  # 遗迹
-            self._visit_ruins()
-        else:
-            terrain_name = terrain_names.get(tile, '未知')
-            self.log.append(f"在{terrain_name}地形上。")
-
-    def _visit_town(self):
-        self.resources['Gold'] += 800
-        self.add_skill('后勤')
-        self.log.append("访问了城镇！金币+800, 学会【后勤】技能！")
-
-    def _collect_treasure(self, game_map):
-        artifact_found = random.choice(["龙鳞甲", "贤者之石", "天使联盟"])
-        self.artifacts.append(artifact_found)
-        gold_found = random.randint(500, 1500)
-        self.resources['Gold'] += gold_found
-        game_map[self.y][self.x] = 'G' # 宝箱被拾取后变回草地
-        self.log.append(f"拾取了宝箱！获得 {artifact_found} 和 {gold_found} 金币！")
-
-    def _collect_resource(self, game_map):
-        resource_type = random.choice(['Wood', 'Ore', 'Mercury', 'Sulfur', 'Crystal', 'Gems'])
-        amount = random.randint(1, 3)
-        self.resources[resource_type] += amount
-        game_map[self.y][self.x] = 'G' # 资源点被采集后变回草地
-        self.log.append(f"采集了资源！获得 {amount} 个 {resource_type}！")
-
-    def _fight_monster(self, game_map):
-        monster_data = monster_camps.get((self.x, self.y), {'creature': '哥布林', 'count': 10, 'reward_gold': 300})
-        creature = monster_data['creature']
-        count = monster_data['count']
-        reward_gold = monster_data['reward_gold']
-        
-        print(f"\n遭遇 {count} 只 {creature}！\n")
-        # 简化战斗逻辑，总是获胜
-        exp_gained = reward_gold // 10
-        self.gain_experience(exp_gained)
-        self.resources['Gold'] += reward_gold
-        self.log.append(f"击败了 {creature} 军队！获得 {reward_gold} 金币和 {exp_gained} 经验！")
-        
-        # 检查是否有宝物掉落
-        if random.random() < 0.3:  # 30% 概率掉落
-            artifact_dropped = random.choice(["泰坦之锤", "龙眼"])
-            self.artifacts.append(artifact_dropped)
-            self.log.append(f"缴获了战利品！获得 {artifact_dropped}！")
-        
-        # 清除怪物营地
-        game_map[self.y][self.x] = 'G'
-        del monster_camps[(self.x, self.y)]
-
-    def _visit_library(self):
-        new_spell = random.choice(["失忆", "火球术", "治疗", "魔力井"])
-        self.spells.append(new_spell)
-        self.log.append(f"在图书馆学习了 {new_spell} 法术！")
-
-    def _visit_arena(self):
-        for skill in self.primary_skills:
-            self.primary_skills[skill] += 1
-        self.gain_experience(500)
-        self.log.append("在竞技场挑战成功！全属性+1, 获得 500 经验！")
-
-    def _visit_port(self):
-        self.log.append("到达了港口，可以在此乘船航行。")
-
-    def _visit_ruins(self):
-        artifact_found = random.choice(["魔力源泉", "时光之帽"])
-        self.artifacts.append(artifact_found)
-        self.log.append(f"在遗迹中发掘出 {artifact_found}！")
-
-    def gain_experience(self, exp):
-        old_level = self.level
-        self.experience += exp
-        self.level = (self.experience // 1000) + 1
-        if self.level > old_level:
-            self.log.append(f"*** {self.level} 级！ ***")
-
-    def add_skill(self, skill_name):
-        if skill_name in self.secondary_skills:
-            self.secondary_skills[skill_name] += 1
-        else:
-            self.secondary_skills[skill_name] = 1
-        self.log.append(f"学会了 {skill_name} 技能！")
-
-    def get_stats_text(self):
-        stats = [
-            f"英雄: {self.name}",
-            f"等级: {self.level} (经验: {self.experience})",
-            f"金币: {self.resources['Gold']}",
-            f"木材: {self.resources['Wood']}, 矿石: {self.resources['Ore']}",
-            f"水银: {self.resources['Mercury']}, 硫磺: {self.resources['Sulfur']}",
-            f"水晶: {self.resources['Crystal']}, 宝石: {self.resources['Gems']}",
-            f"主属性: 攻防法知 {self.primary_skills['attack']}/{self.primary_skills['defense']}/{self.primary_skills['spell_power']}/{self.primary_skills['knowledge']}",
-            f"技能: {', '.join([f'{k}:{v}' for k, v in self.secondary_skills.items()])}",
-            f"法术: {', '.join(self.spells)}",
-            f"宝物: {', '.join(self.artifacts[:3])}",
-            f"军队: {dict(self.army)}"
-        ]
-        return stats
+# 电脑英雄按所属玩家着色，游荡怪物统一用暗红色
+OWNER_COLORS = [(0, 100, 255), (220, 60, 60), (60, 200, 200), (200, 80, 200), (240, 140, 0)]
+WANDERING_MONSTER_COLOR = (120, 0, 0)
+CHUNK_LOADED = pygame.event.custom_type() # 后台预读完一个地图区块，唤醒空闲等待的主循环
+MOVE_KEYS = {pygame.K_w: (0, -1), pygame.K_s: (0, 1), pygame.K_a: (-1, 0), pygame.K_d: (1, 0)}
 
 class Game:
-    def __init__(self):
-        pygame.init()
+    def __init__(self, map_width=MAP_WIDTH, map_height=MAP_HEIGHT, seed=None, save_path=None, event_path=None,
+                 ai_heroes=0, monsters=0, record_path=None, replay=None, map_path=None):
+        """record_path: 把每帧的输入录到这个文件；replay: 回放一个 replay.Recording（不接受输入、不存档）
+        map_path: 地图文件（.hmap，见 mapfile），只读入英雄附近的区块，其余在后台按需读入
+        """
+        # 启动顺序：先打开窗口画出加载画面，再在后台生成地图或读档，各阶段耗时见 startup
+        self.startup = StartupTimer(IMPORT_MS)
+        init_display()
         self.screen = pygame.display.set_mode((SCREEN_WIDTH, SCREEN_HEIGHT))
         pygame.display.set_caption("英雄无敌3 - 高级地图探索器")
-        self.clock = pygame.time.Clock()
+        self.scheduler = FrameScheduler() # 空闲时阻塞等待输入，只在有变化时重画
         # 使用系统默认字体，解决中文乱码问题
         self.font = pygame.font.Font(None, 24)
         self.small_font = pygame.font.Font(None, 20)
+        self.startup.mark('init')
+        draw_loading(self.screen, self.font, "正在加载地图...")
+        self.startup.mark('first_frame')
         
-        # 地图生成
-        self.game_map = self.generate_map()
-        self.hero = Hero(8, 6) # 初始位置
+        # 游戏逻辑（地图、英雄、地点索引、迷雾）都在无界面的 World 里，这里只负责绘制和输入
+        self.world, self.saves = run_with_loading_screen(
+            self.screen, self.font,
+            lambda: self._load_world(map_width, map_height, seed, save_path, ai_heroes, monsters, replay, map_path),
+            "正在加载地图...")
+        self.startup.mark('generate')
+        self._autosave_elapsed = 0
+        # 事件日志在内存中只保留最近的事件；给出 event_path 时由后台线程写到磁盘
+        self.event_sink = EventSink(event_path) if event_path else None
+        self.world.hero.log.sink = self.event_sink
+        self.map_width = self.world.map_width
+        self.map_height = self.world.map_height
+        self.game_map = self.world.game_map
+        self.hero = self.world.hero
+        self.objects = self.world.objects
+        self.fog = self.world.fog
+        self.pathfinder = self.world.pathfinder
         self.hovered_tile = None
-        self.hero.name = "艾尔拉思" # 设置英雄名
-
-    def generate_map(self):
-        # 初始化地图为草地
-        game_map = [['G' for _ in range(MAP_WIDTH)] for _ in range(MAP_HEIGHT)]
+        self._nearby_cache = None
         
-        # 添加地形
-        # 水域
-        for x in range(14, 17):
-            game_map[2][x] = 'W'
-            game_map[3][x] = 'W'
-            game_map[4][x] = 'W'
-        # 山脉
-        for x in range(3, 6):
-            game_map[10][x] = 'M'
-            game_map[11][x] = 'M'
-        for y in range(5, 8):
-            game_map[y][12] = 'M'
-        # 森林
-        for x in range(10, 13):
-            for y in range(9, 12):
-                game_map[y][x] = 'F'
-        # 沙漠
-        for x in range(0, 4):
-            for y in range(0, 4):
-                game_map[y][x] = 'D'
-        # 雪地
-        for x in range(14, 18):
-            for y in range(10, 14):
-                game_map[y][x] = 'S'
-        # 沼泽
-        for x in range(5, 8):
-            for y in range(2, 5):
-                game_map[y][x] = 'B'
+        # 逐帧的游戏逻辑在 Simulation 里：这里只把键盘和点击整理成指令，每帧交给 step
+        self.commands = []
+        self.replay = replay
+        self.recorder = None
+        if replay is not None:
+            self.simulation = replay.simulation(self.world)
+            replay.verify(0, self.world)
+        else:
+            self.simulation = Simulation(self.world)
+            if record_path:
+                self.recorder = start_recording(record_path, self.world, self.simulation, ai_heroes, monsters,
+                                                from_save=self.saves.save_id is not None)
+        
+        # 镜头：地图区域固定为侧边栏左侧，方向键/右键拖拽/鼠标贴边滚动
+        self.camera = Camera(
+            (0, 0, SCREEN_WIDTH - 250, SCREEN_HEIGHT), self.map_width, self.map_height, TILE_SIZE,
+            scroll_keys={
+                pygame.K_UP: (0, -1), pygame.K_DOWN: (0, 1),
+                pygame.K_LEFT: (-1, 0), pygame.K_RIGHT: (1, 0)
+            }
+        )
+        self.camera.center_on(self.hero.x, self.hero.y)
+        
+        # 格子图集：每种格子外观在每个缩放级别下各画一次，地图按外观编号批量 blits
+        styles, self.tile_style_ids = tile_styles()
+        self.atlas = TileAtlas(styles, ZOOM_LEVELS, lambda tile_size: pygame.font.Font(None, tile_size // 2))
+        # 静态地图层：地形、营地和资源点按区块只画一次，地图格子变化时按格刷新
+        self.terrain_layer = TerrainLayer(self.map_width, self.map_height, TILE_SIZE, self.atlas, self.tile_ids,
+                                          self.camera, chunk_size=16)
         
-        # 放置特殊地点
-        game_map[1][1] = 'T'  # 城镇
-        game_map[1][13] = 'X' # 宝箱
-        game_map[2][7] = 'R'  # 资源点
-        game_map[4][5] = 'C'  # 怪物营地
-        game_map[6][10] = 'L' # 图书馆
-        game_map[12][1] = 'A' # 竞技场
-        game_map[0][15] = 'P' # 港口
-        game_map[11][15] = 'I' # 遗迹
-        game_map[8][3] = 'R'  # 另一个资源点
-        game_map[5][15] = 'C' # 另一个怪物营地
+        # 小地图：地图字节按调色板查表写进 Surface，之后只更新变化的格子和移动的英雄、怪物
+        self.minimap = Minimap(MINIMAP_RECT, self.map_width, self.map_height, minimap_palette(),
+                               lambda: self.world.tile_values().reshape(self.map_height, self.map_width),
+                               lambda: self.fog.state)
+        self._minimap_markers_dirty = True
+        self.game_map.add_listener(self._on_tile_changed)
+        self.world.add_vision_listener(self._on_explored)
+        self.game_map.add_block_listener(self._on_block_loaded)
+        # 流式加载的地图：后台线程预读镜头和英雄附近的区块，读完后作为 ('chunk', cx, cy) 指令写进地图
+        self.map_stream = None
+        if self.world.map_source is not None and replay is None:
+            self.map_stream = ChunkStreamer(self.world.map_source, on_loaded=self._on_chunk_read,
+                                            loaded=self.world.loaded_chunks)
+            self.world.map_source = self.map_stream
+        self._drawn_hero_pos = (self.hero.x, self.hero.y)
+        self._drawn_hover = None
+        self._drawn_range = {} # 叠加层上画出的可达格子 -> 色阶
+        self._drawn_range_key = None
+        self._range_overlays = {} # 格子尺寸 -> 各色阶的半透明 Surface
+        self._drawn_ui_state = None
+        self._drawn_tooltip = None # (内容键, 屏幕矩形)
+        self._tooltip_surface = None
         
-        return game_map
+        # 性能分析：F3 开关（统计叠加在地图左上角），F4 导出 JSON 和 Chrome trace
+        self.profiler = FrameProfiler(('events', 'draw_map', 'draw_ui', 'display', 'tick', 'update'))
+        self.profiler_overlay = ProfilerOverlay(self.profiler, self.small_font)
+
+    @staticmethod
+    def _load_world(map_width, map_height, seed, save_path, ai_heroes, monsters, replay=None, map_path=None):
+        """给出已有的存档时读档，给出地图文件时打开地图文件，否则新建地图（在后台线程运行，不调用 pygame）
+
+        F5 存档，之后定时写增量存档；回放录像时由录像重建 World，不存档。
+        """
+        if replay is not None:
+            return replay.build_world(), None
+        if save_path and os.path.exists(save_path):
+            saves = SaveManager.load(save_path)
+            world = saves.world
+        elif map_path:
+            world = load_world(map_path, stream=True)
+            saves = SaveManager(world, save_path or SAVE_PATH)
+        else:
+            world = World(map_width, map_height, seed)
+            saves = SaveManager(world, save_path or SAVE_PATH)
+        if (ai_heroes or monsters) and len(world.entities) == 1: # 存档里已有 AI 实体时不再放
+            world.populate(ai_heroes, monsters)
+        return world, saves
+
+    def handle_minimap_click(self, pos):
+        """点击（或按住左键拖过）小地图时镜头跳到对应位置，返回点击是否落在小地图上"""
+        tile = self.minimap.tile_at(pos)
+        if tile is None:
+            return False
+        self.camera.center_on(*tile)
+        return True
 
     def handle_mouse_click(self, pos):
         """处理鼠标点击事件"""
-        x, y = pos
-        # 检查点击是否在地图区域内
-        if 0 <= x < MAP_WIDTH * TILE_SIZE and 0 <= y < MAP_HEIGHT * TILE_SIZE:
-            grid_x = x // TILE_SIZE
-            grid_y = y // TILE_SIZE
-            # 尝试移动到点击的格子
-            self.hero.move_to(grid_x, grid_y, self.game_map)
+        if self.handle_minimap_click(pos):
+            return
+        # 点击已探索的格子：寻路和行走在下一次 step 中进行
+        tile = self.camera.screen_to_tile(pos)
+        if tile and self.fog.is_explored(*tile) and self.replay is None:
+            self.commands.append(('click', *tile))
+
+    def step(self, dt):
+        """执行这一帧收集到的指令并推进游戏逻辑，AI 实体移动前后的格子标记为脏
+
+        录像时把 dt 和指令写进录像；回放时改用录像中这一帧的 dt 和指令，并校验状态。
+        返回这一帧是否可能改变了画面（执行了指令、英雄在行走或 AI 实体行动了）。
+        """
+        if self.replay is not None:
+            frame = self.simulation.frame
+            if frame >= len(self.replay.frames):
+                return False # 回放结束，画面停在最后一帧
+            dt, commands = self.replay.frames[frame]
+        else:
+            commands, self.commands = self.commands, []
+        walking = bool(self.simulation.walk_path)
+        moves = self.simulation.step(dt, commands)
+        if self.recorder is not None:
+            self.recorder.record(dt, commands, self.world)
+        elif self.replay is not None:
+            self.replay.verify(self.simulation.frame, self.world)
+            if self.simulation.frame == len(self.replay.frames):
+                self.hero.log.add('system', f"回放结束，共 {self.simulation.frame} 帧，状态与录像一致")
+        if moves is not None:
+            moved, old_x, old_y = moves
+            entities = self.world.entities
+            self.terrain_layer.mark_dirty_many(old_x, old_y)
+            self.terrain_layer.mark_dirty_many(entities.x[moved], entities.y[moved])
+            if len(moved):
+                self._minimap_markers_dirty = True
+        return bool(commands) or walking or moves is not None
+
+    def is_animating(self):
+        """是否需要逐帧运行：镜头在滚动、性能叠加层开着或者正在回放"""
+        replaying = self.replay is not None and self.simulation.frame < len(self.replay.frames)
+        return self.camera.scrolling or self.profiler.enabled or replaying
+
+    def until_next_update(self):
+        """空闲时最多等多久（毫秒）：下一次行走或 AI 行动、自动存档，都没有时返回 None"""
+        waits = [self.simulation.until_next_update()]
+        if self.saves is not None:
+            waits.append(AUTOSAVE_MS - self._autosave_elapsed)
+        waits = [wait for wait in waits if wait is not None]
+        return min(waits) if waits else None
+
+    def frame_rate(self):
+        """clock.tick 的帧率上限：平时 60，回放时按录像中下一帧的 dt 还原原来的速度"""
+        if self.replay is not None and self.simulation.frame < len(self.replay.frames):
+            return 1000 / max(1, self.replay.frames[self.simulation.frame][0])
+        return 60
+
+    def draw_entities(self):
+        """画视口内、已探索格子上的 AI 实体（只画本帧恢复过的格子）"""
+        entities = self.world.entities
+        layer = self.terrain_layer
+        radius = self.camera.tile_size // 3
+        for i in entities.in_rect(*self.camera.visible_tiles()).tolist():
+            if entities.kind[i] == PLAYER:
+                continue
+            x, y = int(entities.x[i]), int(entities.y[i])
+            if not layer.is_dirty(x, y) or not self.fog.is_explored(x, y):
+                continue
+            if entities.kind[i] == MONSTER:
+                color = WANDERING_MONSTER_COLOR
+            else:
+                color = OWNER_COLORS[entities.owner[i] % len(OWNER_COLORS)]
+            pygame.draw.circle(self.screen, color, layer.screen_rect(x, y).center, radius)
 
     def update_hovered_tile(self, pos):
         """更新悬停的格子坐标"""
-        x, y = pos
-        if 0 <= x < MAP_WIDTH * TILE_SIZE and 0 <= y < MAP_HEIGHT * TILE_SIZE:
-            self.hovered_tile = (x // TILE_SIZE, y // TILE_SIZE)
-        else:
-            self.hovered_tile = None
+        self.hovered_tile = self.camera.screen_to_tile(pos)
 
     def is_tile_passable(self, x, y):
         """检查指定格子是否可通行"""
-        if 0 <= x < MAP_WIDTH and 0 <= y < MAP_HEIGHT:
-            return self.game_map[y][x] not in impassable_tiles
-        return False
+        return self.world.is_tile_passable(x, y)
+
+    def camp_tooltip(self):
+        """悬停在已探索的怪物营地上时返回 (内容键, 文字行)，否则返回 None
+
+        胜率和损失由 combat.estimate 蒙特卡洛估计，按军队、技能和营地缓存，
+        同一营地反复悬停不会重新模拟。
+        """
+        tile = self.hovered_tile
+        if not tile or not self.fog.is_explored(*tile):
+            return None
+        camp = self.world.monster_camps.get(tile)
+        if camp is None:
+            return None
+        hero = self.hero
+        result = estimate(hero.army, hero.primary_skills, camp)
+        key = (tile, camp['creature'], camp['count'], tuple(sorted(hero.army.items())),
+               hero.primary_skills['attack'], hero.primary_skills['defense'])
+        losses = ", ".join(f"{name} {lost:.1f}" for name, lost in result.hero_losses.items()) or "无"
+        lines = [
+            f"{camp['creature']} x{camp['count']}",
+            f"胜率 {result.win_rate:.0%}  约 {result.rounds:.1f} 回合",
+            f"预计损失: {losses}",
+        ]
+        return key, lines
+
+    def _render_tooltip(self, lines):
+        line_height = self.small_font.get_linesize()
+        rendered = [text_cache.render(self.small_font, line, COLORS['text']) for line in lines]
+        surface = pygame.Surface((max(text.get_width() for text in rendered) + 12, line_height * len(lines) + 8))
+        surface.fill((20, 20, 30))
+        pygame.draw.rect(surface, COLORS['monster_color'], surface.get_rect(), 1)
+        for i, text in enumerate(rendered):
+            surface.blit(text, (6, 4 + i * line_height))
+        return surface
+
+    def _tooltip_rect(self, surface):
+        """提示框放在悬停格子右侧，放不下时放到左侧"""
+        viewport = self.camera.viewport
+        tile_rect = self.camera.tile_rect(*self.hovered_tile)
+        rect = surface.get_rect(topleft=(tile_rect.right + 4, tile_rect.top))
+        if rect.right > viewport.right:
+            rect.right = tile_rect.left - 4
+        return rect.clamp(viewport)
+
+    def _on_tile_changed(self, x, y, old, new):
+        """地图格子变化（如宝箱被拾取变回草地）时只刷新这一格，空间索引由 World 更新"""
+        self.terrain_layer.invalidate(x, y)
+        self.minimap.invalidate(x, y)
+
+    def _on_block_loaded(self, x0, y0, w, h):
+        """流式读入的地图区块：丢弃覆盖它的地图层缓存，小地图重算这一块"""
+        self.terrain_layer.invalidate_region(x0, y0, x0 + w, y0 + h)
+        self.minimap.invalidate_rect(x0, y0, x0 + w, y0 + h)
+        self._minimap_markers_dirty = True
+
+    @staticmethod
+    def _on_chunk_read(key):
+        """后台线程读完一个区块（在后台线程调用）"""
+        pygame.event.post(pygame.event.Event(CHUNK_LOADED, chunk=key))
+
+    def stream_map(self):
+        """请求英雄和镜头中心附近的区块，已经预读好的区块作为指令在这一帧读入"""
+        x0, y0, x1, y1 = self.camera.visible_tiles()
+        self.map_stream.request([(self.hero.x, self.hero.y), ((x0 + x1) // 2, (y0 + y1) // 2)])
+        self.commands.extend(('chunk', cx, cy) for cx, cy in self.map_stream.poll())
+
+    def update_vision(self):
+        """英雄位置或侦察等级变化后更新迷雾（新探索到的格子由 _on_explored 刷新）"""
+        self.world.update_vision()
+
+    def _on_explored(self, newly_explored):
+        """只刷新新探索到的格子；键盘移动时视野在 World.apply 里就已更新"""
+        for x, y in newly_explored:
+            self.terrain_layer.invalidate(x, y)
+        self.minimap.invalidate_many(*zip(*newly_explored))
+        self._minimap_markers_dirty = True # 新探索区域里的怪物和电脑英雄要显示出来
+
+    def movement_text(self):
+        """天数和剩余移动力；悬停在本回合能走到的格子上时附上走过去之后剩下的移动力"""
+        text = f"第 {self.world.day} 天  移动力: {self.hero.movement_left}/{self.hero.max_movement()}"
+        if self.hovered_tile:
+            left = self.world.movement_range.remaining_at(*self.hovered_tile)
+            if left is not None and self.hovered_tile != (self.hero.x, self.hero.y):
+                text += f" -> {left}"
+        return text
+
+    def nearby_text(self):
+        """离英雄最近的城镇和怪物营地（按英雄位置缓存）"""
+        hero_pos = (self.hero.x, self.hero.y)
+        if self._nearby_cache and self._nearby_cache[0] == hero_pos:
+            return self._nearby_cache[1]
+        parts = []
+        for kind in ('T', 'C'):
+            obj = self.world.known_sites.nearest(hero_pos[0], hero_pos[1], kind)
+            if obj:
+                distance = abs(obj.x - hero_pos[0]) + abs(obj.y - hero_pos[1])
+                parts.append(f"{terrain_names[kind]} ({obj.x}, {obj.y}) {distance}格")
+        text = "最近: " + ("; ".join(parts) if parts else "无")
+        self._nearby_cache = (hero_pos, text)
+        return text
+
+    def tile_ids(self, x0, y0, x1, y1):
+        """格子范围 [x0, x1) x [y0, y1) 的外观编号（TerrainLayer 画区块时调用），未探索的格子只画成背景色"""
+        tiles = self.world.tile_values().reshape(self.map_height, self.map_width)[y0:y1, x0:x1]
+        ids = self.tile_style_ids[tiles]
+        ids[(self.fog.state[y0:y1, x0:x1] & EXPLORED) == 0] = UNEXPLORED_STYLE
+        return ids
+
+    def zoom(self, step, anchor=None):
+        """切换到相邻的缩放级别（step 为 +1 放大、-1 缩小），anchor 下的地图位置保持不动"""
+        levels = self.atlas.tile_sizes
+        tile_size = levels[min(len(levels) - 1, max(0, levels.index(self.camera.tile_size) + step))]
+        if tile_size != self.camera.tile_size:
+            self.camera.set_tile_size(tile_size, anchor)
+            self.terrain_layer.set_tile_size(tile_size)
+
+    def update_movement_range(self):
+        """移动范围变化后（英雄移动、结束回合、格子变化），新旧范围中色阶变了的格子标记为脏
+
+        范围本身由 World.movement_range 增量维护，这里只在它变化时比较一次。
+        """
+        movement = self.world.movement_range
+        movement.update()
+        key = (movement.root, movement.points, movement.full_updates, movement.partial_updates)
+        if key == self._drawn_range_key:
+            return
+        self._drawn_range_key = key
+        min_cost = self.pathfinder.min_cost
+        reachable = {(x, y): 0 if left >= min_cost else 1 for x, y, left in movement.tiles()}
+        drawn = self._drawn_range
+        for pos in drawn.keys() | reachable.keys():
+            if drawn.get(pos) != reachable.get(pos):
+                self.terrain_layer.mark_dirty(*pos)
+        self._drawn_range = reachable
+
+    def draw_movement_range(self):
+        """在本帧恢复过的、已探索的可达格子上叠加半透明色块（一次 blits）"""
+        layer = self.terrain_layer
+        tile_size = self.camera.tile_size
+        overlays = self._range_overlays.get(tile_size)
+        if overlays is None:
+            overlays = []
+            for name in ('movement_range', 'movement_last'):
+                surface = pygame.Surface((tile_size, tile_size), pygame.SRCALPHA)
+                surface.fill(COLORS[name])
+                overlays.append(surface)
+            self._range_overlays[tile_size] = overlays
+        drawn = self._drawn_range
+        if layer.full_redraw:
+            tiles = drawn.items()
+        else:
+            tiles = [(pos, drawn[pos]) for pos in layer.dirty_tiles if pos in drawn]
+        self.screen.blits([(overlays[band], layer.screen_rect(*pos)) for pos, band in tiles
+                           if self.fog.is_explored(*pos)], doreturn=False)
 
     def draw_map(self):
-        self.screen.fill(COLORS['background'])
+        """绘制地图，返回本帧需要提交的屏幕矩形"""
+        self.update_vision()
+        layer = self.terrain_layer
+        full_redraw = layer.full_redraw
+        if full_redraw:
+            self.screen.fill(COLORS['background'])
+            self._drawn_ui_state = None
         
-        for y in range(MAP_HEIGHT):
-            for x in range(MAP_WIDTH):
-                rect = pygame.Rect(x * TILE_SIZE, y * TILE_SIZE, TILE_SIZE, TILE_SIZE)
-                
-                # 绘制地形
-                terrain = self.game_map[y][x]
-                color = COLORS.get(terrain_colors.get(terrain, 'grass'), COLORS['grass'])
-                pygame.draw.rect(self.screen, color, rect)
-                pygame.draw.rect(self.screen, GRID_COLOR, rect, 1) # 边框
-                
-                # 绘制地形符号
-                symbol = terrain_symbols.get(terrain, '')
-                if symbol:
-                    text_surface = self.small_font.render(symbol, True, (0, 0, 0))
-                    text_rect = text_surface.get_rect(center=rect.center)
-                    self.screen.blit(text_surface, text_rect)
+        # 英雄或悬停格子变化时，旧位置和新位置都要从缓存层恢复
+        hero_pos = (self.hero.x, self.hero.y)
+        if hero_pos != self._drawn_hero_pos:
+            layer.mark_dirty(*self._drawn_hero_pos)
+            layer.mark_dirty(*hero_pos)
+            self._drawn_hero_pos = hero_pos
+            self._minimap_markers_dirty = True
+            self.camera.ensure_visible(*hero_pos) # 镜头跟随英雄
+        if self.hovered_tile != self._drawn_hover:
+            if self._drawn_hover:
+                layer.mark_dirty(*self._drawn_hover)
+            if self.hovered_tile:
+                layer.mark_dirty(*self.hovered_tile)
+            self._drawn_hover = self.hovered_tile
         
-        # 高亮悬停的格子
-        if self.hovered_tile:
+        self.update_movement_range()
+        
+        # 营地提示框内容变化或消失时，恢复原来盖住的格子
+        tooltip = self.camp_tooltip()
+        tooltip_key = tooltip[0] if tooltip else None
+        drawn_key, drawn_rect = self._drawn_tooltip or (None, None)
+        tooltip_changed = tooltip_key != drawn_key
+        if tooltip_changed:
+            if drawn_rect:
+                layer.mark_rect_dirty(drawn_rect)
+            self._tooltip_surface = self._render_tooltip(tooltip[1]) if tooltip else None
+            self._drawn_tooltip = None
+        
+        dirty_rects = layer.restore(self.screen)
+        if full_redraw:
+            dirty_rects = [self.screen.get_rect()]
+        
+        # 本回合的移动范围，再高亮悬停的格子
+        self.screen.set_clip(self.camera.viewport)
+        self.draw_movement_range()
+        if self.hovered_tile and layer.is_dirty(*self.hovered_tile):
             hx, hy = self.hovered_tile
-            hover_rect = pygame.Rect(hx * TILE_SIZE, hy * TILE_SIZE, TILE_SIZE, TILE_SIZE)
+            hover_rect = layer.screen_rect(hx, hy)
             
-            # 根据地形决定高亮颜色
-            if self.is_tile_passable(hx, hy):
+            # 根据地形和本回合能否走到决定高亮颜色
+            if not self.is_tile_passable(hx, hy):
+                highlight_color = COLORS['highlight_impassable']
+            elif (hx, hy) in self._drawn_range:
                 highlight_color = COLORS['highlight_passable']
             else:
-                highlight_color = COLORS['highlight_impassable']
+                highlight_color = COLORS['highlight_hover']
                 
-            s = pygame.Surface((TILE_SIZE, TILE_SIZE), pygame.SRCALPHA)  # 创建半透明表面
+            s = pygame.Surface(hover_rect.size, pygame.SRCALPHA)  # 创建半透明表面
             s.fill(highlight_color)
             self.screen.blit(s, hover_rect)
 
-        # 绘制怪物营地
-        for (mx, my), data in monster_camps.items():
-            monster_rect = pygame.Rect(mx * TILE_SIZE, my * TILE_SIZE, TILE_SIZE, TILE_SIZE)
-            pygame.draw.rect(self.screen, COLORS['monster_color'], monster_rect)
-            # 绘制怪物符号
-            symbol = '!'
-            text_surface = self.small_font.render(symbol, True, (255, 255, 255))
-            text_rect = text_surface.get_rect(center=monster_rect.center)
-            self.screen.blit(text_surface, text_rect)
-
-        # 绘制资源点
-        for y in range(MAP_HEIGHT):
-            for x in range(MAP_WIDTH):
-                if self.game_map[y][x] == 'R':
-                    resource_rect = pygame.Rect(x * TILE_SIZE, y * TILE_SIZE, TILE_SIZE, TILE_SIZE)
-                    pygame.draw.rect(self.screen, COLORS['resource_color'], resource_rect)
-                    # 绘制资源符号
-                    symbol = '$'
-                    text_surface = self.small_font.render(symbol, True, (0, 0, 0))
-                    text_rect = text_surface.get_rect(center=resource_rect.center)
-                    self.screen.blit(text_surface, text_rect)
+        self.draw_entities()
 
         # 绘制英雄
-        hero_rect = pygame.Rect(self.hero.x * TILE_SIZE, self.hero.y * TILE_SIZE, TILE_SIZE, TILE_SIZE)
-        pygame.draw.rect(self.screen, COLORS['hero_color'], hero_rect) # 金色代表英雄
-        hero_symbol = '@'
-        text_surface = self.small_font.render(hero_symbol, True, (0, 0, 0))
-        text_rect = text_surface.get_rect(center=hero_rect.center)
-        self.screen.blit(text_surface, text_rect)
+        if layer.is_dirty(*hero_pos):
+            self.atlas.blit_tile(self.screen, self.camera.tile_size, HERO_STYLE, layer.screen_rect(*hero_pos))
+
+        # 提示框盖在最上面；下面的格子被恢复过时整个重画
+        if self._tooltip_surface is not None:
+            rect = self._tooltip_rect(self._tooltip_surface)
+            if tooltip_changed or layer.full_redraw or rect.collidelist(dirty_rects) != -1:
+                dirty_rects.append(self.screen.blit(self._tooltip_surface, rect))
+            self._drawn_tooltip = (tooltip_key, rect)
+        self.screen.set_clip(None)
+        
+        layer.clear_dirty()
+        return dirty_rects
+
+    def update_minimap_markers(self):
+        """AI 实体走过、英雄移动或探索到新区域后，重新设置小地图上的标记（英雄画在最上面）"""
+        xs, ys, colors = entity_markers(self.world.entities, OWNER_COLORS, WANDERING_MONSTER_COLOR)
+        self.minimap.set_markers(np.append(xs, self.hero.x), np.append(ys, self.hero.y),
+                                 np.vstack([colors, [COLORS['hero_color']]]))
+        self._minimap_markers_dirty = False
 
     def draw_ui(self):
+        """绘制侧边栏，内容没变时只更新小地图，返回需要提交的屏幕矩形"""
+        if self._minimap_markers_dirty:
+            self.update_minimap_markers()
+        view = self.camera.visible_tiles()
+        stats = self.hero.get_stats_text() + [self.movement_text(), self.nearby_text()]
+        log_entries = [event.text for event in self.hero.log.tail(6)]
+        ui_state = (stats, log_entries)
+        if ui_state == self._drawn_ui_state:
+            return self.minimap.draw(self.screen, view)
+        self._drawn_ui_state = ui_state
+
         # 绘制侧边栏
         sidebar_rect = pygame.Rect(SCREEN_WIDTH - 250, 0, 250, SCREEN_HEIGHT)
         pygame.draw.rect(self.screen, (30, 30, 50), sidebar_rect)
         pygame.draw.line(self.screen, GRID_COLOR, (SCREEN_WIDTH - 250, 0), (SCREEN_WIDTH - 250, SCREEN_HEIGHT), 2)
 
+        # 小地图在侧边栏顶部，侧边栏背景盖住了它，整个重画
+        self.minimap.draw(self.screen, view, force=True)
+
         # 绘制英雄状态
-        stats = self.hero.get_stats_text()
         for i, stat in enumerate(stats):
-            text_surface = self.small_font.render(stat, True, COLORS['text'])
-            self.screen.blit(text_surface, (SCREEN_WIDTH - 240, 20 + i * 22))
+            text_surface = text_cache.render(self.small_font, stat, COLORS['text'])
+            self.screen.blit(text_surface, (SCREEN_WIDTH - 240, 170 + i * 20))
 
         # 绘制日志
-        log_title = self.font.render("事件日志:", True, COLORS['text'])
-        self.screen.blit(log_title, (SCREEN_WIDTH - 240, 300))
-        for i, log_entry in enumerate(self.hero.log[-10:]): # 显示最近10条
-            text_surface = self.small_font.render(log_entry, True, COLORS['text'])
-            self.screen.blit(text_surface, (SCREEN_WIDTH - 240, 330 + i * 20))
+        log_title = text_cache.render(self.font, "事件日志:", COLORS['text'])
+        self.screen.blit(log_title, (SCREEN_WIDTH - 240, 435))
+        for i, log_entry in enumerate(log_entries): # 显示最近6条
+            text_surface = text_cache.render(self.small_font, log_entry, COLORS['text'])
+            self.screen.blit(text_surface, (SCREEN_WIDTH - 240, 460 + i * 20))
 
         # 绘制操作提示
         hint_text = [
             "操作:",
-            "WASD: 移动",
-            "鼠标: 点击移动",
-            "ESC: 退出"
+            "WASD: 移动  E: 结束回合",
+            "鼠标: 点击移动，点击小地图跳转",
+            "F3: 性能统计  F4: 导出  F5: 存档",
+            "滚轮 +/-: 缩放  ESC: 退出"
         ]
         for i, hint in enumerate(hint_text):
-            text_surface = self.small_font.render(hint, True, COLORS['text'])
-            self.screen.blit(text_surface, (SCREEN_WIDTH - 240, SCREEN_HEIGHT - 120 + i * 25))
+            text_surface = text_cache.render(self.small_font, hint, COLORS['text'])
+            self.screen.blit(text_surface, (SCREEN_WIDTH - 240, SCREEN_HEIGHT - 105 + i * 20))
+        
+        # 分隔线有一半画在侧边栏左边，一并提交
+        return [pygame.Rect(SCREEN_WIDTH - 252, 0, 252, SCREEN_HEIGHT)]
+
+    def export_profile(self, path='profile.json', trace_path='profile_trace.json'):
+        """导出性能统计（JSON）和逐帧阶段耗时（Chrome trace）"""
+        self.profiler.export_json(path)
+        self.profiler.export_chrome_trace(trace_path)
+        self.hero.log.add('system', f"性能数据已导出到 {path}, {trace_path}")
+
+    def save_game(self, full=True):
+        """F5 写完整存档；自动存档只写增量（回放时不存档）"""
+        if self.saves is None:
+            return
+        kind = self.saves.save_full() if full else self.saves.autosave()
+        self._autosave_elapsed = 0
+        self.hero.log.add('system', f"{'已存档' if kind == 'full' else '已自动存档'}: {self.saves.path}", save=kind)
 
     def run(self):
         running = True
+        report_startup = True # 第一次画出地图后打印启动报告
+        profiler = self.profiler
+        scheduler = self.scheduler
+        scheduler.start()
         while running:
-            for event in pygame.event.get():
+            profiler.begin_frame()
+            # 没有动画时阻塞到有输入或下一次定时更新，dt 为距上一次循环的毫秒数
+            events, dt = scheduler.wait(self.is_animating(), self.until_next_update(), self.frame_rate())
+            profiler.mark('tick')
+            for event in events:
+                if self.camera.handle_event(event):
+                    continue
                 if event.type == pygame.QUIT:
                     running = False
                 if event.type == pygame.KEYDOWN:
-                    if event.key == pygame.K_w:
-                        self.hero.move_by_direction(0, -1, self.game_map)
-                    elif event.key == pygame.K_s:
-                        self.hero.move_by_direction(0, 1, self.game_map)
-                    elif event.key == pygame.K_a:
-                        self.hero.move_by_direction(-1, 0, self.game_map)
-                    elif event.key == pygame.K_d:
-                        self.hero.move_by_direction(1, 0, self.game_map)
+                    if event.key in MOVE_KEYS:
+                        if self.replay is None:
+                            self.commands.append(('move', *MOVE_KEYS[event.key]))
+                    elif event.key == pygame.K_F3:
+                        if not profiler.toggle():
+                            self.terrain_layer.full_redraw = True # 重画被叠加层盖住的地图
+                    elif event.key == pygame.K_F4:
+                        self.export_profile()
+                    elif event.key == pygame.K_F5:
+                        self.save_game()
+                    elif event.key == pygame.K_e:
+                        if self.replay is None:
+                            self.commands.append(('end_turn',))
+                    elif event.key in (pygame.K_EQUALS, pygame.K_PLUS, pygame.K_KP_PLUS):
+                        self.zoom(1)
+                    elif event.key in (pygame.K_MINUS, pygame.K_KP_MINUS):
+                        self.zoom(-1)
                     elif event.key == pygame.K_ESCAPE:
                         running = False
                 if event.type == pygame.MOUSEBUTTONDOWN:
                     if event.button == 1:  # 左键点击
                         self.handle_mouse_click(event.pos)
+                if event.type == pygame.MOUSEWHEEL:
+                    self.zoom(1 if event.y > 0 else -1, pygame.mouse.get_pos())
                 if event.type == pygame.MOUSEMOTION:
+                    if event.buttons[0]:
+                        self.handle_minimap_click(event.pos)
                     self.update_hovered_tile(event.pos)
 
-            self.draw_map()
-            self.draw_ui()
-            pygame.display.flip()
-            self.clock.tick(60)
-
+            profiler.mark('events')
+            if self.map_stream is not None:
+                self.stream_map()
+            if self.step(dt):
+                scheduler.request_redraw()
+            self.camera.update(scheduler.animation_dt(dt))
+            self._autosave_elapsed += dt
+            if self._autosave_elapsed >= AUTOSAVE_MS:
+                self.save_game(full=False)
+                scheduler.request_redraw()
+            if self.camera.moved:
+                # 镜头滚动后鼠标下的格子变了
+                self.update_hovered_tile(pygame.mouse.get_pos())
+                scheduler.request_redraw()
+            profiler.mark('update')
+            
+            if scheduler.should_render():
+                dirty_rects = self.draw_map()
+                profiler.mark('draw_map')
+                dirty_rects += self.draw_ui()
+                profiler.mark('draw_ui')
+                if profiler.enabled:
+                    dirty_rects.append(self.profiler_overlay.draw(self.screen))
+                pygame.display.update(dirty_rects)
+                if report_startup:
+                    report_startup = False
+                    self.startup.mark('first_map_frame')
+                    print(self.startup.report())
+                profiler.mark('display')
+            profiler.end_frame()
+
+        if self.map_stream is not None:
+            self.map_stream.close()
+        if self.recorder is not None:
+            self.recorder.close(self.world)
+        if self.event_sink is not None:
+            self.event_sink.close()
         pygame.quit()
         sys.exit()
 
 # --- 地图元素映射 ---
-impassable_tiles = {'W'} # 不可通行的地形
 terrain_colors = {
     'G': 'grass', 'F': 'forest', 'M': 'mountain', 
     'W': 'water', 'D': 'desert', 'S': 'snow', 
@@ -414,21 +668,50 @@ terrain_symbols = {
     'B': '%', 'T': 'T', 'X': 'X', 'R': '$', 'C': '!', 'L': 'L', 'A': 'A',
     'P': 'P', 'I': 'I'
 }
-terrain_names = {
-    'G': '草地', 'F': '森林', 'M': '山脉', 'W': '水域',
-    'D': '沙漠', 'S': '雪地', 'B': '沼泽', 'T': '城镇',
-    'X': '宝箱', 'R': '资源点', 'C': '怪物营地', 'L': '图书馆',
-    'A': '竞技场', 'P': '港口', 'I': '遗迹'
+# 地图格子的外观编号：0 为未探索，1 为英雄，其余由 tile_styles 按地图字节值分配
+UNEXPLORED_STYLE = 0
+HERO_STYLE = 1
+# 怪物营地和资源点整格用醒目的颜色、不画网格线，其余格子是地形颜色、网格线和黑色地形符号
+site_styles = {
+    'C': TileStyle(COLORS['monster_color'], None, '!', (255, 255, 255)),
+    'R': TileStyle(COLORS['resource_color'], None, '$', (0, 0, 0)),
 }
 
-# 怪物营地数据
-monster_camps = {
-    (4, 5): {'creature': '哥布林', 'count': 15, 'reward_gold': 300},
-    (5, 15): {'creature': '独眼巨人', 'count': 5, 'reward_gold': 800, 'artifact_drop': True},
-    (10, 1): {'creature': '金人', 'count': 1, 'reward_gold': 2000, 'artifact_drop': True},
-}
+def tile_styles():
+    """格子图集的外观列表（atlas.TileStyle）和查找表：外观编号 = 查找表[地图字节值]"""
+    styles = [TileStyle(COLORS['background'], None, '', None),  # UNEXPLORED_STYLE
+              TileStyle(COLORS['hero_color'], None, '@', (0, 0, 0))]  # HERO_STYLE，金色代表英雄
+    style_ids = np.full(256, len(styles), dtype=np.intp) # 其他字节值（如未读入的区块）画成草地
+    styles.append(TileStyle(COLORS['grass'], GRID_COLOR, '', None))
+    for char in sorted(set(terrain_colors) | set(terrain_symbols)):
+        style_ids[ord(char)] = len(styles)
+        styles.append(site_styles.get(char) or TileStyle(
+            COLORS.get(terrain_colors.get(char, 'grass'), COLORS['grass']), GRID_COLOR,
+            terrain_symbols.get(char, ''), (0, 0, 0)))
+    return styles, style_ids
+
+# 小地图上城镇和怪物营地用醒目的颜色，其余按地形着色
+minimap_site_colors = {'T': 'building_color', 'C': 'monster_color'}
+
+def minimap_palette():
+    """小地图调色板：地图字节值（字符的 ASCII 码）-> RGB"""
+    palette = np.zeros((256, 3), dtype=np.uint8)
+    palette[:] = COLORS['grass']
+    for char, name in terrain_colors.items():
+        palette[ord(char)] = COLORS.get(minimap_site_colors.get(char, name), COLORS['grass'])
+    return palette
 
 if __name__ == "__main__":
-    game = Game()
+    # 可选参数: 地图宽 高 种子，例如 python heroplay.py 200 200 42（不给种子时使用手工地图）
+    # 第 4、5 个参数为电脑英雄和游荡怪物的数量，例如 python heroplay.py 1024 1024 42 2500 7500
+    # 或者存档文件，例如 python heroplay.py savegame.hsav；或者地图文件，例如 python heroplay.py big.hmap
+    # 每局的输入都录到 RECORDING_PATH，可以用 replay.py 回放
+    if len(sys.argv) > 1 and sys.argv[1].endswith('.hsav'):
+        game = Game(save_path=sys.argv[1], event_path=EVENT_LOG_PATH, record_path=RECORDING_PATH)
+    elif len(sys.argv) > 1 and sys.argv[1].endswith('.hmap'):
+        game = Game(map_path=sys.argv[1], event_path=EVENT_LOG_PATH, record_path=RECORDING_PATH)
+    else:
+        args = [int(arg) for arg in sys.argv[1:6]]
+        game = Game(*args[:3], event_path=EVENT_LOG_PATH, ai_heroes=args[3] if len(args) > 3 else 0,
+                    monsters=args[4] if len(args) > 4 else 0, record_path=RECORDING_PATH)
     game.run()
-
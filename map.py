@@ -1,25 +1,39 @@
+import time
+_import_start = time.perf_counter()
 import pygame
 import sys
 import random
-from enum import Enum
+import numpy as np
+from atlas import TileAtlas, TileStyle
+from camera import Camera
+from entities import EntityStore, PLAYER, MONSTER
+from mapgen import NoiseMapGenerator
+from minimap import Minimap, entity_markers
+from placement import ObjectPlacer
+from profiler import FrameProfiler, ProfilerOverlay
+from spatial import SpatialIndex
+from scheduler import FixedTimestep, FrameScheduler
+from startup import StartupTimer, init_display, sysfont, draw_loading, run_with_loading_screen
+from terrain_layer import TerrainLayer
+from tilegrid import TerrainType, ObjectType, TileGrid, TERRAIN_BY_VALUE, OBJECT_BY_VALUE
+IMPORT_MS = (time.perf_counter() - _import_start) * 1000 # 导入本模块及依赖（pygame、numpy 等）的耗时
 
-class TerrainType(Enum):
-    GRASS = 0
-    WATER = 1
-    MOUNTAIN = 2
-    FOREST = 3
-    DESERT = 4
-    SWAMP = 5
+# 窗口尺寸上限，更大的地图通过镜头滚动查看
+MAX_SCREEN_WIDTH = 1024
+MAX_SCREEN_HEIGHT = 768
+AI_TICK_MS = 150  # 电脑英雄和游荡怪物每隔多久走一步
+MINIMAP_SIZE = 200  # 地图放不下整个窗口时，右下角小地图的最大边长
+ZOOM_LEVELS = (8, 16, 32)  # 可选的格子尺寸（像素），滚轮或 +/- 键切换，每种尺寸预先画好一份图集
 
-class ObjectType(Enum):
-    EMPTY = 0
-    HERO = 1
-    TOWN = 2
-    RESOURCE = 3
-    MONSTER = 4
-    ARTIFACT = 5
+# AI 实体的移动消耗，按 TerrainType 的值索引，0 表示不能进入
+ENTITY_COSTS = np.zeros(256, dtype=np.int32)
+ENTITY_COSTS[[t.value for t in (TerrainType.GRASS, TerrainType.FOREST, TerrainType.DESERT, TerrainType.SWAMP)]] = (100, 150, 150, 175)
+# 电脑英雄按所属玩家着色，游荡怪物统一用暗红色
+OWNER_COLORS = [(0, 100, 255), (220, 60, 60), (60, 200, 200), (200, 80, 200), (240, 140, 0)]
+WANDERING_MONSTER_COLOR = (120, 0, 0)
 
 class Tile:
+    """旧的逐格对象表示，地图本身已改用 TileGrid，这里保留用于对比和兼容"""
     def __init__(self, terrain_type, object_type=ObjectType.EMPTY):
         self.terrain_type = terrain_type
         self.object_type = object_type
@@ -33,107 +47,145 @@ class Hero:
         self.color = (0, 100, 255)  # 蓝色代表玩家
 
 class MapRenderer:
-    def __init__(self, width=48, height=48):
+    def __init__(self, width=48, height=48, seed=None, headless=False, ai_heroes=0, monsters=0):
+        self.startup = StartupTimer(IMPORT_MS)
         self.width = width
         self.height = height
-        self.tiles = [[None for _ in range(width)] for _ in range(height)]
+        # 地图种子，相同种子生成相同地形；不指定时随机选一个并打印出来以便复现
+        self.seed = seed if seed is not None else random.randrange(2 ** 32)
+        print(f"地图种子: {self.seed}")
+        
+        # headless=True 时不打开窗口，只保留地图逻辑（批量测试用）；否则先打开窗口
+        # 画出加载画面，再在后台生成地图，窗口在生成期间保持响应
+        self.camera = None
+        self.tile_size = 16
+        if headless:
+            self.build_world(ai_heroes, monsters)
+            self.startup.mark('generate')
+            return
+        self.open_window()
+        self.startup.mark('init')
+        draw_loading(self.screen, self.loading_font, "正在生成地图...")
+        self.startup.mark('first_frame')
+        run_with_loading_screen(self.screen, self.loading_font, lambda: self.build_world(ai_heroes, monsters),
+                                "正在生成地图...")
+        self.startup.mark('generate')
+        self.init_view()
+
+    def build_world(self, ai_heroes=0, monsters=0):
+        """生成地形、放置对象和英雄（不调用 pygame，可以在后台线程运行）"""
+        width, height = self.width, self.height
+        self.tiles = TileGrid(width, height)
         self.heroes = []
         self.towns = []
         self.resources = []
         self.monsters = []
         self.artifacts = []
+        self.objects = SpatialIndex() # 所有地图对象的空间索引，按格子/范围/最近邻查询
         
         # 初始化地图
         self.generate_map()
         self.place_objects()
         
-        # 创建一个英雄
-        self.player_hero = Hero(10, 10)
+        # 创建一个英雄（放在离 (10, 10) 最近的可通行格子上）
+        self.player_hero = Hero(*self.nearest_walkable(10, 10))
         self.heroes.append(self.player_hero)
         
-        # Pygame初始化
-        pygame.init()
-        self.tile_size = 16
-        self.screen_width = self.width * self.tile_size
-        self.screen_height = self.height * self.tile_size
+        # 电脑英雄和游荡怪物存放在结构数组里，玩家英雄也登记在其中
+        self.entities = EntityStore(width, height, self.tiles.terrain.ravel, ENTITY_COSTS, seed=self.seed)
+        self.entities.attach(self.player_hero)
+        self.entities.populate(ai_heroes, monsters)
+        self.ai_timestep = FixedTimestep(AI_TICK_MS, max_steps=1) # 卡顿后只走一步，不补走
+
+    def init_display(self):
+        """初始化 pygame 窗口、字体、镜头和地图缓存层（headless 创建后再显示时调用）"""
+        self.open_window()
+        self.init_view()
+
+    def open_window(self):
+        """打开窗口，加载字体；只初始化显示和字体模块"""
+        init_display()
+        self.screen_width = min(self.width * self.tile_size, MAX_SCREEN_WIDTH)
+        self.screen_height = min(self.height * self.tile_size, MAX_SCREEN_HEIGHT)
         self.screen = pygame.display.set_mode((self.screen_width, self.screen_height))
         pygame.display.set_caption("英雄无敌3风格大地图")
-        self.clock = pygame.time.Clock()
+        self.scheduler = FrameScheduler() # 空闲时阻塞等待输入，只在有变化时重画
         
-        # 字体初始化
-        pygame.font.init()
-        self.font = pygame.font.SysFont('Arial', 10)
+        self.loading_font = pygame.font.Font(None, 24)
+        
+        # 性能分析：F3 开关统计叠加层，F4 导出 JSON 和 Chrome trace
+        self.profiler = FrameProfiler(('events', 'draw_map', 'display', 'tick', 'update'))
+        self.profiler_overlay = ProfilerOverlay(self.profiler, pygame.font.Font(None, 18))
+
+    def init_view(self):
+        """镜头和地图缓存层，需要地图已经生成"""
+        # 镜头：方向键移动英雄，WASD/右键拖拽/鼠标贴边滚动地图
+        self.camera = Camera(
+            (0, 0, self.screen_width, self.screen_height), self.width, self.height, self.tile_size,
+            scroll_keys={
+                pygame.K_w: (0, -1), pygame.K_s: (0, 1),
+                pygame.K_a: (-1, 0), pygame.K_d: (1, 0)
+            }
+        )
+        self.camera.center_on(self.player_hero.x, self.player_hero.y)
+        
+        # 格子图集：每种地形和对象组合在每个缩放级别下各画一次，地图按外观编号批量 blits
+        self.atlas, self.tile_style_ids = self.build_atlas()
+        # 静态地图层：地形和对象按区块只画一次，之后按格子增量刷新
+        self.terrain_layer = TerrainLayer(self.width, self.height, self.tile_size, self.atlas, self.tile_ids,
+                                          self.camera)
+        self.tiles.add_listener(self.terrain_layer.invalidate)
+        self._drawn_hero_pos = (self.player_hero.x, self.player_hero.y)
+        
+        # 小地图（地图比窗口大时显示在右下角，M 键开关）：地形数组按调色板写进 Surface
+        palette = np.zeros((256, 3), dtype=np.uint8)
+        for terrain in TerrainType:
+            palette[terrain.value] = self.get_terrain_color(terrain)
+        self.minimap = Minimap((self.screen_width - MINIMAP_SIZE - 10, self.screen_height - MINIMAP_SIZE - 10,
+                                MINIMAP_SIZE, MINIMAP_SIZE), self.width, self.height, palette,
+                               lambda: self.tiles.terrain, lambda: self.tiles.explored)
+        self.tiles.add_listener(self.minimap.invalidate)
+        self.show_minimap = self.width * self.tile_size > self.screen_width or self.height * self.tile_size > self.screen_height
+        self._minimap_markers_dirty = True
 
     def generate_map(self):
-        """生成地形"""
-        for y in range(self.height):
-            for x in range(self.width):
-                # 基础地形
-                rand_val = random.random()
-                
-                if rand_val < 0.4:
-                    terrain = TerrainType.GRASS
-                elif rand_val < 0.55:
-                    terrain = TerrainType.FOREST
-                elif rand_val < 0.7:
-                    terrain = TerrainType.MOUNTAIN
-                elif rand_val < 0.9:
-                    terrain = TerrainType.WATER
-                else:
-                    terrain = TerrainType.DESERT
-                
-                self.tiles[y][x] = Tile(terrain)
+        """生成地形：按种子生成的海拔/湿度噪声映射为地形类型（见 mapgen）"""
+        generator = NoiseMapGenerator(self.seed)
+        self.tiles.terrain[:] = generator.terrain(0, 0, self.width, self.height)
+
+    def nearest_walkable(self, x, y):
+        """按距离由近到远找一个英雄可以站立的格子"""
+        blocked = (TerrainType.WATER.value, TerrainType.MOUNTAIN.value)
+        for radius in range(max(self.width, self.height)):
+            for ny in range(max(0, y - radius), min(self.height, y + radius + 1)):
+                for nx in range(max(0, x - radius), min(self.width, x + radius + 1)):
+                    if max(abs(nx - x), abs(ny - y)) == radius and self.tiles.terrain[ny, nx] not in blocked:
+                        return nx, ny
+        return x, y
 
     def place_objects(self):
         """放置地图对象"""
-        # 放置城镇
-        for i in range(8):
-            placed = False
-            while not placed:
-                x = random.randint(2, self.width-3)
-                y = random.randint(2, self.height-3)
-                
-                # 确保城镇不在水里或山上
-                if self.tiles[y][x].terrain_type not in [TerrainType.WATER, TerrainType.MOUNTAIN]:
-                    self.tiles[y][x].object_type = ObjectType.TOWN
-                    self.towns.append((x, y, f"城镇{i+1}"))
-                    placed = True
+        placer = ObjectPlacer(self.width, self.height, np.random.default_rng(self.seed))
+        anywhere = np.ones((self.height, self.width), dtype=bool)
         
-        # 放置资源
-        for i in range(15):
-            placed = False
-            while not placed:
-                x = random.randint(1, self.width-2)
-                y = random.randint(1, self.height-2)
-                
-                if self.tiles[y][x].object_type == ObjectType.EMPTY:
-                    self.tiles[y][x].object_type = ObjectType.RESOURCE
-                    self.resources.append((x, y, f"资源{i+1}"))
-                    placed = True
+        # 放置城镇：确保城镇不在水里或山上，彼此至少相隔 6 格；陆地很少时能放几个算几个
+        land = ~np.isin(self.tiles.terrain, (TerrainType.WATER.value, TerrainType.MOUNTAIN.value))
+        for i, (x, y) in enumerate(placer.place(8, land, margin=2, min_spacing=6, label="城镇", partial=True)):
+            self.tiles[y][x].object_type = ObjectType.TOWN
+            self.towns.append((x, y, f"城镇{i+1}"))
+            self.objects.add(x, y, ObjectType.TOWN, f"城镇{i+1}")
         
-        # 放置怪物
-        for i in range(20):
-            placed = False
-            while not placed:
-                x = random.randint(1, self.width-2)
-                y = random.randint(1, self.height-2)
-                
-                if self.tiles[y][x].object_type == ObjectType.EMPTY:
-                    self.tiles[y][x].object_type = ObjectType.MONSTER
-                    self.monsters.append((x, y, f"怪物{i+1}"))
-                    placed = True
-        
-        # 放置宝物
-        for i in range(10):
-            placed = False
-            while not placed:
-                x = random.randint(1, self.width-2)
-                y = random.randint(1, self.height-2)
-                
-                if self.tiles[y][x].object_type == ObjectType.EMPTY:
-                    self.tiles[y][x].object_type = ObjectType.ARTIFACT
-                    self.artifacts.append((x, y, f"宝物{i+1}"))
-                    placed = True
+        # 放置资源、怪物和宝物：任意空格子
+        for count, object_type, objects, name in (
+            (15, ObjectType.RESOURCE, self.resources, "资源"),
+            (20, ObjectType.MONSTER, self.monsters, "怪物"),
+            (10, ObjectType.ARTIFACT, self.artifacts, "宝物")
+        ):
+            count = min(count, len(placer.candidates(anywhere, margin=1))) # 很小的地图放不下时减少数量
+            for i, (x, y) in enumerate(placer.place(count, anywhere, margin=1, label=name)):
+                self.tiles[y][x].object_type = object_type
+                objects.append((x, y, f"{name}{i+1}"))
+                self.objects.add(x, y, object_type, f"{name}{i+1}")
 
     def get_terrain_color(self, terrain_type):
         """获取地形颜色"""
@@ -158,56 +210,109 @@ class MapRenderer:
         }
         return symbols.get(object_type, '')
 
+    def build_atlas(self):
+        """格子图集和查找表：外观编号 = tile_style_ids[地形值, 对象值]，0 为未探索，最后一个为英雄
+
+        每种外观是地形颜色、黑色网格线和居中的白色对象符号。
+        """
+        styles = [TileStyle((0, 0, 0), None, '', None)]
+        style_ids = np.zeros((len(TERRAIN_BY_VALUE), len(OBJECT_BY_VALUE)), dtype=np.intp)
+        for terrain_value, terrain in enumerate(TERRAIN_BY_VALUE):
+            for object_value, object_type in enumerate(OBJECT_BY_VALUE):
+                style_ids[terrain_value, object_value] = len(styles)
+                styles.append(TileStyle(self.get_terrain_color(terrain), (0, 0, 0),
+                                        self.get_object_symbol(object_type), (255, 255, 255)))
+        self.hero_style = len(styles)
+        styles.append(TileStyle(self.player_hero.color, None, '@', (255, 255, 255)))
+        # 符号字体随格子缩放（16 像素的格子用 10 号字）；系统字体的路径缓存在磁盘上，不必每次启动都扫描
+        atlas = TileAtlas(styles, ZOOM_LEVELS, lambda tile_size: sysfont('Arial', max(6, 10 * tile_size // 16)))
+        return atlas, style_ids
+
+    def tile_ids(self, x0, y0, x1, y1):
+        """格子范围 [x0, x1) x [y0, y1) 的外观编号（TerrainLayer 画区块时调用）"""
+        tiles = self.tiles
+        ids = self.tile_style_ids[tiles.terrain[y0:y1, x0:x1], tiles.objects[y0:y1, x0:x1]]
+        ids[tiles.explored[y0:y1, x0:x1] == 0] = 0 # 未探索的格子画成黑色
+        return ids
+
+    def zoom(self, step, anchor=None):
+        """切换到相邻的缩放级别（step 为 +1 放大、-1 缩小），anchor 下的地图位置保持不动"""
+        levels = self.atlas.tile_sizes
+        index = min(len(levels) - 1, max(0, levels.index(self.tile_size) + step))
+        if levels[index] == self.tile_size:
+            return
+        self.tile_size = levels[index]
+        self.camera.set_tile_size(self.tile_size, anchor)
+        self.terrain_layer.set_tile_size(self.tile_size)
+
     def draw_map(self):
-        """绘制地图"""
-        for y in range(self.height):
-            for x in range(self.width):
-                tile = self.tiles[y][x]
-                
-                # 绘制地形
-                color = self.get_terrain_color(tile.terrain_type)
-                rect = pygame.Rect(x * self.tile_size, y * self.tile_size, 
-                                  self.tile_size, self.tile_size)
-                pygame.draw.rect(self.screen, color, rect)
-                
-                # 绘制网格线
-                pygame.draw.rect(self.screen, (0, 0, 0), rect, 1)
+        """绘制地图，返回本帧需要提交的屏幕矩形"""
+        # 英雄移动后，旧位置和新位置都要从缓存层恢复
+        hero_pos = (self.player_hero.x, self.player_hero.y)
+        if hero_pos != self._drawn_hero_pos:
+            self.terrain_layer.mark_dirty(*self._drawn_hero_pos)
+            self.terrain_layer.mark_dirty(*hero_pos)
+            self._drawn_hero_pos = hero_pos
+            self._minimap_markers_dirty = True
         
-        # 绘制地图对象
-        for y in range(self.height):
-            for x in range(self.width):
-                tile = self.tiles[y][x]
-                
-                if tile.object_type != ObjectType.EMPTY:
-                    symbol = self.get_object_symbol(tile.object_type)
-                    text_surface = self.font.render(symbol, True, (255, 255, 255))
-                    
-                    # 居中绘制符号
-                    text_rect = text_surface.get_rect()
-                    text_rect.center = (
-                        x * self.tile_size + self.tile_size // 2,
-                        y * self.tile_size + self.tile_size // 2
-                    )
-                    self.screen.blit(text_surface, text_rect)
+        dirty_rects = self.terrain_layer.restore(self.screen)
         
-        # 绘制英雄
-        hero_x, hero_y = self.player_hero.x, self.player_hero.y
-        hero_rect = pygame.Rect(
-            hero_x * self.tile_size, 
-            hero_y * self.tile_size, 
-            self.tile_size, 
-            self.tile_size
-        )
-        pygame.draw.rect(self.screen, self.player_hero.color, hero_rect)
+        # 绘制 AI 实体和英雄
+        self.screen.set_clip(self.camera.viewport)
+        self.draw_entities()
+        if self.terrain_layer.is_dirty(*hero_pos):
+            self.atlas.blit_tile(self.screen, self.tile_size, self.hero_style, self.terrain_layer.screen_rect(*hero_pos))
+        self.screen.set_clip(None)
         
-        # 在英雄上绘制特殊标记
-        hero_text = self.font.render('@', True, (255, 255, 255))
-        text_rect = hero_text.get_rect()
-        text_rect.center = (
-            hero_x * self.tile_size + self.tile_size // 2,
-            hero_y * self.tile_size + self.tile_size // 2
-        )
-        self.screen.blit(hero_text, text_rect)
+        # 小地图盖在地图上，下面的格子被恢复过时整个重画
+        if self.show_minimap:
+            if self._minimap_markers_dirty:
+                xs, ys, colors = entity_markers(self.entities, OWNER_COLORS, WANDERING_MONSTER_COLOR)
+                self.minimap.set_markers(np.append(xs, hero_pos[0]), np.append(ys, hero_pos[1]),
+                                         np.vstack([colors, [self.player_hero.color]]))
+                self._minimap_markers_dirty = False
+            covered = self.minimap.rect.inflate(2, 2).collidelist(dirty_rects) != -1
+            dirty_rects += self.minimap.draw(self.screen, self.camera.visible_tiles(), force=covered)
+        
+        self.terrain_layer.clear_dirty()
+        return dirty_rects
+
+    def draw_entities(self):
+        """画视口内的 AI 实体（只画本帧恢复过的格子）"""
+        entities = self.entities
+        layer = self.terrain_layer
+        radius = self.tile_size // 3
+        for i in entities.in_rect(*self.camera.visible_tiles()).tolist():
+            if entities.kind[i] == PLAYER:
+                continue
+            x, y = int(entities.x[i]), int(entities.y[i])
+            if not layer.is_dirty(x, y) or not self.tiles.explored[y, x]:
+                continue
+            if entities.kind[i] == MONSTER:
+                color = WANDERING_MONSTER_COLOR
+            else:
+                color = OWNER_COLORS[entities.owner[i] % len(OWNER_COLORS)]
+            pygame.draw.circle(self.screen, color, layer.screen_rect(x, y).center, radius)
+
+    def update_entities(self, dt):
+        """按固定间隔推进 AI 实体，移动过的实体新旧位置都标记为脏；返回是否有实体移动"""
+        if not self.ai_timestep.advance(dt):
+            return False
+        moved, old_x, old_y = self.entities.tick()
+        if not len(moved):
+            self.entities.new_day() # 这里没有回合，AI 实体都走不动时直接开始新的一天
+        if self.camera is not None:
+            self.terrain_layer.mark_dirty_many(old_x, old_y)
+            self.terrain_layer.mark_dirty_many(self.entities.x[moved], self.entities.y[moved])
+            if len(moved):
+                self._minimap_markers_dirty = True
+        return len(moved) > 0
+
+    def until_next_update(self):
+        """空闲时最多等多久（毫秒）：有 AI 实体时等到下一次 tick，否则返回 None"""
+        if len(self.entities) > 1: # 玩家英雄也登记在其中
+            return self.ai_timestep.until_next()
+        return None
 
     def move_hero(self, dx, dy):
         """移动英雄"""
@@ -219,19 +324,43 @@ class MapRenderer:
         if target_tile.terrain_type not in [TerrainType.WATER, TerrainType.MOUNTAIN]:
             self.player_hero.x = new_x
             self.player_hero.y = new_y
+            if self.camera is not None:
+                self.camera.ensure_visible(new_x, new_y)
         else:
             print(f"无法移动到 {target_tile.terrain_type.name} 地形")
 
     def run(self):
         """主循环"""
+        if self.camera is None:
+            self.init_display()
         running = True
+        report_startup = True # 第一次画出地图后打印启动报告
+        profiler = self.profiler
+        scheduler = self.scheduler
+        scheduler.start()
         while running:
-            for event in pygame.event.get():
+            profiler.begin_frame()
+            # 没有镜头滚动和叠加层时阻塞到有输入或下一次 AI tick
+            events, dt = scheduler.wait(self.camera.scrolling or profiler.enabled, self.until_next_update())
+            profiler.mark('tick')
+            for event in events:
+                if self.camera.handle_event(event):
+                    continue
                 if event.type == pygame.QUIT:
                     running = False
                 elif event.type == pygame.KEYDOWN:
                     if event.key == pygame.K_ESCAPE:
                         running = False
+                    elif event.key == pygame.K_F3:
+                        if not profiler.toggle():
+                            self.terrain_layer.full_redraw = True # 重画被叠加层盖住的地图
+                    elif event.key == pygame.K_F4:
+                        profiler.export_json('profile.json')
+                        profiler.export_chrome_trace('profile_trace.json')
+                        print("性能数据已导出到 profile.json, profile_trace.json")
+                    elif event.key == pygame.K_m:
+                        self.show_minimap = not self.show_minimap
+                        self.terrain_layer.full_redraw = True # 重画小地图盖住的部分
                     elif event.key == pygame.K_UP:
                         self.move_hero(0, -1)
                     elif event.key == pygame.K_DOWN:
@@ -240,21 +369,48 @@ class MapRenderer:
                         self.move_hero(-1, 0)
                     elif event.key == pygame.K_RIGHT:
                         self.move_hero(1, 0)
+                    elif event.key in (pygame.K_EQUALS, pygame.K_PLUS, pygame.K_KP_PLUS):
+                        self.zoom(1)
+                    elif event.key in (pygame.K_MINUS, pygame.K_KP_MINUS):
+                        self.zoom(-1)
+                elif event.type == pygame.MOUSEWHEEL:
+                    self.zoom(1 if event.y > 0 else -1, pygame.mouse.get_pos())
+                elif event.type in (pygame.MOUSEBUTTONDOWN, pygame.MOUSEMOTION) and self.show_minimap:
+                    # 左键点击或拖过小地图时镜头跳到对应位置
+                    pressed = event.button == 1 if event.type == pygame.MOUSEBUTTONDOWN else event.buttons[0]
+                    tile = self.minimap.tile_at(event.pos) if pressed else None
+                    if tile:
+                        self.camera.center_on(*tile)
             
-            # 清屏
-            self.screen.fill((0, 0, 0))
-            
-            # 绘制地图
-            self.draw_map()
+            profiler.mark('events')
+            if self.update_entities(dt):
+                scheduler.request_redraw()
+            self.camera.update(scheduler.animation_dt(dt))
+            if self.camera.moved:
+                scheduler.request_redraw()
+            profiler.mark('update')
             
-            # 更新显示
-            pygame.display.flip()
-            self.clock.tick(60)
+            # 有变化时才绘制地图，只提交变化的区域
+            if scheduler.should_render():
+                dirty_rects = self.draw_map()
+                profiler.mark('draw_map')
+                if profiler.enabled:
+                    dirty_rects.append(self.profiler_overlay.draw(self.screen))
+                pygame.display.update(dirty_rects)
+                if report_startup:
+                    report_startup = False
+                    self.startup.mark('first_map_frame')
+                    print(self.startup.report())
+                profiler.mark('display')
+            profiler.end_frame()
         
         pygame.quit()
         sys.exit()
 
 # 运行游戏
 if __name__ == "__main__":
-    game = MapRenderer()
+    # 可选参数: 地图宽 高 种子 电脑英雄数 游荡怪物数，例如 python map.py 1024 1024 42 2500 7500
+    args = [int(arg) for arg in sys.argv[1:6]]
+    game = MapRenderer(*args[:3], ai_heroes=args[3] if len(args) > 3 else 0,
+                       monsters=args[4] if len(args) > 4 else 0)
     game.run()
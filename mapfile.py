@@ -0,0 +1,273 @@
+"""分块地图文件（.hmap）：地形按固定大小的区块分别压缩，地点按区块分组存放，可以只读入一部分
+
+布局（小端）：
+    文件头 _HEADER   'HMAP' | 版本 | 区块边长 | 宽 | 高 | 元数据长度
+    元数据           UTF-8 JSON：地图名、英雄起点等
+    区块索引         每个区块一项 _ENTRY（按行优先）：数据偏移 | 地形压缩长度 | 地点压缩长度
+    区块数据         zlib(地形字节，区块内按行存放) + zlib(地点 JSON，没有地点时长度为 0)
+地形层只存地形，地点（城镇、宝箱、资源点、怪物营地、图书馆、竞技场、港口、遗迹）
+下面按草地存；地点列表每项为 [x, y, 字符, 数据]，营地的数据为兵种、数量和奖励。
+读入时把地点叠加到地形上，得到与 World 相同的字符地图和营地表。
+
+打开文件只读文件头、元数据和索引；load_world(stream=True) 只读入英雄起点附近的区块，
+其余由 ChunkStreamer 在后台线程按镜头和英雄的位置预读，再通过 World.load_chunk 写进地图。
+
+用法: python mapfile.py 输出.hmap [宽 高 种子]   把生成的地图（不给种子时为手工地图）转换成地图文件
+"""
+import os
+import sys
+import json
+import time
+import zlib
+import queue
+import struct
+import threading
+import numpy as np
+from chargrid import CharGrid
+from combat import creature_stats
+from engine import World, UNLOADED_TILE, event_tiles
+
+MAGIC = b'HMAP'
+VERSION = 1
+CHUNK_SIZE = 64      # 区块边长（格）
+STREAM_RADIUS = 64   # 流式加载时读入镜头和英雄周围多少格以内的区块
+SITE_TERRAIN = 'G'   # 地点下面的地形（地点被清除后格子变回草地）
+
+_HEADER = struct.Struct('<4sHHIII')
+_ENTRY = struct.Struct('<QII')
+_ENTRY_DTYPE = np.dtype([('offset', '<u8'), ('terrain', '<u4'), ('objects', '<u4')])
+
+class MapFileError(ValueError):
+    pass
+
+def split_sites(game_map, monster_camps):
+    """字符地图拆成地形层（uint8 数组，地点处为 SITE_TERRAIN）和地点列表 [(x, y, 字符, 数据), ...]"""
+    tiles = np.frombuffer(game_map.data, dtype=np.uint8).reshape(game_map.height, game_map.width).copy()
+    site_codes = np.frombuffer(''.join(sorted(event_tiles)).encode('ascii'), dtype=np.uint8)
+    mask = np.isin(tiles, site_codes)
+    objects = []
+    for y, x in np.argwhere(mask).tolist():
+        char = chr(tiles[y, x])
+        objects.append((x, y, char, monster_camps.get((x, y)) if char == 'C' else None))
+    tiles[mask] = ord(SITE_TERRAIN)
+    return tiles, objects
+
+def write_map(path, width, height, terrain, objects, meta=None, chunk_size=CHUNK_SIZE):
+    """写地图文件。terrain: 形状 (height, width) 的地形字节；objects: [(x, y, 字符, 数据), ...]"""
+    terrain = np.asarray(terrain, dtype=np.uint8).reshape(height, width)
+    columns = -(-width // chunk_size)
+    rows = -(-height // chunk_size)
+    grouped = {}
+    for x, y, char, data in objects:
+        grouped.setdefault((x // chunk_size, y // chunk_size), []).append([x, y, char, data])
+    meta_bytes = json.dumps(meta or {}, ensure_ascii=False).encode('utf-8')
+    offset = _HEADER.size + len(meta_bytes) + columns * rows * _ENTRY.size
+    entries = []
+    blobs = []
+    for cy in range(rows):
+        for cx in range(columns):
+            x0, y0 = cx * chunk_size, cy * chunk_size
+            block = zlib.compress(np.ascontiguousarray(terrain[y0:y0 + chunk_size, x0:x0 + chunk_size]).tobytes())
+            sites = grouped.get((cx, cy))
+            sites = zlib.compress(json.dumps(sites, ensure_ascii=False, separators=(',', ':')).encode('utf-8')) if sites else b''
+            entries.append(_ENTRY.pack(offset, len(block), len(sites)))
+            blobs += (block, sites)
+            offset += len(block) + len(sites)
+    tmp_path = path + '.tmp' # 先写临时文件再改名，写到一半崩溃也不会留下损坏的文件
+    with open(tmp_path, 'wb') as f:
+        f.write(_HEADER.pack(MAGIC, VERSION, chunk_size, width, height, len(meta_bytes)))
+        f.write(meta_bytes)
+        f.write(b''.join(entries))
+        for blob in blobs:
+            f.write(blob)
+    os.replace(tmp_path, path)
+
+def save_world_map(world, path, chunk_size=CHUNK_SIZE, name=None):
+    """转换器：把 World 当前的字符地图和营地写成地图文件，英雄所在位置作为起点"""
+    terrain, objects = split_sites(world.game_map, world.monster_camps)
+    meta = {'name': name or os.path.splitext(os.path.basename(path))[0], 'start': [world.hero.x, world.hero.y]}
+    write_map(path, world.map_width, world.map_height, terrain, objects, meta, chunk_size)
+
+class MapFile:
+    """打开的地图文件：构造时只读文件头、元数据和区块索引，区块在 read_chunk 时才读取和解压
+
+    read_chunk 可以在多个线程中调用（读文件时加锁，解压不加锁）。
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._file = open(path, 'rb')
+        self._lock = threading.Lock()
+        header = self._file.read(_HEADER.size)
+        if len(header) < _HEADER.size:
+            raise MapFileError(f"{path}: 文件太短")
+        magic, version, self.chunk_size, self.width, self.height, meta_size = _HEADER.unpack(header)
+        if magic != MAGIC:
+            raise MapFileError(f"{path}: 不是地图文件")
+        if version != VERSION:
+            raise MapFileError(f"{path}: 地图文件版本 {version}，只支持 {VERSION}")
+        self.meta = json.loads(self._file.read(meta_size).decode('utf-8'))
+        self.columns = -(-self.width // self.chunk_size)
+        self.rows = -(-self.height // self.chunk_size)
+        count = self.columns * self.rows
+        index = self._file.read(count * _ENTRY.size)
+        if len(index) != count * _ENTRY.size:
+            raise MapFileError(f"{path}: 文件不完整")
+        self.index = np.frombuffer(index, dtype=_ENTRY_DTYPE)
+
+    def chunk_rect(self, cx, cy):
+        """区块覆盖的格子范围 (x0, y0, 宽, 高)，地图边缘的区块可能不满"""
+        x0 = cx * self.chunk_size
+        y0 = cy * self.chunk_size
+        return x0, y0, min(self.chunk_size, self.width - x0), min(self.chunk_size, self.height - y0)
+
+    def read_chunk(self, cx, cy):
+        """读入一个区块，返回 (x0, y0, 叠加了地点的格子数组 (h, w), {(x, y): 营地数据})"""
+        x0, y0, w, h = self.chunk_rect(cx, cy)
+        offset, terrain_size, objects_size = self.index[cy * self.columns + cx].tolist()
+        with self._lock:
+            self._file.seek(offset)
+            data = self._file.read(terrain_size + objects_size)
+        if len(data) != terrain_size + objects_size:
+            raise MapFileError(f"{self.path}: 区块 ({cx}, {cy}) 不完整")
+        tiles = np.frombuffer(zlib.decompress(data[:terrain_size]), dtype=np.uint8).reshape(h, w).copy()
+        camps = {}
+        if objects_size:
+            for x, y, char, site in json.loads(zlib.decompress(data[terrain_size:])):
+                tiles[y - y0, x - x0] = ord(char)
+                if char == 'C':
+                    if site.get('creature') not in creature_stats:
+                        raise MapFileError(f"{self.path}: 营地 ({x}, {y}) 的兵种 {site.get('creature')!r} 未知，"
+                                           f"可用的兵种: {', '.join(creature_stats)}")
+                    camps[(x, y)] = site
+        return x0, y0, tiles, camps
+
+    def chunks_near(self, points, radius):
+        """各点周围 radius 格以内（正方形）的区块，按到最近一点的距离由近到远排列"""
+        cs = self.chunk_size
+        distances = {}
+        for px, py in points:
+            for cy in range(max(0, (py - radius) // cs), min(self.rows - 1, (py + radius) // cs) + 1):
+                for cx in range(max(0, (px - radius) // cs), min(self.columns - 1, (px + radius) // cs) + 1):
+                    distance = (cx * cs + cs // 2 - px) ** 2 + (cy * cs + cs // 2 - py) ** 2
+                    if distance < distances.get((cx, cy), float('inf')):
+                        distances[(cx, cy)] = distance
+        return sorted(distances, key=distances.get)
+
+    def read_all(self):
+        """读入整张地图，返回 (CharGrid, 营地表)"""
+        game_map = CharGrid(self.width, self.height, UNLOADED_TILE)
+        camps = {}
+        for cy in range(self.rows):
+            for cx in range(self.columns):
+                x0, y0, tiles, chunk_camps = self.read_chunk(cx, cy)
+                game_map.write_block(x0, y0, tiles)
+                camps.update(chunk_camps)
+        return game_map, camps
+
+    def close(self):
+        self._file.close()
+
+class ChunkStreamer:
+    """后台线程预读区块
+
+    主循环每帧用 request 给出镜头中心和英雄的位置，附近还没请求过的区块按距离排队，
+    后台线程逐个读取解压后放进缓存；poll 返回新近就绪的区块编号，主线程再通过
+    World.load_chunk（它调用 read_chunk，从缓存取出）写进地图。on_loaded(区块编号)
+    在后台线程里调用，用于唤醒空闲等待的主循环。可以替代 MapFile 作为 World.map_source。
+    """
+
+    def __init__(self, map_file, radius=STREAM_RADIUS, on_loaded=None, loaded=()):
+        """loaded: 已经在地图里的区块，不再预读"""
+        self.map_file = map_file
+        self.path = map_file.path
+        self.radius = radius
+        self.on_loaded = on_loaded
+        self._requested = set(loaded)
+        self._queue = queue.PriorityQueue() # (距离顺序, 序号, 区块编号)
+        self._sequence = 0
+        self._lock = threading.Lock()
+        self._ready = {}
+        self._new = []
+        self._thread = threading.Thread(target=self._run, name='chunk-streamer', daemon=True)
+        self._thread.start()
+
+    def request(self, points):
+        """points 周围的区块中还没请求过的加入预读队列"""
+        for rank, key in enumerate(self.map_file.chunks_near(points, self.radius)):
+            if key not in self._requested:
+                self._requested.add(key)
+                self._sequence += 1
+                self._queue.put((rank, self._sequence, key))
+
+    def _run(self):
+        while True:
+            _, _, key = self._queue.get()
+            if key is None:
+                return
+            chunk = self.map_file.read_chunk(*key)
+            with self._lock:
+                self._ready[key] = chunk
+                self._new.append(key)
+            if self.on_loaded is not None:
+                self.on_loaded(key)
+
+    def poll(self):
+        """上次 poll 之后预读完成的区块编号列表"""
+        with self._lock:
+            new, self._new = self._new, []
+        return new
+
+    def read_chunk(self, cx, cy):
+        """取出预读好的区块；还没读到时在当前线程直接读取"""
+        with self._lock:
+            chunk = self._ready.pop((cx, cy), None)
+        return chunk if chunk is not None else self.map_file.read_chunk(cx, cy)
+
+    def close(self):
+        self._queue.put((-1, 0, None))
+        self._thread.join()
+
+def load_world(path, stream=False, rng_seed=None, radius=STREAM_RADIUS, chunks=None):
+    """由地图文件创建 World，world.map_source 为打开的 MapFile
+
+    stream 为真时只读入英雄起点周围 radius 格以内的区块（或 chunks 列出的区块，回放时用），
+    其余格子为 UNLOADED_TILE（不可通行），之后由 World.load_chunk 按需读入；否则一次读入整张地图。
+    """
+    map_file = MapFile(path)
+    start = tuple(map_file.meta.get('start', (0, 0)))
+    if stream:
+        game_map = CharGrid(map_file.width, map_file.height, UNLOADED_TILE)
+        camps = {}
+        loaded = [tuple(key) for key in chunks] if chunks is not None else map_file.chunks_near([start], radius)
+        for key in loaded:
+            x0, y0, tiles, chunk_camps = map_file.read_chunk(*key)
+            game_map.write_block(x0, y0, tiles)
+            camps.update(chunk_camps)
+    else:
+        game_map, camps = map_file.read_all()
+        loaded = [(cx, cy) for cy in range(map_file.rows) for cx in range(map_file.columns)]
+    world = World(map_file.width, map_file.height, game_map=game_map, monster_camps=camps,
+                  rng_seed=rng_seed, start=start)
+    world.map_source = map_file
+    world.loaded_chunks = set(loaded)
+    return world
+
+def main(path, *args):
+    args = [int(arg) for arg in args[:3]]
+    start = time.perf_counter()
+    world = World(*args) if len(args) >= 2 else World()
+    generated = time.perf_counter()
+    save_world_map(world, path)
+    written = time.perf_counter()
+    map_file = MapFile(path)
+    size = os.path.getsize(path)
+    print(f"{path}: {world.map_width}x{world.map_height}，{map_file.columns * map_file.rows} 个区块，"
+          f"{len(world.objects)} 个地点，{size / 1024:.1f} KB（原始 {world.map_width * world.map_height / 1024:.1f} KB）")
+    print(f"生成 {(generated - start) * 1000:.0f} ms，转换写入 {(written - generated) * 1000:.0f} ms")
+
+if __name__ == "__main__":
+    if len(sys.argv) < 2:
+        print(__doc__)
+        sys.exit(2)
+    main(*sys.argv[1:])
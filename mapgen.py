@@ -0,0 +1,153 @@
+import numpy as np
+from collections import OrderedDict
+from tilegrid import TerrainType
+
+_MASK64 = 0xFFFFFFFFFFFFFFFF
+
+def _lattice_values(ix, iy, seed):
+    """对整数格点坐标做 splitmix64 哈希，得到 [0, 1) 的伪随机值
+
+    ix 形状 (1, n)，iy 形状 (m, 1)，返回 (m, n)。只依赖世界坐标和种子，
+    所以任何区域单独生成时，格点值都与整张地图一起生成时完全相同。
+    """
+    with np.errstate(over='ignore'):
+        h = (ix.astype(np.uint64) * np.uint64(0x9E3779B97F4A7C15)) ^ \
+            (iy.astype(np.uint64) * np.uint64(0xC2B2AE3D27D4EB4F)) ^ np.uint64(seed & _MASK64)
+        h ^= h >> np.uint64(30)
+        h *= np.uint64(0xBF58476D1CE4E5B9)
+        h ^= h >> np.uint64(27)
+        h *= np.uint64(0x94D049BB133111EB)
+        h ^= h >> np.uint64(31)
+    return ((h >> np.uint64(40)).astype(np.float32) * np.float32(1.0 / (1 << 24)))
+
+def _interp_axis(coords, scale):
+    """一个轴上的格点下标和平滑插值权重（smoothstep）"""
+    f = coords / scale
+    i = np.floor(f).astype(np.int64)
+    t = (f - i).astype(np.float32)
+    return i, t * t * (3 - 2 * t)
+
+def value_noise(x0, y0, width, height, scale, seed):
+    """区域 [x0, x0+width) x [y0, y0+height) 上的值噪声，形状 (height, width)
+
+    先只对覆盖区域的稀疏格点求哈希，再分别沿 x、y 方向插值，
+    每个像素只需要少量向量运算。
+    """
+    ix, tx = _interp_axis(np.arange(x0, x0 + width, dtype=np.float64), scale)
+    iy, ty = _interp_axis(np.arange(y0, y0 + height, dtype=np.float64), scale)
+    gx0, gy0 = ix[0], iy[0]
+    lattice = _lattice_values(
+        np.arange(gx0, ix[-1] + 2)[None, :],
+        np.arange(gy0, iy[-1] + 2)[:, None],
+        seed
+    )
+    # 沿 x 插值：每一行格点变成每一列像素
+    cols = ix - gx0
+    rows_x = lattice[:, cols] * (1 - tx) + lattice[:, cols + 1] * tx
+    # 沿 y 插值
+    rows = iy - gy0
+    result = rows_x[rows]
+    result *= (1 - ty)[:, None]
+    upper = rows_x[rows + 1]
+    upper *= ty[:, None]
+    result += upper
+    return result
+
+class NoiseMapGenerator:
+    """可复现的噪声地形生成器
+
+    海拔和湿度各是一层多倍频（fBm）值噪声，按阈值映射为 TerrainType。
+    相同种子下，任意区域的结果只取决于世界坐标，区块之间无缝拼接。
+    """
+
+    # 海拔阈值和湿度阈值（fBm 值集中在 0.5 附近）
+    WATER_LEVEL = 0.43
+    MOUNTAIN_LEVEL = 0.66
+    MOISTURE_LEVELS = (0.40, 0.52, 0.58)  # 沙漠 / 草地 / 森林 / 沼泽
+
+    def __init__(self, seed, scale=64, octaves=5, persistence=0.5):
+        self.seed = seed
+        self.scale = scale
+        self.octaves = octaves
+        self.persistence = persistence
+
+    def fbm(self, x0, y0, width, height, salt):
+        """多倍频叠加的噪声，取值 [0, 1)"""
+        total = np.zeros((height, width), dtype=np.float32)
+        amplitude = 1.0
+        norm = 0.0
+        scale = float(self.scale)
+        for octave in range(self.octaves):
+            seed = (self.seed * 1000003 + salt * 7919 + octave) & _MASK64
+            noise = value_noise(x0, y0, width, height, scale, seed)
+            noise *= np.float32(amplitude)
+            total += noise
+            norm += amplitude
+            amplitude *= self.persistence
+            scale = max(1.0, scale / 2)
+        total /= np.float32(norm)
+        return total
+
+    def terrain(self, x0, y0, width, height):
+        """生成区域地形，返回 uint8 数组（TerrainType 的值），形状 (height, width)"""
+        elevation = self.fbm(x0, y0, width, height, salt=1)
+        moisture = self.fbm(x0, y0, width, height, salt=2)
+
+        # 先按湿度决定陆地类型，再用海拔覆盖出水域和山脉
+        land_lut = np.array([
+            TerrainType.DESERT.value,
+            TerrainType.GRASS.value,
+            TerrainType.FOREST.value,
+            TerrainType.SWAMP.value
+        ], dtype=np.uint8)
+        result = land_lut[np.searchsorted(np.array(self.MOISTURE_LEVELS), moisture, side='right')]
+        result[elevation < self.WATER_LEVEL] = TerrainType.WATER.value
+        result[elevation >= self.MOUNTAIN_LEVEL] = TerrainType.MOUNTAIN.value
+        return result
+
+    def generate_chunk(self, cx, cy, chunk_size):
+        """生成第 (cx, cy) 个区块"""
+        return self.terrain(cx * chunk_size, cy * chunk_size, chunk_size, chunk_size)
+
+class LazyTerrain:
+    """按需生成的区块地形，只有被访问到的区块才会真正生成
+
+    适合无限或超大的世界：镜头或英雄到过的地方才占内存，
+    最久未用的区块超过 max_chunks 后被丢弃（再次访问时重新生成，结果不变）。
+    """
+
+    def __init__(self, generator, chunk_size=64, max_chunks=1024):
+        self.generator = generator
+        self.chunk_size = chunk_size
+        self.max_chunks = max_chunks
+        self.chunks = OrderedDict()
+
+    def chunk(self, cx, cy):
+        key = (cx, cy)
+        chunk = self.chunks.get(key)
+        if chunk is None:
+            chunk = self.generator.generate_chunk(cx, cy, self.chunk_size)
+            self.chunks[key] = chunk
+            if len(self.chunks) > self.max_chunks:
+                self.chunks.popitem(last=False)
+        else:
+            self.chunks.move_to_end(key)
+        return chunk
+
+    def terrain_at(self, x, y):
+        cs = self.chunk_size
+        return TerrainType(int(self.chunk(x // cs, y // cs)[y % cs, x % cs]))
+
+    def region(self, x0, y0, width, height):
+        """拼出任意区域的地形（按需生成涉及的区块）"""
+        cs = self.chunk_size
+        result = np.empty((height, width), dtype=np.uint8)
+        for cy in range(y0 // cs, (y0 + height - 1) // cs + 1):
+            for cx in range(x0 // cs, (x0 + width - 1) // cs + 1):
+                chunk = self.chunk(cx, cy)
+                # 区块与目标区域的交集
+                ax0, ay0 = max(x0, cx * cs), max(y0, cy * cs)
+                ax1, ay1 = min(x0 + width, (cx + 1) * cs), min(y0 + height, (cy + 1) * cs)
+                result[ay0 - y0:ay1 - y0, ax0 - x0:ax1 - x0] = \
+                    chunk[ay0 - cy * cs:ay1 - cy * cs, ax0 - cx * cs:ax1 - cx * cs]
+        return result
@@ -0,0 +1,166 @@
+import math
+import numpy as np
+import pygame
+from entities import PLAYER, MONSTER
+
+BACKGROUND = (0, 0, 0)        # 未探索的格子
+VIEW_COLOR = (255, 255, 255)  # 镜头范围框
+BORDER_COLOR = (90, 90, 110)
+
+def entity_markers(entities, owner_colors, monster_color):
+    """EntityStore 中活着的 AI 实体作为小地图标记：(xs, ys, colors)，玩家英雄不在其中"""
+    n = entities.count
+    ids = np.flatnonzero(entities.alive[:n] & (entities.kind[:n] != PLAYER))
+    owner_colors = np.asarray(owner_colors, dtype=np.uint8)
+    colors = owner_colors[entities.owner[ids] % len(owner_colors)]
+    colors[entities.kind[ids] == MONSTER] = monster_color
+    return entities.x[ids], entities.y[ids], colors
+
+class Minimap:
+    """小地图：整张地图缩小画在一个矩形里，点击跳转镜头
+
+    地形按调色板查表（palette[格子值] -> RGB）后用 pygame.surfarray 整块写进 Surface，
+    不逐格 draw.rect。地图比矩形大时每 step x step 格取左上角那一格作为一个像素，
+    比矩形小时每格放大成 zoom x zoom 个像素。建好之后只重算 invalidate 过的格子和
+    标记（英雄、怪物）移动前后所在的像素；镜头范围框在提交时直接画到屏幕上。
+    """
+
+    def __init__(self, rect, map_width, map_height, palette, tiles, explored=None):
+        """tiles() 返回形状 (height, width) 的格子值数组，palette 形状 (256, 3)；
+        explored() 返回同样形状的数组，0 表示未探索（画成黑色），为 None 时全部可见。
+        两者都在需要时才调用，地图数组被替换或原地修改都不需要通知。
+        """
+        area = pygame.Rect(rect)
+        self.map_width = map_width
+        self.map_height = map_height
+        self.palette = np.asarray(palette, dtype=np.uint8)
+        self.tiles = tiles
+        self.explored = explored
+        self.step = max(1, -(-map_width // area.width), -(-map_height // area.height))
+        self.columns = -(-map_width // self.step)
+        self.rows = -(-map_height // self.step)
+        self.zoom = max(1, min(area.width // self.columns, area.height // self.rows))
+        self.rect = pygame.Rect(0, 0, self.columns * self.zoom, self.rows * self.zoom)
+        self.rect.center = area.center
+        self.surface = pygame.Surface(self.rect.size).convert()
+        self.full_rebuild = True
+        self._pending = []  # 待重算的像素下标数组（py * columns + px）
+        self._markers = (np.zeros(0, dtype=np.int64), np.zeros((0, 3), dtype=np.uint8))
+        self._markers_changed = False
+        self._drawn_view = None
+
+    def invalidate(self, x, y):
+        """(x, y) 格变化（地形、地图对象或迷雾）"""
+        self._pending.append(np.array([(y // self.step) * self.columns + x // self.step]))
+
+    def invalidate_many(self, xs, ys):
+        xs = np.asarray(xs, dtype=np.int64)
+        ys = np.asarray(ys, dtype=np.int64)
+        if len(xs):
+            self._pending.append((ys // self.step) * self.columns + xs // self.step)
+
+    def invalidate_rect(self, x0, y0, x1, y1):
+        """格子范围 [x0, x1) x [y0, y1) 整块变化（流式读入的地图区块）"""
+        step = self.step
+        px = np.arange(-(-x0 // step), -(-x1 // step))
+        py = np.arange(-(-y0 // step), -(-y1 // step))
+        self._pending.append((py[:, None] * self.columns + px).ravel())
+
+    def set_markers(self, xs, ys, colors):
+        """设置要画在地形上的标记（未探索格子上的不画），colors 形状 (n, 3)；后面的盖住前面的
+
+        位置和颜色都没变时什么也不做，否则旧标记所在的像素在下次 draw 时恢复成地形。
+        """
+        xs = np.asarray(xs, dtype=np.int64)
+        ys = np.asarray(ys, dtype=np.int64)
+        colors = np.asarray(colors, dtype=np.uint8)
+        if self.explored is not None and len(xs):
+            shown = self.explored()[ys, xs] != 0
+            xs, ys, colors = xs[shown], ys[shown], colors[shown]
+        pixels = (ys // self.step) * self.columns + xs // self.step
+        old_pixels, old_colors = self._markers
+        if np.array_equal(pixels, old_pixels) and np.array_equal(colors, old_colors):
+            return
+        self._pending.append(old_pixels)
+        self._markers = (pixels, colors)
+        self._markers_changed = True
+
+    def _terrain_colors(self, tiles, explored):
+        colors = self.palette[tiles]
+        if explored is not None:
+            colors[explored == 0] = BACKGROUND
+        return colors
+
+    def _rebuild(self):
+        step = self.step
+        explored = self.explored()[::step, ::step] if self.explored is not None else None
+        colors = self._terrain_colors(self.tiles()[::step, ::step], explored)
+        if self.zoom > 1:
+            colors = colors.repeat(self.zoom, axis=0).repeat(self.zoom, axis=1)
+        pygame.surfarray.blit_array(self.surface, colors.transpose(1, 0, 2))
+        self.full_rebuild = False
+        self._pending.clear()
+
+    def _write(self, pixels, colors):
+        """把像素（下标数组）写成 colors，放大时每个像素是 zoom x zoom 的方块"""
+        zoom = self.zoom
+        px = pixels % self.columns * zoom
+        py = pixels // self.columns * zoom
+        array = pygame.surfarray.pixels3d(self.surface)
+        for oy in range(zoom):
+            for ox in range(zoom):
+                array[px + ox, py + oy] = colors
+        del array # 释放对 Surface 的锁
+
+    def _update(self):
+        """重算待更新的像素并重画标记，返回是否有变化"""
+        changed = self.full_rebuild or self._markers_changed
+        if self.full_rebuild:
+            self._rebuild()
+        elif self._pending:
+            pixels = np.concatenate(self._pending) # 重复的像素写两次结果一样，不去重
+            self._pending.clear()
+            if len(pixels):
+                ty = pixels // self.columns * self.step
+                tx = pixels % self.columns * self.step
+                explored = self.explored()[ty, tx] if self.explored is not None else None
+                self._write(pixels, self._terrain_colors(self.tiles()[ty, tx], explored))
+                changed = True
+        if changed and len(self._markers[0]):
+            self._write(*self._markers) # 重算的地形可能盖住了标记，标记统一重画
+        self._markers_changed = False
+        return changed
+
+    def view_rect(self, x0, y0, x1, y1):
+        """格子范围 [x0, x1) x [y0, y1)（如 camera.visible_tiles()）在屏幕上对应的矩形"""
+        scale = self.zoom / self.step
+        left = self.rect.x + int(x0 * scale)
+        top = self.rect.y + int(y0 * scale)
+        right = self.rect.x + math.ceil(x1 * scale)
+        bottom = self.rect.y + math.ceil(y1 * scale)
+        return pygame.Rect(left, top, right - left, bottom - top).clip(self.rect)
+
+    def draw(self, screen, view, force=False):
+        """有变化（或 force）时把小地图和镜头范围框画到屏幕上，返回需要提交的矩形列表
+
+        view 为镜头可见的格子范围 (x0, y0, x1, y1)；force 用于小地图所在区域被别的
+        内容（侧边栏背景、地图层）覆盖过的情况。
+        """
+        changed = self._update()
+        if not (changed or force or view != self._drawn_view):
+            return []
+        self._drawn_view = view
+        screen.blit(self.surface, self.rect)
+        pygame.draw.rect(screen, VIEW_COLOR, self.view_rect(*view), 1)
+        border = self.rect.inflate(2, 2)
+        pygame.draw.rect(screen, BORDER_COLOR, border, 1)
+        return [border]
+
+    def tile_at(self, pos):
+        """屏幕坐标对应的格子（该像素所代表方块的中心），不在小地图上时返回 None"""
+        if not self.rect.collidepoint(pos):
+            return None
+        px = (pos[0] - self.rect.x) // self.zoom
+        py = (pos[1] - self.rect.y) // self.zoom
+        return (min(self.map_width - 1, px * self.step + self.step // 2),
+                min(self.map_height - 1, py * self.step + self.step // 2))
@@ -0,0 +1,145 @@
+"""英雄本回合的移动范围：按地形消耗的 Dijkstra 洪泛，结果缓存并增量维护
+
+每个回合开始时英雄有 Hero.max_movement() 点移动力，进入一格花掉这一格的地形消耗
+（PathFinder.costs）。MovementRange 记录从英雄位置出发、本回合能走到的每个格子，
+以及走到那里之后还剩多少移动力；悬停、点击和叠加层都只读这份缓存（字典查找）。
+
+缓存只在英雄移动、移动力变化（走了一步、结束回合）或整块地图写入时整片重算；
+格子变化（营地被清除变成草地、区块读入）只作废经过该格的子树，再从边界向内修补。
+每个格子的父格子取所有最优前驱中编号最小的一个，所以不论增量修补还是整片重算、
+也不论界面什么时候查询，得到的路径都一样（录像回放依赖这一点）。
+"""
+import heapq
+
+class MovementRange:
+    """hero 的可达格子和到达后剩余的移动力，地图和消耗来自 pathfinder（与寻路共用）"""
+
+    def __init__(self, pathfinder, hero):
+        self.pathfinder = pathfinder
+        self.hero = hero
+        self.width = pathfinder.width
+        self.size = pathfinder.width * pathfinder.height
+        self.remaining = {} # 格子编号 -> 到达后剩余的移动力
+        self.parent = {}    # 格子编号 -> 最短路径上的前一格（根没有）
+        self.root = None
+        self.points = None
+        self._changed = set()
+        self.full_updates = 0
+        self.partial_updates = 0
+        pathfinder.game_map.add_listener(self._on_tile_changed)
+        pathfinder.game_map.add_block_listener(self._on_block_changed)
+
+    def _on_tile_changed(self, x, y, old, new):
+        self._changed.add(y * self.width + x)
+
+    def _on_block_changed(self, x0, y0, w, h):
+        self.root = None # 整块写入很少发生，下次查询时整片重算
+
+    def update(self):
+        """英雄位置、移动力或地图变化后修补缓存（查询时自动调用）"""
+        hero = self.hero
+        root = hero.y * self.width + hero.x
+        if root != self.root or hero.movement_left != self.points:
+            self._rebuild(root, hero.movement_left)
+        if self._changed:
+            changed, self._changed = self._changed, set()
+            self._repair(changed - {self.root})
+
+    def _rebuild(self, root, points):
+        self.full_updates += 1
+        self.root = root
+        self.points = points
+        self.remaining = {root: points}
+        self.parent = {}
+        self._changed.clear()
+        self._flood([(-points, root)])
+
+    def _repair(self, changed):
+        """消耗或通行性变化的格子：作废经过它们的子树，再由与之相邻的有效格子重新洪泛"""
+        self.partial_updates += 1
+        stale = set()
+        for index in changed:
+            if index in self.remaining and index not in stale:
+                stale |= self._subtree(index)
+        remaining = self.remaining
+        for index in stale:
+            del remaining[index]
+            self.parent.pop(index, None)
+        seeds = set()
+        for index in stale | changed:
+            for neighbor in self._neighbors(index):
+                if neighbor in remaining:
+                    seeds.add(neighbor)
+        self._flood([(-remaining[index], index) for index in seeds])
+
+    def _subtree(self, root):
+        """最短路径树上以 root 为根的子树（含 root）"""
+        children = {}
+        for index, parent in self.parent.items():
+            children.setdefault(parent, []).append(index)
+        subtree = {root}
+        stack = [root]
+        while stack:
+            for child in children.get(stack.pop(), ()):
+                subtree.add(child)
+                stack.append(child)
+        return subtree
+
+    def _neighbors(self, index):
+        x = index % self.width
+        for neighbor in (index - self.width, index + self.width,
+                         index - 1 if x > 0 else -1, index + 1 if x < self.width - 1 else -1):
+            if 0 <= neighbor < self.size:
+                yield neighbor
+
+    def _flood(self, heap):
+        """只改进不变差的 Dijkstra：剩余移动力大的先展开，事件地点只能作为终点"""
+        costs = self.pathfinder.costs
+        stops = self.pathfinder.stops
+        remaining = self.remaining
+        parent = self.parent
+        root = self.root
+        heapq.heapify(heap)
+        while heap:
+            left, current = heapq.heappop(heap)
+            left = -left
+            if remaining.get(current) != left or (stops[current] and current != root):
+                continue
+            for neighbor in self._neighbors(current):
+                cost = costs[neighbor]
+                if cost == 0 or neighbor == root:
+                    continue
+                rest = left - cost
+                if rest < 0:
+                    continue
+                known = remaining.get(neighbor, -1)
+                if rest > known:
+                    remaining[neighbor] = rest
+                    parent[neighbor] = current
+                    heapq.heappush(heap, (-rest, neighbor))
+                elif rest == known and current < parent[neighbor]:
+                    parent[neighbor] = current # 同样好的前驱取编号最小的，结果与计算顺序无关
+
+    def remaining_at(self, x, y):
+        """走到 (x, y) 后剩余的移动力，本回合走不到时返回 None"""
+        self.update()
+        return self.remaining.get(y * self.width + x)
+
+    def path_to(self, x, y):
+        """本回合走到 (x, y) 的最短路径（不含起点，含终点），走不到时返回 None"""
+        self.update()
+        index = y * self.width + x
+        if index not in self.remaining or index == self.root:
+            return None
+        path = []
+        while index != self.root:
+            path.append((index % self.width, index // self.width))
+            index = self.parent[index]
+        path.reverse()
+        return path
+
+    def tiles(self):
+        """[(x, y, 剩余移动力), ...]：本回合能到达的所有格子（不含英雄所在的格子）"""
+        self.update()
+        width = self.width
+        return [(index % width, index // width, left) for index, left in self.remaining.items() if index != self.root]
@@ -0,0 +1,165 @@
+import heapq
+from collections import OrderedDict
+
+class PathFinder:
+    """在 CharGrid 地图上做 A* 寻路（四方向），并缓存算过的路径
+
+    移动消耗按地形字符查表，impassable 中的地形不可进入；stop_tiles 中的地点
+    （城镇、营地等）只能作为终点，不能路过。地图格子变化时，只有经过该格的
+    缓存路径会失效。
+    """
+
+    def __init__(self, game_map, terrain_costs, impassable, stop_tiles=(),
+                 default_cost=100, cache_size=1024, max_nodes=50000):
+        """max_nodes: 单次搜索最多展开的节点数，防止不可达的终点拖垮一帧"""
+        self.game_map = game_map
+        self.width = game_map.width
+        self.height = game_map.height
+        self.max_nodes = max_nodes
+        self.cache_size = cache_size
+
+        # 按字节查表：0 表示不可通行
+        self._cost_table = [default_cost] * 256
+        for char, cost in terrain_costs.items():
+            self._cost_table[ord(char)] = cost
+        for char in impassable:
+            self._cost_table[ord(char)] = 0
+        self._stop_table = [False] * 256
+        for char in stop_tiles:
+            self._stop_table[ord(char)] = True
+        self.min_cost = min(cost for cost in self._cost_table if cost > 0)
+
+        data = bytes(game_map.data)
+        if max(self._cost_table) < 256:
+            # 整张地图按字节查表一次转换（大地图上比逐格列表推导快一个数量级）
+            self.costs = list(data.translate(bytes(self._cost_table)))
+        else:
+            self.costs = [self._cost_table[b] for b in data]
+        self.stops = list(data.translate(bytes(self._stop_table))) # 0/1
+
+        self._cache = OrderedDict()
+        self._paths_through = {}
+        self.hits = 0
+        self.misses = 0
+        game_map.add_listener(self._on_tile_changed)
+        game_map.add_block_listener(self._on_block_changed)
+
+    def _on_tile_changed(self, x, y, old, new):
+        index = y * self.width + x
+        self.costs[index] = self._cost_table[ord(new)]
+        self.stops[index] = self._stop_table[ord(new)]
+        for key in list(self._paths_through.get(index, ())):
+            self._forget(key)
+
+    def _on_block_changed(self, x0, y0, w, h):
+        """整块写入（流式加载的地图区块）：重新查表这一块，缓存的路径全部作废"""
+        data = self.game_map.data
+        for y in range(y0, y0 + h):
+            start = y * self.width + x0
+            row = bytes(data[start:start + w])
+            self.costs[start:start + w] = [self._cost_table[b] for b in row]
+            self.stops[start:start + w] = list(row.translate(bytes(self._stop_table)))
+        self._cache.clear()
+        self._paths_through.clear()
+
+    def _forget(self, key):
+        """移除一条缓存路径及其反向索引"""
+        start_index, _ = key
+        path = self._cache.pop(key)
+        for x, y in path:
+            self._unlink(y * self.width + x, key)
+        self._unlink(start_index, key)
+
+    def _unlink(self, index, key):
+        keys = self._paths_through.get(index)
+        if keys is not None:
+            keys.discard(key)
+            if not keys:
+                del self._paths_through[index]
+
+    def find_path(self, start, goal):
+        """返回从 start 到 goal 的格子列表（不含起点，含终点），不可达或不在地图内时返回 None"""
+        width = self.width
+        for x, y in (start, goal):
+            if not (0 <= x < width and 0 <= y < self.height):
+                return None # 越界的坐标按展平编号会落到别的行上
+        start_index = start[1] * width + start[0]
+        goal_index = goal[1] * width + goal[0]
+        key = (start_index, goal_index)
+        path = self._cache.get(key)
+        if path is not None:
+            self.hits += 1
+            self._cache.move_to_end(key)
+            return list(path)
+
+        self.misses += 1
+        indices = self._search(start_index, goal_index)
+        if indices is None:
+            return None
+        path = [(index % width, index // width) for index in indices]
+        self._cache[key] = path
+        for index in indices:
+            self._paths_through.setdefault(index, set()).add(key)
+        self._paths_through.setdefault(start_index, set()).add(key)
+        if len(self._cache) > self.cache_size:
+            self._forget(next(iter(self._cache)))
+        return list(path)
+
+    def path_cost(self, path):
+        """路径的总移动消耗"""
+        return sum(self.costs[y * self.width + x] for x, y in path)
+
+    def _search(self, start, goal):
+        if start == goal or not 0 <= goal < len(self.costs) or self.costs[goal] == 0:
+            return None
+
+        width = self.width
+        costs = self.costs
+        stops = self.stops
+        min_cost = self.min_cost
+        goal_x = goal % width
+        goal_y = goal // width
+        last_x = width - 1
+        size = len(costs)
+
+        g_score = {start: 0}
+        came_from = {}
+        closed = set()
+        start_h = (abs(start % width - goal_x) + abs(start // width - goal_y)) * min_cost
+        # 堆元素 (f, h, 格子)：f 相同时优先展开离终点更近的格子
+        open_heap = [(start_h, start_h, start)]
+        expanded = 0
+        while open_heap:
+            _, _, current = heapq.heappop(open_heap)
+            if current == goal:
+                path = [current]
+                while current in came_from:
+                    current = came_from[current]
+                    path.append(current)
+                path.pop()  # 去掉起点
+                path.reverse()
+                return path
+            if current in closed:
+                continue
+            closed.add(current)
+            expanded += 1
+            if expanded > self.max_nodes:
+                return None
+
+            current_g = g_score[current]
+            x = current % width
+            for neighbor in (current - width, current + width,
+                             current - 1 if x > 0 else -1,
+                             current + 1 if x < last_x else -1):
+                if neighbor < 0 or neighbor >= size or neighbor in closed:
+                    continue
+                cost = costs[neighbor]
+                if cost == 0 or (stops[neighbor] and neighbor != goal):
+                    continue
+                tentative = current_g + cost
+                if tentative < g_score.get(neighbor, tentative + 1):
+                    g_score[neighbor] = tentative
+                    came_from[neighbor] = current
+                    h = (abs(neighbor % width - goal_x) + abs(neighbor // width - goal_y)) * min_cost
+                    heapq.heappush(open_heap, (tentative + h, h, neighbor))
+        return None
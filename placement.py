@@ -0,0 +1,75 @@
+import numpy as np
+
+class PlacementError(ValueError):
+    """可用格子不足，无法按要求放下全部对象"""
+
+class ObjectPlacer:
+    """基于空闲格子索引的对象放置器
+
+    每次放置先用 allowed 掩码（例如“不是水域或山脉”）和已占用掩码算出全部候选
+    格子，再按部分 Fisher-Yates 洗牌的顺序逐个尝试，每个候选最多看一次。
+    因此耗时与检查过的候选数成正比，候选用完仍放不下时抛出 PlacementError，
+    不会像随机重试那样在拥挤的地图上变慢甚至死循环。
+    """
+
+    def __init__(self, width, height, rng=None):
+        self.width = width
+        self.height = height
+        self.rng = rng if rng is not None else np.random.default_rng()
+        self.occupied = np.zeros((height, width), dtype=bool)
+
+    def candidates(self, allowed, margin=0):
+        """满足约束、未被占用、且离地图边缘至少 margin 格的格子（扁平下标）"""
+        mask = allowed & ~self.occupied
+        if margin:
+            inner = np.zeros_like(mask)
+            inner[margin:self.height - margin, margin:self.width - margin] = True
+            mask &= inner
+        return np.flatnonzero(mask)
+
+    def place(self, count, allowed, margin=0, min_spacing=0, label="对象", partial=False):
+        """放置 count 个对象，返回坐标列表 [(x, y), ...] 并把这些格子标记为已占用
+
+        min_spacing > 0 时，本次放置的对象两两之间的欧氏距离不小于 min_spacing
+        （泊松圆盘式采样：每放下一个对象，就在 blocked 掩码上盖一个半径为
+        min_spacing 的圆，之后的候选只需 O(1) 查一次掩码）。
+        partial=True 时候选用完就返回已放下的对象，不抛出 PlacementError。
+        """
+        candidates = self.candidates(allowed, margin)
+        total = len(candidates)
+        blocked = None
+        if min_spacing:
+            blocked = np.zeros((self.height, self.width), dtype=bool)
+            r = min_spacing - 1
+            dy, dx = np.ogrid[-r:r + 1, -r:r + 1]
+            disk = dx * dx + dy * dy < min_spacing * min_spacing
+
+        placed = []
+        batch = 4096
+        for i in range(total):
+            if len(placed) == count:
+                break
+            # 部分洗牌：从剩余候选中随机换一个到位置 i（随机数成批生成）
+            if i % batch == 0:
+                uniforms = self.rng.random(batch)
+            j = i + int(uniforms[i % batch] * (total - i))
+            candidates[i], candidates[j] = candidates[j], candidates[i]
+            y, x = divmod(int(candidates[i]), self.width)
+
+            if blocked is not None:
+                if blocked[y, x]:
+                    continue
+                # 盖上圆形禁区（裁剪到地图范围内）
+                y0, y1 = max(0, y - r), min(self.height, y + r + 1)
+                x0, x1 = max(0, x - r), min(self.width, x + r + 1)
+                blocked[y0:y1, x0:x1] |= disk[y0 - y + r:y1 - y + r, x0 - x + r:x1 - x + r]
+            placed.append((x, y))
+
+        if len(placed) < count and not partial:
+            raise PlacementError(
+                f"无法放置{label}: 需要 {count} 个，只找到 {len(placed)} 个可用位置"
+                f"（候选格子 {total} 个，最小间距 {min_spacing}）"
+            )
+        for x, y in placed:
+            self.occupied[y, x] = True
+        return placed
@@ -0,0 +1,150 @@
+import json
+import time
+import numpy as np
+import pygame
+
+class FrameProfiler:
+    """按阶段记录每帧耗时的环形缓冲区
+
+    主循环每帧开头调用 begin_frame()，每个阶段结束时调用 mark(阶段名)，
+    记录的是与上一次 mark 之间的耗时，最后 end_frame()。只保留最近 capacity 帧，
+    统计（p50/p95/p99、直方图）在读取时才计算。未启用时每次调用只做一次属性判断，
+    对帧耗时没有可测量的影响。
+    """
+
+    HISTOGRAM_EDGES_MS = (0, 2, 4, 8, 16.7, 33.3, 50, 100, float('inf'))
+
+    def __init__(self, phases, capacity=600, enabled=False):
+        self.phases = tuple(phases)
+        self.capacity = capacity
+        self.enabled = enabled
+        self._columns = {name: i for i, name in enumerate(self.phases)}
+        self.samples = np.zeros((capacity, len(self.phases)), dtype=np.float64) # 秒
+        self.starts = np.zeros(capacity, dtype=np.float64) # 每帧开始时刻（perf_counter）
+        self.count = 0  # 累计记录的帧数，超过 capacity 后旧帧被覆盖
+        self._row = 0
+        self._last = None
+
+    def toggle(self):
+        self.enabled = not self.enabled
+        self._last = None
+        return self.enabled
+
+    def begin_frame(self):
+        if not self.enabled:
+            return
+        self._row = self.count % self.capacity
+        self.samples[self._row] = 0
+        self._last = self.starts[self._row] = time.perf_counter()
+
+    def mark(self, phase):
+        """记录从上一次 mark（或帧开始）到现在的耗时，计入 phase 阶段"""
+        if not self.enabled or self._last is None:
+            return
+        now = time.perf_counter()
+        self.samples[self._row, self._columns[phase]] += now - self._last
+        self._last = now
+
+    def end_frame(self):
+        if not self.enabled or self._last is None:
+            return
+        self.count += 1
+        self._last = None
+
+    def _recent(self):
+        """最近记录的帧（按时间顺序），形状 (帧数, 阶段数)，单位毫秒"""
+        filled = min(self.count, self.capacity)
+        order = (np.arange(filled) + self.count - filled) % self.capacity
+        return self.samples[order] * 1000, self.starts[order]
+
+    def stats(self):
+        """{阶段名: {'p50', 'p95', 'p99', 'mean'}}，另有 'frame' 为整帧耗时，单位毫秒"""
+        samples, _ = self._recent()
+        if not len(samples):
+            return {}
+        columns = {name: samples[:, i] for i, name in enumerate(self.phases)}
+        columns['frame'] = samples.sum(axis=1)
+        result = {}
+        for name, values in columns.items():
+            p50, p95, p99 = np.percentile(values, (50, 95, 99))
+            result[name] = {'p50': float(p50), 'p95': float(p95), 'p99': float(p99), 'mean': float(values.mean())}
+        return result
+
+    def histogram(self):
+        """整帧耗时直方图 [(下界ms, 上界ms, 帧数), ...]"""
+        samples, _ = self._recent()
+        edges = self.HISTOGRAM_EDGES_MS
+        counts, _ = np.histogram(samples.sum(axis=1), bins=edges)
+        return [(edges[i], edges[i + 1], int(count)) for i, count in enumerate(counts)]
+
+    def export_json(self, path):
+        """统计、直方图和每帧原始数据写成 JSON"""
+        samples, _ = self._recent()
+        report = {
+            'phases': list(self.phases),
+            'frames': len(samples),
+            'stats': self.stats(),
+            'histogram': [{'min_ms': low, 'max_ms': high if high != float('inf') else None, 'count': count}
+                          for low, high, count in self.histogram()],
+            'samples_ms': np.round(samples, 4).tolist(),
+        }
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(report, f, ensure_ascii=False)
+
+    def export_chrome_trace(self, path):
+        """写成 Chrome trace 格式（chrome://tracing 或 Perfetto 可直接打开）"""
+        samples, starts = self._recent()
+        events = []
+        if len(starts):
+            origin = starts[0]
+            for row, start in zip(samples, starts):
+                ts = (start - origin) * 1e6
+                events.append({'name': 'frame', 'ph': 'X', 'ts': ts, 'dur': float(row.sum()) * 1000,
+                               'pid': 1, 'tid': 1})
+                for name, duration_ms in zip(self.phases, row):
+                    events.append({'name': name, 'ph': 'X', 'ts': ts, 'dur': float(duration_ms) * 1000,
+                                   'pid': 1, 'tid': 2})
+                    ts += duration_ms * 1000
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump({'traceEvents': events, 'displayTimeUnit': 'ms'}, f)
+
+class ProfilerOverlay:
+    """在屏幕角落显示 FrameProfiler 的统计，文字每 refresh_ms 毫秒重新渲染一次"""
+
+    def __init__(self, profiler, font, pos=(8, 8), refresh_ms=500):
+        self.profiler = profiler
+        self.font = font
+        self.pos = pos
+        self.refresh_ms = refresh_ms
+        self._surface = None
+        self._rendered_at = None
+
+    def _render(self):
+        stats = self.profiler.stats()
+        lines = [f"{'phase':<9} {'p50':>6} {'p95':>6} {'p99':>6} ms"]
+        for name in ('frame',) + self.profiler.phases:
+            if name in stats:
+                s = stats[name]
+                lines.append(f"{name:<9} {s['p50']:>6.2f} {s['p95']:>6.2f} {s['p99']:>6.2f}")
+        histogram = self.profiler.histogram()
+        total = max(1, sum(count for _, _, count in histogram))
+        for low, high, count in histogram:
+            label = f"<{high:g}" if high != float('inf') else f">{low:g}"
+            lines.append(f"{label:>6} {'#' * round(count * 20 / total):<20} {count}")
+
+        line_height = self.font.get_linesize()
+        rendered = [self.font.render(line, True, (255, 255, 255)) for line in lines]
+        width = max(surface.get_width() for surface in rendered) + 12
+        surface = pygame.Surface((width, line_height * len(lines) + 12))
+        surface.fill((20, 20, 30))
+        for i, text_surface in enumerate(rendered):
+            surface.blit(text_surface, (6, 6 + i * line_height))
+        self._surface = surface
+
+    def draw(self, screen):
+        """画到 screen 上，返回覆盖的矩形"""
+        now = pygame.time.get_ticks()
+        if self._surface is None or now - self._rendered_at >= self.refresh_ms:
+            self._render()
+            self._rendered_at = now
+        return screen.blit(self._surface, self.pos)
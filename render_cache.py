@@ -0,0 +1,43 @@
+from collections import OrderedDict, namedtuple
+
+CacheInfo = namedtuple('CacheInfo', ['hits', 'misses', 'maxsize', 'currsize'])
+
+class TextCache:
+    """有界的文字渲染缓存（LRU），按 (字体, 文本, 颜色, 抗锯齿) 复用 font.render 的结果
+
+    返回的 Surface 被所有调用方共享，只能用来 blit，不要在上面绘制。
+    """
+
+    def __init__(self, maxsize=512):
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._surfaces = OrderedDict()
+
+    def render(self, font, text, color, antialias=True):
+        """与 font.render(text, antialias, color) 等价，命中缓存时不再重新渲染"""
+        key = (font, text, tuple(color), antialias)
+        surface = self._surfaces.get(key)
+        if surface is not None:
+            self.hits += 1
+            self._surfaces.move_to_end(key)
+            return surface
+
+        self.misses += 1
+        surface = font.render(text, antialias, color)
+        self._surfaces[key] = surface
+        if len(self._surfaces) > self.maxsize:
+            self._surfaces.popitem(last=False)
+        return surface
+
+    def cache_info(self):
+        """命中/未命中计数，和 functools.lru_cache 的 cache_info() 一致"""
+        return CacheInfo(self.hits, self.misses, self.maxsize, len(self._surfaces))
+
+    def clear(self):
+        self._surfaces.clear()
+        self.hits = 0
+        self.misses = 0
+
+# MapRenderer 和 Game 共用的缓存
+text_cache = TextCache()
@@ -0,0 +1,200 @@
+"""录像与回放：记录每一帧的 dt 和指令，之后确定性地重放并校验状态
+
+World 的随机事件都来自按 rng_seed 播种的随机数生成器，游戏逻辑都在
+engine.Simulation.step 里按 (dt, 指令) 推进，所以同样的起始状态加同样的
+逐帧输入一定得到同样的结果。录像文件为 JSON Lines：
+    第 1 行   头部：地图尺寸、种子、rng_seed、AI 实体数量、行走/AI 间隔、起始状态校验和；
+              从存档开始的对局另存一份起始存档（录像路径 + '.hsav'），头部记录其文件名；
+              地图文件（mapfile）上的对局记录地图文件的相对路径和开始时已读入的区块
+    之后      每帧一行 [dt, 指令, ...]，
+              指令为 ["move", dx, dy]、["click", x, y]、["chunk", cx, cy]（流式读入一个地图区块）
+              或 ["end_turn"]
+              每 CHECKSUM_EVERY 帧和结束时多一行 {"frame": 帧号, "checksum": 状态校验和}
+回放可以带界面按原速进行（heroplay.Game(replay=...)），也可以无界面全速进行（replay()）；
+校验和对不上时抛出 ReplayDivergence。
+
+用法: python replay.py 录像.jsonl [--render]
+"""
+import os
+import sys
+import json
+import time
+import hashlib
+from engine import World, Simulation
+from mapfile import load_world
+from savegame import HERO_FIELDS, read_save, write_save, world_from_save, world_meta, explored_mask
+
+CHECKSUM_EVERY = 300  # 每隔多少帧记录一次状态校验和
+FORMAT = 4 # 2: 回合制移动力，校验和包含移动力和天数；3: 世界事件，校验和包含事件队列和城镇；
+           # 4: AI 实体只在结束回合时恢复移动点数
+
+def state_checksum(world):
+    """影响之后游戏进程的全部状态的摘要：地图、迷雾、英雄、天数、世界事件、城镇、营地、随机数状态和 AI 实体
+
+    事件日志只是输出，不参与计算。
+    """
+    digest = hashlib.blake2b(digest_size=16)
+    digest.update(bytes(world.game_map.data))
+    digest.update(world.fog.state.tobytes())
+    hero = {field: getattr(world.hero, field) for field in HERO_FIELDS}
+    camps = sorted([x, y, camp] for (x, y), camp in world.monster_camps.items())
+    towns = sorted([x, y, owner.name] for (x, y), owner in world.town_owners.items())
+    version, state, gauss = world.rng.getstate()
+    entities = world.entities
+    entities._sync_attached() # 玩家英雄的实体位置是延迟同步的，先同步，校验和才与界面何时查询无关
+    digest.update(json.dumps([hero, world.day, world.events.entries(), towns, camps,
+                              version, state, gauss, entities.rng.bit_generator.state],
+                             sort_keys=True, ensure_ascii=False).encode('utf-8'))
+    for name in entities._fields():
+        digest.update(getattr(entities, name)[:entities.count].tobytes())
+    return digest.hexdigest()
+
+class ReplayDivergence(Exception):
+    """回放到某一帧时状态与录像时不同（代码改了、或录像文件与起始状态不匹配）"""
+
+    def __init__(self, frame, expected, actual):
+        super().__init__(f"第 {frame} 帧状态不一致: 录像 {expected}，回放 {actual}")
+        self.frame = frame
+        self.expected = expected
+        self.actual = actual
+
+class Recorder:
+    """把每帧的 dt 和指令追加到录像文件；每 CHECKSUM_EVERY 帧写一次校验和并刷新到磁盘"""
+
+    def __init__(self, path, header):
+        self.path = path
+        self.frame = 0
+        self.file = open(path, 'w', encoding='utf-8')
+        self._write(header)
+
+    def _write(self, record):
+        self.file.write(json.dumps(record, ensure_ascii=False, separators=(',', ':')) + '\n')
+
+    def record(self, dt, commands, world):
+        """记录已经执行完的一帧（Simulation.step 之后调用）"""
+        self._write([dt, *commands])
+        self.frame += 1
+        if self.frame % CHECKSUM_EVERY == 0:
+            self._write({'frame': self.frame, 'checksum': state_checksum(world)})
+            self.file.flush()
+
+    def close(self, world):
+        if self.frame % CHECKSUM_EVERY:
+            self._write({'frame': self.frame, 'checksum': state_checksum(world)})
+        self.file.close()
+
+def start_recording(path, world, simulation, ai_heroes=0, monsters=0, from_save=False):
+    """开始录像，返回 Recorder；在 World 建好（并 populate）之后、第一帧之前调用
+
+    from_save 为真时起始状态无法由种子重建，另存一份起始存档。
+    """
+    snapshot = map_file = loaded_chunks = None
+    if world.map_source is not None and not from_save:
+        directory = os.path.dirname(os.path.abspath(path))
+        map_file = os.path.relpath(os.path.abspath(world.map_source.path), directory)
+        loaded_chunks = sorted(world.loaded_chunks)
+    if from_save:
+        snapshot = path + '.hsav'
+        write_save(snapshot, world.map_width, world.map_height, world.game_map.data,
+                   explored_mask(world), world_meta(world))
+    header = {
+        'format': FORMAT,
+        'width': world.map_width,
+        'height': world.map_height,
+        'seed': world.seed,
+        'rng_seed': world.rng_seed,
+        'ai_heroes': ai_heroes,
+        'monsters': monsters,
+        'walk_step_ms': simulation.walk_step_ms,
+        'ai_tick_ms': simulation.ai_tick_ms,
+        'checksum_every': CHECKSUM_EVERY,
+        'snapshot': os.path.basename(snapshot) if snapshot else None,
+        'map_file': map_file,
+        'loaded_chunks': loaded_chunks,
+        'start_checksum': state_checksum(world),
+    }
+    return Recorder(path, header)
+
+class Recording:
+    """读入内存的录像：header、frames（[(dt, [指令, ...]), ...]）和 checksums（帧号 -> 校验和）"""
+
+    def __init__(self, header, frames, checksums, directory='.'):
+        self.header = header
+        self.frames = frames
+        self.checksums = checksums
+        self.directory = directory
+
+    @classmethod
+    def load(cls, path):
+        with open(path, encoding='utf-8') as f:
+            header = json.loads(f.readline())
+            if header.get('format') != FORMAT:
+                raise ValueError(f"{path} 不是本版本的录像文件")
+            frames = []
+            checksums = {0: header['start_checksum']}
+            for line in f:
+                record = json.loads(line)
+                if isinstance(record, dict):
+                    checksums[record['frame']] = record['checksum']
+                else:
+                    frames.append((record[0], [tuple(command) for command in record[1:]]))
+        return cls(header, frames, checksums, os.path.dirname(path))
+
+    def build_world(self):
+        """重建录像开始时的 World（不调用 pygame）"""
+        header = self.header
+        if header['snapshot']:
+            world = world_from_save(read_save(os.path.join(self.directory, header['snapshot'])))
+        elif header.get('map_file'):
+            world = load_world(os.path.join(self.directory, header['map_file']), stream=True,
+                               rng_seed=header['rng_seed'], chunks=header['loaded_chunks'])
+        else:
+            world = World(header['width'], header['height'], header['seed'], rng_seed=header['rng_seed'])
+        if (header['ai_heroes'] or header['monsters']) and len(world.entities) == 1: # 起始存档里已有 AI 实体时不再放
+            world.populate(header['ai_heroes'], header['monsters'])
+        return world
+
+    def simulation(self, world):
+        return Simulation(world, self.header['walk_step_ms'], self.header['ai_tick_ms'])
+
+    def verify(self, frame, world):
+        """这一帧有记录的校验和时与当前状态对比，不一致时抛出 ReplayDivergence"""
+        expected = self.checksums.get(frame)
+        if expected is not None:
+            actual = state_checksum(world)
+            if actual != expected:
+                raise ReplayDivergence(frame, expected, actual)
+
+def replay(recording):
+    """无界面全速回放，逐一校验记录的校验和，返回 (world, 耗时秒数)"""
+    world = recording.build_world()
+    recording.verify(0, world)
+    simulation = recording.simulation(world)
+    start = time.perf_counter()
+    for dt, commands in recording.frames:
+        simulation.step(dt, commands)
+        recording.verify(simulation.frame, world)
+    return world, time.perf_counter() - start
+
+def main(path, *options):
+    recording = Recording.load(path)
+    if '--render' in options:
+        from heroplay import Game
+        Game(replay=recording).run()
+        return
+    frames = len(recording.frames)
+    game_ms = sum(dt for dt, _ in recording.frames)
+    try:
+        world, elapsed = replay(recording)
+    except ReplayDivergence as error:
+        print(error)
+        sys.exit(1)
+    print(f"回放 {frames} 帧（游戏时间 {game_ms / 1000:.1f} 秒）用时 {elapsed * 1000:.1f} ms，"
+          f"{frames / max(elapsed, 1e-9):.0f} 帧/秒，{len(recording.checksums)} 个校验点全部一致")
+    print(f"最终位置 ({world.hero.x}, {world.hero.y})，等级 {world.hero.level}")
+
+if __name__ == "__main__":
+    if len(sys.argv) < 2:
+        print(__doc__)
+        sys.exit(2)
+    main(*sys.argv[1:])
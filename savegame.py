@@ -0,0 +1,282 @@
+import os
+import json
+import base64
+import mmap
+import struct
+import zlib
+import numpy as np
+from chargrid import CharGrid
+from engine import World
+from fog import EXPLORED
+from mapfile import MapFile
+
+MAGIC = b'HSAV'
+DELTA_MAGIC = b'HDLT'
+VERSION = 1
+ALIGN = 4096  # 地图数据从页边界开始，便于内存映射
+
+# 文件头：魔数, 版本, 宽, 高, 存档编号, 地图偏移, 元数据偏移, 元数据长度
+_HEADER = struct.Struct('<4sH2xIIQQQQ')
+# 增量文件头：魔数, 版本, 对应的完整存档编号, 变化格子数, 新探索格子数, 元数据长度
+_DELTA_HEADER = struct.Struct('<4sH2xQIII')
+
+# 存进元数据的英雄属性（事件日志单独存为 'log'）
+HERO_FIELDS = ('x', 'y', 'name', 'level', 'experience', 'primary_skills', 'secondary_skills',
+               'spells', 'artifacts', 'resources', 'army', 'movement_left')
+
+class SaveError(ValueError):
+    """存档文件损坏、版本不符，或增量存档与完整存档不配套"""
+
+class SaveFile:
+    """读入的存档
+
+    grid 是内存映射出来的地图字节（写时复制，修改不会写回文件），打开存档时
+    不解析、不复制地图；explored 是解包后的已探索掩码，meta 是英雄和世界数据。
+    有增量存档时已经叠加在上面，changed_tiles / base_explored / base_meta 记录完整存档
+    之后的变化。
+    """
+
+    def __init__(self, width, height, save_id, grid, explored, meta):
+        self.width = width
+        self.height = height
+        self.save_id = save_id
+        self.grid = grid
+        self.explored = explored
+        self.meta = meta
+        self.changed_tiles = np.zeros(0, dtype=np.uint32)
+        self.base_explored = explored
+        self.base_meta = meta
+
+def _pack_meta(meta):
+    return zlib.compress(json.dumps(meta, ensure_ascii=False, separators=(',', ':')).encode('utf-8'))
+
+def _unpack_meta(data):
+    return json.loads(zlib.decompress(data).decode('utf-8'))
+
+def _replace_file(path, *chunks):
+    """先写临时文件再改名，写到一半崩溃也不会留下损坏的存档"""
+    tmp_path = path + '.tmp'
+    with open(tmp_path, 'wb') as f:
+        for chunk in chunks:
+            f.write(chunk)
+    os.replace(tmp_path, path)
+
+def write_save(path, width, height, grid, explored, meta):
+    """写完整存档，返回存档编号
+
+    布局：文件头 | 填充到 ALIGN | 地图 (width * height 字节) | 已探索位图 | zlib 压缩的 JSON 元数据
+    """
+    save_id = int.from_bytes(os.urandom(8), 'little')
+    count = width * height
+    fog_bits = np.packbits(np.asarray(explored, dtype=bool).ravel())
+    meta_bytes = _pack_meta(meta)
+    meta_offset = ALIGN + count + len(fog_bits)
+    header = _HEADER.pack(MAGIC, VERSION, width, height, save_id, ALIGN, meta_offset, len(meta_bytes))
+    _replace_file(path, header, bytes(ALIGN - len(header)), grid, fog_bits.tobytes(), meta_bytes)
+    return save_id
+
+def write_delta(path, save_id, tile_indices, tile_values, fog_indices, meta):
+    """写增量存档：完整存档之后变化的格子、新探索的格子和最新的元数据"""
+    tile_indices = np.asarray(tile_indices, dtype='<u4')
+    fog_indices = np.asarray(fog_indices, dtype='<u4')
+    meta_bytes = _pack_meta(meta)
+    header = _DELTA_HEADER.pack(DELTA_MAGIC, VERSION, save_id, len(tile_indices), len(fog_indices), len(meta_bytes))
+    _replace_file(path, header, tile_indices.tobytes(), np.asarray(tile_values, dtype=np.uint8).tobytes(),
+                  fog_indices.tobytes(), meta_bytes)
+
+def read_save(path, delta_path=None):
+    """打开存档（地图部分内存映射），有配套的增量存档时一并叠加"""
+    with open(path, 'rb') as f:
+        mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_COPY)
+    if len(mapped) < _HEADER.size:
+        raise SaveError(f"{path}: 文件太短")
+    magic, version, width, height, save_id, grid_offset, meta_offset, meta_size = _HEADER.unpack_from(mapped)
+    if magic != MAGIC:
+        raise SaveError(f"{path}: 不是存档文件")
+    if version != VERSION:
+        raise SaveError(f"{path}: 存档版本 {version}，只支持 {VERSION}")
+    count = width * height
+    if meta_offset + meta_size > len(mapped):
+        raise SaveError(f"{path}: 文件不完整")
+
+    grid = memoryview(mapped)[grid_offset:grid_offset + count]
+    fog_bits = np.frombuffer(mapped, dtype=np.uint8, count=(count + 7) // 8, offset=grid_offset + count)
+    explored = np.unpackbits(fog_bits, count=count).view(bool).reshape(height, width)
+    meta = _unpack_meta(mapped[meta_offset:meta_offset + meta_size])
+    save = SaveFile(width, height, save_id, grid, explored, meta)
+
+    delta_path = delta_path or path + '.delta'
+    if os.path.exists(delta_path):
+        _apply_delta(save, delta_path)
+    return save
+
+def _apply_delta(save, delta_path):
+    with open(delta_path, 'rb') as f:
+        data = f.read()
+    if len(data) < _DELTA_HEADER.size:
+        raise SaveError(f"{delta_path}: 文件太短")
+    magic, version, save_id, tile_count, fog_count, meta_size = _DELTA_HEADER.unpack_from(data)
+    if magic != DELTA_MAGIC or version != VERSION:
+        raise SaveError(f"{delta_path}: 不是增量存档")
+    if save_id != save.save_id:
+        return # 旧的增量，对应的完整存档已被覆盖
+    offset = _DELTA_HEADER.size
+    tile_indices = np.frombuffer(data, dtype='<u4', count=tile_count, offset=offset)
+    offset += 4 * tile_count
+    tile_values = np.frombuffer(data, dtype=np.uint8, count=tile_count, offset=offset)
+    offset += tile_count
+    fog_indices = np.frombuffer(data, dtype='<u4', count=fog_count, offset=offset)
+    offset += 4 * fog_count
+
+    np.frombuffer(save.grid, dtype=np.uint8)[tile_indices] = tile_values
+    save.base_explored = save.explored.copy()
+    save.explored.ravel()[fog_indices] = True
+    save.changed_tiles = tile_indices.astype(np.uint32)
+
+    # 增量元数据里只有变化过的营地
+    delta_meta = _unpack_meta(data[offset:offset + meta_size])
+    camps = {(x, y): camp for x, y, camp in save.base_meta['monster_camps']}
+    for x, y in delta_meta.pop('camps_removed'):
+        camps.pop((x, y), None)
+    for x, y, camp in delta_meta.pop('camps_changed'):
+        camps[(x, y)] = camp
+    delta_meta['monster_camps'] = [[x, y, camp] for (x, y), camp in camps.items()]
+    save.meta = delta_meta
+
+def _pack_array(values):
+    """NumPy 数组 -> [dtype, base64 字节]，放进 JSON 元数据"""
+    return [values.dtype.str, base64.b64encode(values.tobytes()).decode('ascii')]
+
+def _unpack_array(packed):
+    dtype, data = packed
+    return np.frombuffer(base64.b64decode(data), dtype=dtype)
+
+def world_meta(world, camps=True):
+    """World 中除地图和迷雾以外需要保存的数据（只含 JSON 类型）；camps=False 时不含营地
+
+    AI 实体每个 tick 都在动，增量存档也总是带上完整的实体数组。
+    """
+    version, state, gauss = world.rng.getstate()
+    arrays, entity_rng = world.entities.state()
+    meta = {
+        'seed': world.seed,
+        'rng_seed': world.rng_seed,
+        'rng': [version, list(state), gauss],
+        'day': world.day,
+        'events': world.events.entries(),
+        'towns': [[x, y] for (x, y), owner in world.town_owners.items() if owner is world.hero],
+        'hero': {field: getattr(world.hero, field) for field in HERO_FIELDS},
+        'log': world.hero.log.records(),
+        'entities': {'arrays': {name: _pack_array(values) for name, values in arrays.items()}, 'rng': entity_rng},
+    }
+    if camps:
+        meta['monster_camps'] = [[x, y, camp] for (x, y), camp in world.monster_camps.items()]
+    if world.map_source is not None:
+        # 流式加载的地图：记下地图文件和已读入的区块，读档后其余区块继续从地图文件读入
+        meta['map_file'] = world.map_source.path
+        meta['loaded_chunks'] = sorted(world.loaded_chunks)
+    return meta
+
+def world_from_save(save):
+    """由存档构造 World：地图直接使用内存映射的数据，英雄、营地、AI 实体、随机数状态和迷雾照原样恢复"""
+    meta = save.meta
+    camps = {(x, y): camp for x, y, camp in meta['monster_camps']}
+    game_map = CharGrid(save.width, save.height, data=save.grid)
+    world = World(save.width, save.height, meta['seed'], game_map=game_map, monster_camps=camps,
+                  rng_seed=meta.get('rng_seed'))
+    version, state, gauss = meta['rng']
+    world.rng.setstate((version, tuple(state), gauss))
+    world.day = meta.get('day', 1)
+    if 'events' in meta:
+        world.events.restore(meta['events'])
+    else: # 世界事件之前的存档：从读档这天开始排城镇收入和营地增长
+        world.events.restore([])
+        world.schedule_calendar()
+    world.town_owners = {(x, y): world.hero for x, y in meta.get('towns', [])}
+    for field in HERO_FIELDS:
+        if field in meta['hero']: # 回合制之前的存档没有 movement_left，按满移动力开始
+            setattr(world.hero, field, meta['hero'][field])
+    world.hero.log.restore(meta.get('log', []))
+    if 'entities' in meta: # 实体存档之前的存档只有玩家英雄
+        entities = meta['entities']
+        world.entities.restore({name: _unpack_array(packed) for name, packed in entities['arrays'].items()},
+                               entities['rng'])
+    world.restore_fog(save.explored)
+    if meta.get('map_file'):
+        world.map_source = MapFile(meta['map_file'])
+        world.loaded_chunks = {tuple(key) for key in meta['loaded_chunks']}
+    return world
+
+def explored_mask(world):
+    return (world.fog.state & EXPLORED).astype(bool)
+
+class SaveManager:
+    """一个 World 对应一个存档：完整存档 + 增量自动存档
+
+    完整存档之后，地图变化通过 CharGrid 的监听记录下来，自动存档只写这些格子、
+    新探索的格子、被清除或改动的营地和英雄数据。增量是相对完整存档累计的，
+    所以只有一个 .delta 文件；变化超过 compact_ratio 时改写完整存档。
+    """
+
+    def __init__(self, world, path, compact_ratio=0.25):
+        self.world = world
+        self.path = path
+        self.delta_path = path + '.delta'
+        self.compact_ratio = compact_ratio
+        self.save_id = None
+        self._changed = set()
+        self._base_explored = None
+        self._base_camps = None
+        world.game_map.add_listener(self._on_tile_changed)
+        world.game_map.add_block_listener(self._on_block_changed)
+
+    @classmethod
+    def load(cls, path, compact_ratio=0.25):
+        """读档，返回管理该存档的 SaveManager（world 属性为恢复出的 World）"""
+        save = read_save(path)
+        manager = cls(world_from_save(save), path, compact_ratio)
+        manager.save_id = save.save_id
+        manager._changed = set(save.changed_tiles.tolist())
+        manager._base_explored = save.base_explored.copy()
+        manager._base_camps = {(x, y): camp for x, y, camp in save.base_meta['monster_camps']}
+        return manager
+
+    def _on_tile_changed(self, x, y, old, new):
+        self._changed.add(y * self.world.map_width + x)
+
+    def _on_block_changed(self, x0, y0, w, h):
+        width = self.world.map_width
+        for y in range(y0, y0 + h):
+            self._changed.update(range(y * width + x0, y * width + x0 + w))
+
+    def save_full(self):
+        world = self.world
+        data = world.game_map.data
+        if isinstance(data, memoryview):
+            # 地图还映射着要覆盖的存档文件（Windows 上无法替换被映射的文件），先复制到内存
+            world.game_map.data = bytearray(data)
+            data.release()
+        explored = explored_mask(world)
+        self.save_id = write_save(self.path, world.map_width, world.map_height,
+                                  world.game_map.data, explored, world_meta(world))
+        if os.path.exists(self.delta_path):
+            os.remove(self.delta_path)
+        self._changed.clear()
+        self._base_explored = explored
+        self._base_camps = {pos: dict(camp) for pos, camp in world.monster_camps.items()}
+        return 'full'
+
+    def autosave(self):
+        """写增量存档；还没有完整存档或变化太多时写完整存档。返回 'full' 或 'delta'"""
+        world = self.world
+        if self.save_id is None or len(self._changed) > self.compact_ratio * world.map_width * world.map_height:
+            return self.save_full()
+        tile_indices = np.array(sorted(self._changed), dtype=np.uint32)
+        tile_values = np.frombuffer(world.game_map.data, dtype=np.uint8)[tile_indices]
+        fog_indices = np.flatnonzero(explored_mask(world) & ~self._base_explored)
+        camps = world.monster_camps
+        meta = world_meta(world, camps=False)
+        meta['camps_removed'] = [list(pos) for pos in self._base_camps.keys() - camps.keys()]
+        meta['camps_changed'] = [[x, y, camp] for (x, y), camp in camps.items() if self._base_camps.get((x, y)) != camp]
+        write_delta(self.delta_path, self.save_id, tile_indices, tile_values, fog_indices, meta)
+        return 'delta'
@@ -0,0 +1,99 @@
+"""主循环节奏：按需渲染、空闲时阻塞等待事件，以及固定步长更新
+
+以前主循环每秒 60 次取事件、画地图、提交画面，即使玩家只是看着屏幕也占满一个核。
+现在每次循环先调用 FrameScheduler.wait：有动画（镜头滚动、性能叠加层、回放）时
+照旧按帧率逐帧运行；否则阻塞在 pygame.event.wait 上，直到有输入或者到了下一次
+定时更新（AI 行动、行走的下一步、自动存档）。只有事件、游戏状态或镜头变化的那次
+循环才重画（request_redraw / should_render）。
+"""
+import math
+import pygame
+
+class FixedTimestep:
+    """固定步长更新：把长短不一的帧时间累积起来，按 step_ms 切成整数个更新步
+
+    alpha 为剩余时间占一步的比例，有动画时绘制可以用它在上一步和这一步的状态之间插值。
+    一帧最多执行 max_steps 步，卡顿之后多出的时间直接丢弃，不会越追越慢。
+    """
+
+    def __init__(self, step_ms, max_steps=5):
+        self.step_ms = step_ms
+        self.max_steps = max_steps
+        self.elapsed = 0
+
+    def advance(self, dt):
+        """累加 dt 毫秒，返回这一帧要执行的更新步数"""
+        self.elapsed += dt
+        steps = int(self.elapsed // self.step_ms)
+        if steps > self.max_steps:
+            steps = self.max_steps
+            self.elapsed %= self.step_ms
+        else:
+            self.elapsed -= steps * self.step_ms
+        return steps
+
+    @property
+    def alpha(self):
+        return self.elapsed / self.step_ms
+
+    def until_next(self):
+        """距下一步还有多少毫秒（空闲等待的超时）"""
+        return self.step_ms - self.elapsed
+
+class FrameScheduler:
+    """主循环的等待和渲染时机
+
+    每次循环：
+        events, dt = scheduler.wait(busy, wake_ms)   dt 为距上次 wait 返回的毫秒数
+        处理事件、更新游戏状态，有变化时 request_redraw()
+        if scheduler.should_render(): 绘制并提交
+    busy 为真时按 max_fps 限速后立即返回；否则阻塞到有事件或 wake_ms 毫秒后
+    （不给出时最长 idle_timeout_ms）。空闲后的第一个事件不做限速，按下按键马上响应。
+    idle_wait 设为 False 时每次都按 busy 处理（即以前逐帧运行的方式，用于对比测试）。
+    """
+
+    def __init__(self, max_fps=60, idle_timeout_ms=1000):
+        self.clock = pygame.time.Clock()
+        self.max_fps = max_fps
+        self.frame_ms = 1000 / max_fps
+        self.idle_timeout_ms = idle_timeout_ms
+        self.idle_wait = True
+        self.redraw = True # 第一帧总是要画
+        self.frames = 0    # 循环次数
+        self.renders = 0   # 其中重画的次数
+        self.idle_waits = 0
+
+    def start(self):
+        """主循环开始前调用：第一次 wait 返回的 dt 从这里算起，第一帧总是重画"""
+        self.clock.tick()
+        self.redraw = True
+
+    def wait(self, busy=False, wake_ms=None, fps=None):
+        """等到下一次循环，返回 (事件列表, dt)；fps 临时替换 max_fps（如按录像速度回放）"""
+        events = []
+        if not busy and self.idle_wait and not self.redraw:
+            timeout = self.idle_timeout_ms if wake_ms is None else min(wake_ms, self.idle_timeout_ms)
+            self.idle_waits += 1
+            event = pygame.event.wait(max(0, math.ceil(timeout)))
+            if event.type != pygame.NOEVENT:
+                events.append(event)
+        dt = self.clock.tick(fps or self.max_fps)
+        events += pygame.event.get()
+        if events or busy or not self.idle_wait:
+            self.redraw = True
+        self.frames += 1
+        return events, dt
+
+    def request_redraw(self):
+        self.redraw = True
+
+    def should_render(self):
+        """这次循环是否需要重画（读取后清除标记）"""
+        redraw, self.redraw = self.redraw, False
+        if redraw:
+            self.renders += 1
+        return redraw
+
+    def animation_dt(self, dt):
+        """给镜头滚动等动画用的 dt：空闲等待之后的第一帧按一帧算，不会一下跳出很远"""
+        return min(dt, self.frame_ms)
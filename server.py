@@ -0,0 +1,300 @@
+"""本机/局域网联机服务器：服务器持有唯一的权威 World，客户端只发指令、收状态
+
+协议为 TCP 上的 JSON Lines（每行一个 JSON 对象，UTF-8）。
+客户端 -> 服务器:
+    {"type": "hello", "name": "玩家"}        连接后第一条，服务器为它创建一个英雄
+    {"type": "move", "dx": 1, "dy": 0}       键盘移动一步
+    {"type": "goto", "x": 10, "y": 20}       点击地图，沿 A* 路径走过去（坐标必须在地图内）
+服务器 -> 客户端:
+    {"type": "welcome", ...}  完整状态：天数、地图（zlib + base64）、所有英雄、营地、AI 实体
+    {"type": "delta", ...}    之后每个 tick 一条，只含这个 tick 里变化的部分：地图格子、
+                              英雄状态中变了的字段和新事件、营地、AI 实体的移动方向，换天时还有天数
+    {"type": "error", "message": ...}
+
+联机是实时的：没有回合，也不扣移动力；每 DAY_SECONDS 秒服务器推进一天
+（World.advance_days），城镇收入、资源重生和营地增长照常发生。
+
+指令在收到时只排队，下一个 tick 按收到的顺序统一执行；每个 tick 的增量只计算
+和编码一次，同样的字节发给所有客户端。增量都是“设为某值”的操作，重复应用
+结果不变，所以 welcome 之后收到的第一条增量与 welcome 有重叠也没关系。
+"""
+import sys
+import json
+import time
+import zlib
+import base64
+import random
+import asyncio
+import traceback
+from engine import World
+from entities import PLAYER
+from savegame import HERO_FIELDS
+
+TICK_RATE = 10                      # 每秒 tick 数
+DEFAULT_PORT = 8765
+MAX_LINE = 64 * 1024                # 客户端一行的最大长度
+MAX_WRITE_BUFFER = 4 * 1024 * 1024  # 发送缓冲区积压超过这个字节数的客户端被断开（跟不上）
+MAX_EVENTS_PER_TICK = 20            # 每个英雄每个 tick 最多转发的事件条数
+DAY_SECONDS = 60                    # 联机时多少秒算一天
+
+def encode(message):
+    return json.dumps(message, ensure_ascii=False, separators=(',', ':')).encode('utf-8') + b'\n'
+
+# AI 实体每个 tick 最多走一步，增量里只发方向字符，不发坐标
+STEP_CODES = {(1, 0): 'R', (-1, 0): 'L', (0, 1): 'D', (0, -1): 'U'}
+STEP_DELTAS = {code: step for step, code in STEP_CODES.items()}
+
+def encode_steps(ids, dx, dy):
+    """移动了的实体：编号按升序差分编码（第一个为编号本身），方向拼成一个字符串"""
+    ids = ids.tolist()
+    gaps = [ids[0]] + [b - a for a, b in zip(ids, ids[1:])]
+    return {'gaps': gaps, 'steps': ''.join(STEP_CODES[step] for step in zip(dx.tolist(), dy.tolist()))}
+
+def decode_steps(moved):
+    """encode_steps 的逆过程，返回 (编号列表, dx 列表, dy 列表)"""
+    ids = []
+    current = 0
+    for i, gap in enumerate(moved['gaps']):
+        current = gap if i == 0 else current + gap
+        ids.append(current)
+    dx, dy = zip(*(STEP_DELTAS[code] for code in moved['steps'])) if ids else ((), ())
+    return ids, list(dx), list(dy)
+
+def hero_state(hero):
+    """英雄的可见状态，dict/list 字段复制一份，之后对比时不受原对象修改的影响"""
+    state = {}
+    for field in HERO_FIELDS:
+        value = getattr(hero, field)
+        state[field] = dict(value) if isinstance(value, dict) else list(value) if isinstance(value, list) else value
+    return state
+
+class GameServer:
+    """权威服务器：World、各客户端的英雄和 tick 循环
+
+    World 自带的 self.world.hero 不分配给客户端（从实体表中移除，不占格子）。
+    """
+
+    def __init__(self, world, tick_rate=TICK_RATE, seed=None, day_seconds=DAY_SECONDS):
+        self.world = world
+        self.tick_rate = tick_rate
+        self.day_ticks = max(1, round(day_seconds * tick_rate))
+        self.rng = random.Random(seed) # 只用于选出生点，不影响世界里的随机事件
+        self.tick_count = 0
+        self.heroes = {}      # 英雄编号 -> Hero
+        self.clients = {}     # 英雄编号 -> StreamWriter
+        self.pending = []     # [(英雄编号, 指令), ...]，下一个 tick 执行
+        self.tick_times = []  # 每个 tick 的计算耗时（秒）
+        self.bytes_sent = 0
+        self._next_id = 1
+        self._sent_heroes = {}  # 英雄编号 -> 上次发出的 hero_state
+        self._sent_events = {}  # 英雄编号 -> 上次发出时的 log.count
+        self._sent_camps = {pos: dict(camp) for pos, camp in world.monster_camps.items()}
+        self._left = []
+        self._changed_tiles = {}
+        world.entities.detach(world.hero)
+        world.game_map.add_listener(self._on_tile_changed)
+
+    def _on_tile_changed(self, x, y, old, new):
+        self._changed_tiles[(x, y)] = new
+
+    def join(self, name):
+        """新客户端：在随机的可通行格子附近创建英雄，返回编号"""
+        world = self.world
+        hero = world.add_hero(self.rng.randrange(world.map_width), self.rng.randrange(world.map_height), name)
+        hero_id = self._next_id
+        self._next_id += 1
+        self.heroes[hero_id] = hero
+        self._sent_events[hero_id] = 0
+        return hero_id
+
+    def leave(self, hero_id):
+        hero = self.heroes.pop(hero_id, None)
+        self.clients.pop(hero_id, None)
+        if hero is not None:
+            self.world.remove_hero(hero)
+            owners = self.world.town_owners
+            for pos in [pos for pos, owner in owners.items() if owner is hero]:
+                del owners[pos] # 城镇变回无主，不再给已离开的英雄记收入
+            self._sent_heroes.pop(hero_id, None)
+            self._sent_events.pop(hero_id, None)
+            self._left.append(hero_id)
+
+    def welcome(self, hero_id):
+        """完整状态（新客户端连接时发一次）"""
+        world = self.world
+        entities = world.entities
+        n = entities.count
+        ids = (entities.alive[:n] & (entities.kind[:n] != PLAYER)).nonzero()[0]
+        return {
+            'type': 'welcome',
+            'you': hero_id,
+            'tick': self.tick_count,
+            'tick_rate': self.tick_rate,
+            'day': world.day,
+            'width': world.map_width,
+            'height': world.map_height,
+            'map': base64.b64encode(zlib.compress(bytes(world.game_map.data))).decode('ascii'),
+            'heroes': [dict(hero_state(hero), id=i) for i, hero in self.heroes.items()],
+            'camps': [[x, y, camp] for (x, y), camp in world.monster_camps.items()],
+            'entities': {'ids': ids.tolist(), 'x': entities.x[ids].tolist(), 'y': entities.y[ids].tolist(),
+                         'kind': entities.kind[ids].tolist(), 'owner': entities.owner[ids].tolist()},
+        }
+
+    def submit(self, hero_id, message):
+        """客户端发来的一条消息转成 World 指令排队，格式不对时抛出 ValueError"""
+        kind = message.get('type')
+        if kind == 'move':
+            dx, dy = int(message['dx']), int(message['dy'])
+            if abs(dx) + abs(dy) != 1:
+                raise ValueError("move 只能走相邻的一格")
+            self.pending.append((hero_id, ('move', dx, dy)))
+        elif kind == 'goto':
+            x, y = int(message['x']), int(message['y'])
+            if not (0 <= x < self.world.map_width and 0 <= y < self.world.map_height):
+                raise ValueError(f"坐标 ({x}, {y}) 不在地图内")
+            self.pending.append((hero_id, ('goto', x, y)))
+        else:
+            raise ValueError(f"未知消息类型: {kind!r}")
+
+    def tick(self):
+        """执行排队的指令，推进 AI 实体，返回这个 tick 的增量消息"""
+        world = self.world
+        started = time.time()
+        start = time.perf_counter()
+        touched = {}    # 执行了指令的英雄
+        targets = set() # 指令的目标格子：营地战斗失败时那里的怪物数量会变
+        pending, self.pending = self.pending, []
+        for hero_id, command in pending:
+            hero = self.heroes.get(hero_id)
+            if hero is None:
+                continue # 已断开
+            action, a, b = command
+            targets.add((hero.x + a, hero.y + b) if action == 'move' else (a, b))
+            touched[hero_id] = hero # 出错时也可能已经走了几步
+            try:
+                world.apply(command, hero)
+            except Exception as error:
+                # 一条出错的指令只拒绝它自己，不能让 tick_loop 停下来
+                print(f"英雄 {hero_id} 的指令 {command} 执行出错:", file=sys.stderr)
+                traceback.print_exc()
+                writer = self.clients.get(hero_id)
+                if writer is not None:
+                    writer.write(encode({'type': 'error', 'message': f"指令执行出错: {error}"}))
+        moved, old_x, old_y = world.tick_entities()
+        self.tick_count += 1
+        new_day = self.tick_count % self.day_ticks == 0
+        if new_day:
+            world.advance_days(1)
+            touched.update(self.heroes)         # 城镇收入
+            targets.update(world.monster_camps) # 每周营地增长
+
+        delta = {'type': 'delta', 'tick': self.tick_count, 'time': started}
+        if new_day:
+            delta['day'] = world.day
+        heroes = []
+        for hero_id, hero in self.heroes.items():
+            sent = self._sent_heroes.get(hero_id)
+            if sent is not None and hero_id not in touched:
+                continue
+            state = hero_state(hero)
+            changed = {key: value for key, value in state.items() if sent is None or sent[key] != value}
+            new_events = min(hero.log.count - self._sent_events[hero_id], MAX_EVENTS_PER_TICK)
+            if new_events:
+                changed['events'] = [event.text for event in hero.log.tail(new_events)]
+                self._sent_events[hero_id] = hero.log.count
+            if changed:
+                heroes.append(dict(changed, id=hero_id))
+                self._sent_heroes[hero_id] = state
+        if heroes:
+            delta['heroes'] = heroes
+        if self._left:
+            delta['left'], self._left = self._left, []
+        if self._changed_tiles:
+            delta['tiles'] = [[x, y, char] for (x, y), char in self._changed_tiles.items()]
+            targets.update(self._changed_tiles)
+            self._changed_tiles = {}
+        camps = []
+        for pos in targets:
+            camp = world.monster_camps.get(pos)
+            if camp != self._sent_camps.get(pos):
+                camps.append([pos[0], pos[1], camp])
+                if camp is None:
+                    self._sent_camps.pop(pos, None)
+                else:
+                    self._sent_camps[pos] = dict(camp)
+        if camps:
+            delta['camps'] = camps
+        if len(moved):
+            delta['entities'] = encode_steps(moved, world.entities.x[moved] - old_x, world.entities.y[moved] - old_y)
+        self.tick_times.append(time.perf_counter() - start)
+        return delta
+
+    def broadcast(self, data):
+        for hero_id, writer in list(self.clients.items()):
+            if writer.transport.get_write_buffer_size() > MAX_WRITE_BUFFER:
+                writer.close() # 读取循环随之结束并调用 leave
+                continue
+            writer.write(data)
+            self.bytes_sent += len(data)
+
+    async def handle_client(self, reader, writer):
+        """一个客户端连接：hello 之后创建英雄、发 welcome，然后不断读取指令"""
+        hero_id = None
+        try:
+            hello = json.loads(await reader.readline() or b'{}')
+            if hello.get('type') != 'hello':
+                writer.write(encode({'type': 'error', 'message': "第一条消息必须是 hello"}))
+                return
+            hero_id = self.join(str(hello.get('name') or '玩家')[:32])
+            data = encode(self.welcome(hero_id))
+            writer.write(data)
+            self.bytes_sent += len(data)
+            self.clients[hero_id] = writer
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                try:
+                    self.submit(hero_id, json.loads(line))
+                except (ValueError, KeyError, TypeError, AttributeError, OverflowError) as error:
+                    writer.write(encode({'type': 'error', 'message': str(error)}))
+        except (ConnectionError, ValueError, AttributeError):
+            pass # 断线、一行太长或第一行不是 JSON
+        finally:
+            if hero_id is not None:
+                self.leave(hero_id)
+            writer.close()
+
+    async def tick_loop(self):
+        """固定频率 tick：按计划时间推进，某个 tick 超时后不补跑"""
+        loop = asyncio.get_running_loop()
+        interval = 1 / self.tick_rate
+        next_tick = loop.time()
+        while True:
+            self.broadcast(encode(self.tick()))
+            next_tick = max(next_tick + interval, loop.time())
+            await asyncio.sleep(next_tick - loop.time())
+
+    async def start(self, host='127.0.0.1', port=DEFAULT_PORT):
+        """开始监听并启动 tick 循环，返回 (asyncio.Server, tick 任务)；port=0 时由系统分配端口"""
+        server = await asyncio.start_server(self.handle_client, host, port, limit=MAX_LINE)
+        return server, asyncio.create_task(self.tick_loop())
+
+async def serve(world, host, port):
+    game_server = GameServer(world, seed=world.seed)
+    server, ticker = await game_server.start(host, port)
+    print(f"服务器已启动: {host}:{port}，地图 {world.map_width}x{world.map_height}，每秒 {TICK_RATE} tick")
+    async with server:
+        await asyncio.gather(server.serve_forever(), ticker)
+
+if __name__ == "__main__":
+    # 可选参数: 宽 高 种子 端口 电脑英雄数 游荡怪物数，例如 python server.py 256 256 42 8765 50 200
+    # 只监听本机；局域网联机时把 HOST 换成 0.0.0.0
+    args = [int(arg) for arg in sys.argv[1:7]]
+    world = World(*args[:3]) if len(args) >= 2 else World()
+    if len(args) > 4:
+        world.populate(args[4], args[5] if len(args) > 5 else 0)
+    try:
+        asyncio.run(serve(world, '127.0.0.1', args[3] if len(args) > 3 else DEFAULT_PORT))
+    except KeyboardInterrupt:
+        pass
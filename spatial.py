@@ -0,0 +1,143 @@
+import math
+from collections import namedtuple
+
+MapObject = namedtuple('MapObject', ['x', 'y', 'kind', 'data'])
+
+class SpatialIndex:
+    """地图对象的空间索引（均匀网格分桶）
+
+    按格子查找是 O(1) 的字典访问；矩形、半径和最近邻查询只检查相关的桶，
+    而不是扫描所有格子或所有对象。对象被拾取、清除时调用 remove 增量更新。
+    """
+
+    def __init__(self, bucket_size=16):
+        self.bucket_size = bucket_size
+        self._cells = {}    # (x, y) -> [MapObject, ...]
+        self._buckets = {}  # (bx, by) -> {(x, y), ...}
+        self._count = 0
+        self._bounds = None  # 出现过对象的桶坐标范围 (min_bx, min_by, max_bx, max_by)，只扩不缩
+
+    def __len__(self):
+        return self._count
+
+    def __iter__(self):
+        for objects in self._cells.values():
+            yield from objects
+
+    def add(self, x, y, kind, data=None):
+        obj = MapObject(x, y, kind, data)
+        cell = self._cells.get((x, y))
+        if cell is None:
+            self._cells[(x, y)] = [obj]
+            bucket = (x // self.bucket_size, y // self.bucket_size)
+            positions = self._buckets.get(bucket)
+            if positions is None:
+                positions = self._buckets[bucket] = set()
+                # 只有新建的桶才可能扩大范围
+                if self._bounds is None:
+                    self._bounds = bucket + bucket
+                else:
+                    min_bx, min_by, max_bx, max_by = self._bounds
+                    self._bounds = (min(min_bx, bucket[0]), min(min_by, bucket[1]),
+                                    max(max_bx, bucket[0]), max(max_by, bucket[1]))
+            positions.add((x, y))
+        else:
+            cell.append(obj)
+        self._count += 1
+        return obj
+
+    def remove(self, x, y, kind=None):
+        """移除格子上的对象（指定 kind 时只移除该类），返回被移除的对象列表"""
+        cell = self._cells.get((x, y))
+        if not cell:
+            return []
+        removed = [obj for obj in cell if kind is None or obj.kind == kind]
+        if not removed:
+            return []
+        kept = [obj for obj in cell if not (kind is None or obj.kind == kind)]
+        self._count -= len(removed)
+        if kept:
+            self._cells[(x, y)] = kept
+        else:
+            del self._cells[(x, y)]
+            bucket = (x // self.bucket_size, y // self.bucket_size)
+            positions = self._buckets[bucket]
+            positions.discard((x, y))
+            if not positions:
+                del self._buckets[bucket]
+        return removed
+
+    def move(self, obj, new_x, new_y):
+        """把对象移动到新格子，返回新的 MapObject"""
+        self.remove(obj.x, obj.y, obj.kind)
+        return self.add(new_x, new_y, obj.kind, obj.data)
+
+    def at(self, x, y, kind=None):
+        """格子上的对象列表"""
+        cell = self._cells.get((x, y), ())
+        if kind is None:
+            return list(cell)
+        return [obj for obj in cell if obj.kind == kind]
+
+    def query_rect(self, x0, y0, x1, y1, kind=None):
+        """矩形 [x0, x1) x [y0, y1) 内的对象"""
+        bs = self.bucket_size
+        result = []
+        for by in range(y0 // bs, (y1 - 1) // bs + 1):
+            for bx in range(x0 // bs, (x1 - 1) // bs + 1):
+                for x, y in self._buckets.get((bx, by), ()):
+                    if x0 <= x < x1 and y0 <= y < y1:
+                        result.extend(obj for obj in self._cells[(x, y)]
+                                      if kind is None or obj.kind == kind)
+        return result
+
+    def query_radius(self, x, y, radius, kind=None):
+        """与 (x, y) 欧氏距离不超过 radius 的对象"""
+        r = int(radius)
+        candidates = self.query_rect(x - r, y - r, x + r + 1, y + r + 1, kind)
+        radius_sq = radius * radius
+        return [obj for obj in candidates if (obj.x - x) ** 2 + (obj.y - y) ** 2 <= radius_sq]
+
+    def nearest(self, x, y, kind=None, max_radius=None, accept=None):
+        """离 (x, y) 最近的对象（欧氏距离），没有时返回 None
+
+        accept(obj) 返回 False 的对象被跳过（例如还在迷雾中的地点）。
+        从所在的桶开始一圈圈向外搜索，当前圈与点的最近距离已超过找到的最好结果时停止。
+        """
+        if not self._buckets:
+            return None
+        bs = self.bucket_size
+        bx, by = x // bs, y // bs
+        best = None
+        best_dist_sq = math.inf if max_radius is None else max_radius * max_radius + 1e-9
+        # 搜索圈覆盖了所有出现过对象的桶就可以停止
+        min_bx, min_by, max_bx, max_by = self._bounds
+        max_ring = max(abs(bx - min_bx), abs(bx - max_bx), abs(by - min_by), abs(by - max_by))
+        for ring in range(max_ring + 1):
+            # 第 ring 圈的桶离点至少 (ring - 1) * bs 格
+            min_dist = max(0, ring - 1) * bs
+            if min_dist * min_dist > best_dist_sq:
+                break
+            for bucket in _ring(bx, by, ring):
+                for px, py in self._buckets.get(bucket, ()):
+                    dist_sq = (px - x) ** 2 + (py - y) ** 2
+                    if dist_sq >= best_dist_sq:
+                        continue
+                    for obj in self._cells[(px, py)]:
+                        if (kind is None or obj.kind == kind) and (accept is None or accept(obj)):
+                            best = obj
+                            best_dist_sq = dist_sq
+                            break
+        return best
+
+def _ring(cx, cy, ring):
+    """以 (cx, cy) 为中心、切比雪夫半径为 ring 的一圈桶坐标"""
+    if ring == 0:
+        yield cx, cy
+        return
+    for dx in range(-ring, ring + 1):
+        yield cx + dx, cy - ring
+        yield cx + dx, cy + ring
+    for dy in range(-ring + 1, ring):
+        yield cx - ring, cy + dy
+        yield cx + ring, cy + dy
@@ -0,0 +1,114 @@
+import os
+import sys
+import json
+import time
+import threading
+import pygame
+
+# 从进程开始到第一帧（加载画面）的时间预算
+FIRST_FRAME_BUDGET_MS = 500
+FONT_CACHE_PATH = os.path.join(os.path.expanduser('~'), '.cache', 'hero', 'fonts.json')
+LOADING_REFRESH_MS = 100  # 后台生成地图时加载画面的刷新间隔
+
+class StartupTimer:
+    """记录启动各阶段耗时：每个阶段结束时调用 mark(阶段名)，记录与上一次 mark 之间的时间"""
+
+    def __init__(self, import_ms=0.0):
+        self.phases = [('import', import_ms)] if import_ms else []
+        self._last = time.perf_counter()
+
+    def mark(self, phase):
+        now = time.perf_counter()
+        self.phases.append((phase, (now - self._last) * 1000))
+        self._last = now
+
+    def elapsed_until(self, phase):
+        """从导入开始到 phase 结束的累计毫秒数"""
+        total = 0.0
+        for name, ms in self.phases:
+            total += ms
+            if name == phase:
+                return total
+        return None
+
+    def as_dict(self):
+        return dict(self.phases)
+
+    def report(self, budget_ms=FIRST_FRAME_BUDGET_MS):
+        """一行启动报告，首帧超出预算时注明"""
+        text = "启动耗时: " + ", ".join(f"{name} {ms:.0f} ms" for name, ms in self.phases)
+        first_frame = self.elapsed_until('first_frame')
+        if first_frame is not None and first_frame > budget_ms:
+            text += f"（首帧 {first_frame:.0f} ms，超出预算 {budget_ms} ms）"
+        return text
+
+def init_display():
+    """只初始化显示和字体模块；pygame.init() 还会初始化音频、手柄等用不到的子系统"""
+    pygame.display.init()
+    pygame.font.init()
+
+def _load_font_cache():
+    try:
+        with open(FONT_CACHE_PATH, encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+def _save_font_cache(cache):
+    try:
+        os.makedirs(os.path.dirname(FONT_CACHE_PATH), exist_ok=True)
+        with open(FONT_CACHE_PATH, 'w', encoding='utf-8') as f:
+            json.dump(cache, f, ensure_ascii=False, indent=1)
+    except OSError:
+        pass # 缓存写不进去只是下次启动慢一点
+
+def sysfont(name, size, bold=False, italic=False):
+    """与 pygame.font.SysFont 相同，但字体文件路径缓存在磁盘上
+
+    SysFont 第一次调用时要扫描系统字体（Linux 上运行 fc-list，Windows 上读注册表），
+    这里只在缓存中没有这个字体、或缓存的文件已经不存在时才扫描。找不到的字体也会
+    缓存（记为 null），使用 pygame 默认字体。
+    """
+    key = f"{name.lower()}|{int(bold)}|{int(italic)}"
+    cache = _load_font_cache()
+    if key in cache and (cache[key] is None or os.path.exists(cache[key])):
+        path = cache[key]
+    else:
+        path = pygame.font.match_font(name, bold, italic)
+        cache[key] = path
+        _save_font_cache(cache)
+    return pygame.font.Font(path, size)
+
+def draw_loading(screen, font, text):
+    """加载画面：黑底居中一行文字"""
+    screen.fill((0, 0, 0))
+    surface = font.render(text, True, (255, 255, 255))
+    screen.blit(surface, surface.get_rect(center=screen.get_rect().center))
+    pygame.display.flip()
+
+def run_with_loading_screen(screen, font, task, message):
+    """在后台线程运行 task()（不能调用 pygame），期间主线程处理窗口事件、刷新加载画面
+
+    返回 task 的结果，task 抛出的异常在这里重新抛出。加载期间关闭窗口直接退出程序。
+    """
+    result = {}
+    def worker():
+        try:
+            result['value'] = task()
+        except BaseException as error:
+            result['error'] = error
+    thread = threading.Thread(target=worker, name='loading', daemon=True)
+    start = time.perf_counter()
+    thread.start()
+    while True:
+        thread.join(LOADING_REFRESH_MS / 1000)
+        if not thread.is_alive():
+            break
+        for event in pygame.event.get():
+            if event.type == pygame.QUIT:
+                pygame.quit()
+                sys.exit()
+        draw_loading(screen, font, f"{message} {time.perf_counter() - start:.1f}s")
+    if 'error' in result:
+        raise result['error']
+    return result['value']
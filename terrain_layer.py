@@ -0,0 +1,167 @@
+import numpy as np
+import pygame
+
+class TerrainLayer:
+    """预渲染的静态地图层，按区块缓存
+
+    地图被切成 chunk_size x chunk_size 格的区块，每个区块在第一次进入视口时
+    从格子图集（atlas.TileAtlas）一次 blits 画到一张离屏 Surface 上（地形、网格线和不常变化的地图对象）。
+    每帧只拷贝视口内的区块；镜头不动时只把“脏”格子从区块拷回屏幕，
+    调用方再在这些格子上画英雄、高亮等动态内容，最后用
+    pygame.display.update(脏矩形) 提交。离镜头太远的区块会被释放。
+    """
+
+    def __init__(self, width, height, tile_size, atlas, tile_ids, camera, chunk_size=32, keep_distance=1):
+        """tile_ids(x0, y0, x1, y1) 返回格子范围 [x0, x1) x [y0, y1) 的外观编号数组（形状为 (行, 列)），
+        编号对应 atlas 的 styles
+
+        keep_distance: 可见区块范围之外再保留几圈区块，超出的被释放
+        """
+        self.width = width
+        self.height = height
+        self.tile_size = tile_size
+        self.atlas = atlas
+        self.tile_ids = tile_ids
+        self.camera = camera
+        self.chunk_size = chunk_size
+        self.keep_distance = keep_distance
+        self.chunks = {}
+        self.dirty_tiles = set()
+        self.full_redraw = True
+
+    def build(self):
+        """丢弃所有区块缓存，下一帧按需重画"""
+        self.chunks.clear()
+        self.full_redraw = True
+
+    def set_tile_size(self, tile_size):
+        """缩放：换用图集中另一尺寸的格子，区块缓存全部作废"""
+        self.tile_size = tile_size
+        self.build()
+
+    def _build_chunk(self, cx, cy):
+        ts = self.tile_size
+        x0 = cx * self.chunk_size
+        y0 = cy * self.chunk_size
+        x1 = min(self.width, x0 + self.chunk_size)
+        y1 = min(self.height, y0 + self.chunk_size)
+        surface = pygame.Surface(((x1 - x0) * ts, (y1 - y0) * ts)).convert()
+        self.atlas.blit_block(surface, ts, self.tile_ids(x0, y0, x1, y1))
+        self.chunks[(cx, cy)] = surface
+        return surface
+
+    def _local_rect(self, x, y):
+        """格子在所属区块 Surface 上的矩形"""
+        ts = self.tile_size
+        return pygame.Rect((x % self.chunk_size) * ts, (y % self.chunk_size) * ts, ts, ts)
+
+    def visible_chunks(self):
+        """视口覆盖的区块范围 (cx0, cy0, cx1, cy1)，右下边界不含"""
+        x0, y0, x1, y1 = self.camera.visible_tiles()
+        cs = self.chunk_size
+        return x0 // cs, y0 // cs, -(-x1 // cs), -(-y1 // cs)
+
+    def screen_rect(self, x, y):
+        """格子在屏幕上的矩形"""
+        return self.camera.tile_rect(x, y)
+
+    def invalidate(self, x, y):
+        """格子的静态内容变了：重画已缓存区块中的这一格并标记为脏"""
+        if 0 <= x < self.width and 0 <= y < self.height:
+            chunk = self.chunks.get((x // self.chunk_size, y // self.chunk_size))
+            if chunk is not None:
+                self.atlas.blit_tile(chunk, self.tile_size, int(self.tile_ids(x, y, x + 1, y + 1)[0, 0]),
+                                     self._local_rect(x, y))
+            self.dirty_tiles.add((x, y))
+
+    def invalidate_region(self, x0, y0, x1, y1):
+        """格子范围 [x0, x1) x [y0, y1) 整块变了（流式读入的地图区块）：丢弃覆盖它的区块缓存，在视口内时整体重画"""
+        cs = self.chunk_size
+        stale = [key for key in self.chunks
+                 if x0 // cs <= key[0] <= (x1 - 1) // cs and y0 // cs <= key[1] <= (y1 - 1) // cs]
+        for key in stale:
+            del self.chunks[key]
+        vx0, vy0, vx1, vy1 = self.camera.visible_tiles()
+        if x0 < vx1 and vx0 < x1 and y0 < vy1 and vy0 < y1:
+            self.full_redraw = True
+
+    def mark_dirty(self, x, y):
+        """格子上的动态内容变了（英雄移动、悬停），下一帧需要从缓存恢复"""
+        if 0 <= x < self.width and 0 <= y < self.height:
+            self.dirty_tiles.add((x, y))
+
+    def mark_dirty_many(self, xs, ys):
+        """批量标记格子（坐标数组），视口外的格子直接跳过"""
+        x0, y0, x1, y1 = self.camera.visible_tiles()
+        xs = np.asarray(xs)
+        ys = np.asarray(ys)
+        visible = (xs >= x0) & (xs < x1) & (ys >= y0) & (ys < y1)
+        self.dirty_tiles.update(zip(xs[visible].tolist(), ys[visible].tolist()))
+
+    def mark_rect_dirty(self, rect):
+        """屏幕矩形下的所有格子标记为脏（被提示框等覆盖过的区域）"""
+        camera = self.camera
+        ts = self.tile_size
+        rect = pygame.Rect(rect).clip(camera.viewport)
+        x0 = (rect.left - camera.viewport.x + camera.x) // ts
+        y0 = (rect.top - camera.viewport.y + camera.y) // ts
+        x1 = (rect.right - 1 - camera.viewport.x + camera.x) // ts
+        y1 = (rect.bottom - 1 - camera.viewport.y + camera.y) // ts
+        for y in range(max(0, y0), min(self.height, y1 + 1)):
+            for x in range(max(0, x0), min(self.width, x1 + 1)):
+                self.dirty_tiles.add((x, y))
+
+    def restore(self, screen):
+        """把需要更新的部分从区块缓存拷回屏幕，返回需要提交的屏幕矩形列表
+
+        镜头移动过就重画整个视口，否则只拷贝脏格子。
+        脏标记保留到 clear_dirty()，方便调用方用 is_dirty() 判断哪些动态内容要重画。
+        """
+        viewport = self.camera.viewport
+        if self.camera.moved:
+            self.full_redraw = True
+
+        old_clip = screen.get_clip()
+        screen.set_clip(viewport)
+        if self.full_redraw:
+            screen.fill((0, 0, 0), viewport)
+            cx0, cy0, cx1, cy1 = self.visible_chunks()
+            span = self.chunk_size * self.tile_size
+            blits = []
+            for cy in range(cy0, cy1):
+                for cx in range(cx0, cx1):
+                    chunk = self.chunks.get((cx, cy))
+                    if chunk is None:
+                        chunk = self._build_chunk(cx, cy)
+                    blits.append((chunk, (viewport.x + cx * span - self.camera.x,
+                                          viewport.y + cy * span - self.camera.y)))
+            screen.blits(blits, doreturn=False)
+            self.evict(cx0, cy0, cx1, cy1)
+            rects = [viewport.copy()]
+        else:
+            blits = []
+            for x, y in self.dirty_tiles:
+                dest = self.camera.tile_rect(x, y)
+                chunk = self.chunks.get((x // self.chunk_size, y // self.chunk_size))
+                if chunk is None or not dest.colliderect(viewport):
+                    continue
+                blits.append((chunk, dest, self._local_rect(x, y)))
+            rects = screen.blits(blits) if blits else []
+        screen.set_clip(old_clip)
+        return rects
+
+    def evict(self, cx0, cy0, cx1, cy1):
+        """释放离可见范围超过 keep_distance 圈的区块"""
+        keep = self.keep_distance
+        far = [key for key in self.chunks
+               if not (cx0 - keep <= key[0] < cx1 + keep and cy0 - keep <= key[1] < cy1 + keep)]
+        for key in far:
+            del self.chunks[key]
+
+    def is_dirty(self, x, y):
+        return self.full_redraw or (x, y) in self.dirty_tiles
+
+    def clear_dirty(self):
+        self.full_redraw = False
+        self.camera.moved = False
+        self.dirty_tiles.clear()
@@ -0,0 +1,126 @@
+import numpy as np
+from enum import Enum
+
+class TerrainType(Enum):
+    GRASS = 0
+    WATER = 1
+    MOUNTAIN = 2
+    FOREST = 3
+    DESERT = 4
+    SWAMP = 5
+
+class ObjectType(Enum):
+    EMPTY = 0
+    HERO = 1
+    TOWN = 2
+    RESOURCE = 3
+    MONSTER = 4
+    ARTIFACT = 5
+
+# 枚举值是连续的小整数，直接用元组按值查表，比 TerrainType(v) 快
+TERRAIN_BY_VALUE = tuple(TerrainType)
+OBJECT_BY_VALUE = tuple(ObjectType)
+
+class TileView:
+    """单个格子的轻量视图，读写都直接落到 TileGrid 的数组上"""
+    __slots__ = ('grid', 'x', 'y')
+
+    def __init__(self, grid, x, y):
+        self.grid = grid
+        self.x = x
+        self.y = y
+
+    @property
+    def terrain_type(self):
+        return TERRAIN_BY_VALUE[self.grid.terrain[self.y, self.x]]
+
+    @terrain_type.setter
+    def terrain_type(self, terrain_type):
+        self.grid.terrain[self.y, self.x] = terrain_type.value
+        self.grid.notify(self.x, self.y)
+
+    @property
+    def object_type(self):
+        return OBJECT_BY_VALUE[self.grid.objects[self.y, self.x]]
+
+    @object_type.setter
+    def object_type(self, object_type):
+        self.grid.objects[self.y, self.x] = object_type.value
+        self.grid.notify(self.x, self.y)
+
+    @property
+    def explored(self):
+        return bool(self.grid.explored[self.y, self.x])
+
+    @explored.setter
+    def explored(self, explored):
+        self.grid.explored[self.y, self.x] = 1 if explored else 0
+        self.grid.notify(self.x, self.y)
+
+class _RowView:
+    """一行格子的视图，让 grid[y][x] 的旧写法继续可用"""
+    __slots__ = ('grid', 'y')
+
+    def __init__(self, grid, y):
+        self.grid = grid
+        self.y = y
+
+    def __getitem__(self, x):
+        if x < 0:
+            x += self.grid.width
+        if not 0 <= x < self.grid.width:
+            raise IndexError(x)
+        return TileView(self.grid, x, self.y)
+
+    def __len__(self):
+        return self.grid.width
+
+    def __iter__(self):
+        for x in range(self.grid.width):
+            yield TileView(self.grid, x, self.y)
+
+class TileGrid:
+    """紧凑的格子存储：地形、对象、探索标记各占一个连续的 uint8 数组
+
+    数组形状为 (height, width)，按 [y, x] 索引。需要批量处理时直接操作
+    terrain/objects/explored 数组；零散访问可以继续用 grid[y][x].terrain_type。
+    通过视图修改格子会通知监听者；直接写数组不会，批量修改后需要调用方自己刷新。
+    """
+
+    def __init__(self, width, height, terrain_type=TerrainType.GRASS):
+        self.width = width
+        self.height = height
+        self.terrain = np.full((height, width), terrain_type.value, dtype=np.uint8)
+        self.objects = np.zeros((height, width), dtype=np.uint8)
+        self.explored = np.ones((height, width), dtype=np.uint8)  # 在这个版本中所有地图都是可见的
+        self._rows = [_RowView(self, y) for y in range(height)]
+        self._listeners = []
+
+    def __getitem__(self, y):
+        return self._rows[y]
+
+    def __len__(self):
+        return self.height
+
+    def __iter__(self):
+        return iter(self._rows)
+
+    def tile(self, x, y):
+        """获取 (x, y) 处格子的视图"""
+        return TileView(self, x, y)
+
+    def add_listener(self, listener):
+        """listener(x, y) 在格子通过视图被修改后调用"""
+        self._listeners.append(listener)
+
+    def remove_listener(self, listener):
+        self._listeners.remove(listener)
+
+    def notify(self, x, y):
+        for listener in self._listeners:
+            listener(x, y)
+
+    @property
+    def nbytes(self):
+        """三个数组占用的字节数"""
+        return self.terrain.nbytes + self.objects.nbytes + self.explored.nbytes
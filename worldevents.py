@@ -0,0 +1,50 @@
+"""按天触发的世界事件：heapq 定时队列，每次推进只取出到期的事件
+
+资源点、宝箱被采集后过几天重新出现，城镇每天给占领者收入，怪物营地每周增长。
+这些都登记成 (到期的天数, 事件类型, 参数) 放进小根堆，World.advance_days 推进到
+某一天时只弹出堆顶已经到期的事件，不逐天扫描地图上的全部地点；一次快进很多天
+也只处理这期间真正到期的事件。每天、每周重复的事件在处理时把下一次登记回堆里。
+
+同一天到期的事件按登记顺序处理（条目里带递增的序号），存档读档、录像回放都
+按同样的顺序执行。参数只用 JSON 类型，可以原样写进存档。
+"""
+import heapq
+
+class EventQueue:
+    """按到期天数排序的事件队列"""
+
+    def __init__(self):
+        self._heap = [] # (到期的天数, 序号, 事件类型, 参数元组)
+        self._seq = 0
+        self.fired = 0  # 累计处理过的事件数（性能测试用）
+
+    def __len__(self):
+        return len(self._heap)
+
+    def schedule(self, day, kind, *args):
+        """登记一个在第 day 天触发的事件"""
+        heapq.heappush(self._heap, (day, self._seq, kind, args))
+        self._seq += 1
+
+    def next_day(self):
+        """最早的到期天数，队列为空时返回 None"""
+        return self._heap[0][0] if self._heap else None
+
+    def pop_due(self, day):
+        """依次取出第 day 天及之前到期的事件 (天数, 类型, 参数)；处理时新登记的到期事件也会取到"""
+        heap = self._heap
+        while heap and heap[0][0] <= day:
+            due, _, kind, args = heapq.heappop(heap)
+            self.fired += 1
+            yield due, kind, args
+
+    def entries(self):
+        """[[天数, 类型, 参数...], ...]，按触发顺序排列（存档、校验和用）"""
+        return [[day, kind, *args] for day, _, kind, args in sorted(self._heap)]
+
+    def restore(self, entries):
+        """清空后按 entries() 的结果重新登记，触发顺序不变"""
+        self._heap = []
+        self._seq = 0
+        for day, kind, *args in entries:
+            self.schedule(day, kind, *args)